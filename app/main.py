@@ -1,17 +1,53 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from netbot.api.api import router as api_router
-from netbot.db import init_db
+import asyncio
+import importlib
 import os
 
-# Initialize database on startup
-init_db()
+
+def warm_up():
+    """Initialize the database and load the modules the endpoints import lazily"""
+    try:
+        from netbot.db import init_db
+        init_db()
+        importlib.import_module("netbot.core.dispatcher")
+    except Exception as e:
+        # Requests retry init_db themselves, so just report it
+        print(f"Startup warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Initialize the database on startup.
+    It runs in the background so the server answers /health straight away;
+    a request that needs the database first simply waits for init_db.
+
+    Also starts the background tasks; with several workers
+    (NETBOT_MULTI_WORKER=1) only the elected leader runs them.
+    """
+    from netbot.core.multiworker import run_background_tasks, setup_worker
+
+    setup_worker()
+    warmup = asyncio.create_task(asyncio.to_thread(warm_up))
+    background = asyncio.create_task(run_background_tasks())
+    yield
+    await warmup
+    background.cancel()
+    try:
+        await background
+    except asyncio.CancelledError:
+        pass
+
 
 app = FastAPI(
     title="NetBot",
     description="Rule-based network diagnostics chatbot",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Include all API routes under /v1
@@ -1,7 +1,11 @@
 from fastapi import APIRouter
-from .endpoints import ping, chat
+from .endpoints import ping, chat, bulk, analytics, logs, scan
 
 router = APIRouter()
 
 router.include_router(ping.router, prefix="/v1", tags=["ping"])
 router.include_router(chat.router, prefix="/v1", tags=["chat"])
+router.include_router(bulk.router, prefix="/v1", tags=["bulk"])
+router.include_router(analytics.router, prefix="/v1", tags=["analytics"])
+router.include_router(logs.router, prefix="/v1", tags=["logs"])
+router.include_router(scan.router, prefix="/v1", tags=["scan"])
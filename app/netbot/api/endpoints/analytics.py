@@ -0,0 +1,119 @@
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime, timedelta
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/analytics/actions")
+def actions_over_time(
+    granularity: str = Query("hour", description="Bucket size: hour or day"),
+    window: int = Query(24, ge=1, le=24 * 366, description="Number of buckets to return"),
+    action: Optional[str] = Query(None, description="Only this action")
+):
+    """
+    Action counts and durations per time bucket, action and status.
+    Served from the pre-aggregated rollup tables.
+    """
+    if granularity not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    since = datetime.utcnow() - step * window
+
+    from netbot.db import get_session, get_action_rollups
+
+    db = get_session()
+    try:
+        rows = get_action_rollups(db, granularity, since, action)
+        return {
+            "granularity": granularity,
+            "since": since.isoformat(),
+            "buckets": [
+                {
+                    "bucket": row.bucket.isoformat(),
+                    "action": row.action,
+                    "status": row.status,
+                    "count": row.count,
+                    "avg_duration_ms": round(row.total_duration_ms / row.count, 2) if row.count else None,
+                    "max_duration_ms": row.max_duration_ms
+                }
+                for row in rows
+            ]
+        }
+    finally:
+        db.close()
+
+
+@router.get("/analytics/error-rate")
+def error_rate(days: int = Query(7, ge=1, le=366, description="Days to look back")):
+    """
+    Error rate per action over the last days.
+    """
+    from netbot.db import get_session, get_error_rates
+
+    since = datetime.utcnow() - timedelta(days=days)
+
+    db = get_session()
+    try:
+        return {
+            "since": since.isoformat(),
+            "actions": [
+                {
+                    "action": action,
+                    "total": total,
+                    "errors": errors,
+                    "error_rate": round(errors / total, 4) if total else 0.0
+                }
+                for action, total, errors in get_error_rates(db, since)
+            ]
+        }
+    finally:
+        db.close()
+
+
+@router.get("/analytics/slowest-targets")
+def slowest_targets(
+    limit: int = Query(10, ge=1, le=500),
+    action: Optional[str] = Query(None, description="Only this action")
+):
+    """
+    Targets with the highest average action duration.
+    """
+    from netbot.db import get_session, get_slowest_targets
+
+    db = get_session()
+    try:
+        return {
+            "targets": [
+                {
+                    "action": row.action,
+                    "target": row.target,
+                    "count": row.count,
+                    "avg_duration_ms": round(row.total_duration_ms / row.count, 2),
+                    "max_duration_ms": row.max_duration_ms,
+                    "last_seen": row.last_seen.isoformat()
+                }
+                for row in get_slowest_targets(db, limit, action)
+            ]
+        }
+    finally:
+        db.close()
+
+
+@router.post("/analytics/rebuild")
+def rebuild(days: Optional[int] = Query(None, ge=1, description="Only rebuild the last days")):
+    """
+    Recompute the rollups from the raw action logs (compaction/backfill).
+    History older than the oldest raw log (removed by retention) is kept.
+    """
+    from netbot.db import get_session, rebuild_rollups
+
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+
+    db = get_session()
+    try:
+        count = rebuild_rollups(db, since)
+        return {"status": "success", "logs_aggregated": count}
+    finally:
+        db.close()
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from contextlib import aclosing
+from typing import List, Optional
+import asyncio
+import orjson
+
+router = APIRouter()
+
+# Number of results buffered before they are written to the action log
+LOG_BATCH_SIZE = 100
+
+
+def _write_logs(entries: List[dict]):
+    """Write a batch of bulk results to the action log"""
+    from netbot.core.action_log import write_action_logs
+
+    try:
+        write_action_logs(entries)
+    except Exception as e:
+        # Don't fail the stream if logging fails
+        print(f"Failed to log bulk actions: {e}")
+
+
+@router.post("/bulk")
+async def bulk(
+    request: Request,
+    action: str = Query(..., description="Action to run: ping, check_ports or dns_lookup"),
+    ports: Optional[str] = Query(None, description="Comma separated ports for check_ports"),
+    record_types: Optional[str] = Query(None, description="Comma separated DNS record types for dns_lookup"),
+    detect: bool = Query(False, description="Identify the services on open ports (check_ports)")
+):
+    """
+    Run one diagnostic action against a list of targets.
+
+    The body is a JSON list, NDJSON or CSV list of targets (chosen by Content-Type).
+    Results are streamed back as NDJSON, one line per unique target, in completion order.
+    """
+    # Networking code is loaded on first use to keep startup fast
+    from netbot.core.bulk import BULK_ACTIONS, parse_targets, run_bulk
+
+    if action not in BULK_ACTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported action '{action}'. Use one of: {', '.join(BULK_ACTIONS)}"
+        )
+
+    try:
+        port_list = [int(p) for p in ports.split(",")] if ports else None
+        type_list = [t.strip().upper() for t in record_types.split(",")] if record_types else None
+        targets = parse_targets(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {e}")
+
+    if not targets:
+        raise HTTPException(status_code=400, detail="No targets provided")
+
+    async def stream():
+        pending_logs = []
+        try:
+            # Closing the results cancels the queued probes when the client goes away
+            async with aclosing(run_bulk(action, targets, port_list, type_list, detect)) as results:
+                async for result in results:
+                    line = orjson.dumps(result)
+                    parameters = {"host": result["target"]}
+                    if port_list:
+                        parameters["ports"] = port_list
+                    # Queued before the line is sent, so it's logged even if the
+                    # client disconnects right after receiving it
+                    pending_logs.append({
+                        "action": action,
+                        "parameters": parameters,
+                        "result_summary": line[:200].decode("utf-8", "replace"),
+                        "status": result["status"],
+                        "duration_ms": result["duration_ms"]
+                    })
+                    yield line + b"\n"
+
+                    if len(pending_logs) >= LOG_BATCH_SIZE:
+                        batch, pending_logs = pending_logs, []
+                        await asyncio.to_thread(_write_logs, batch)
+        finally:
+            if pending_logs:
+                await asyncio.to_thread(_write_logs, pending_logs)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -1,104 +1,189 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse
 from netbot.schemas import ChatRequest, ChatResponse
 from netbot.core.chatbot import ChatBot
-from netbot.core.networking import (
-    ping_host,
-    scan_local_network,
-    check_ports,
-    get_local_ip,
-    get_default_gateway,
-    traceroute,
-    dns_lookup
-)
-from netbot.db import get_session, create_action_log
-import json
+from typing import Any, Dict
+import asyncio
+import orjson
 
 router = APIRouter()
 chatbot = ChatBot()
 
+# Requests one WebSocket connection may have running at the same time
+MAX_OUTSTANDING_REQUESTS = 8
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+
+@router.post("/chat", response_model=ChatResponse, response_class=ORJSONResponse)
+async def chat(
+    request: ChatRequest,
+    compact: bool = Query(False, description="Only return the raw data, without the formatted message")
+):
     """
     Process natural language chat message and perform network diagnostic actions.
+    A message may contain several requests, which are run concurrently.
+
+    The response is serialised straight from the typed result records with
+    orjson. In compact mode the friendly message is neither built nor sent.
     """
-    # Parse user message to extract intent
-    intent = chatbot.parse_message(request.message)
-    
-    # Execute the appropriate action based on intent
-    if intent.action == "ping":
-        result = ping_host(intent.parameters.get("host"))
-        response_message = chatbot.format_response(intent.action, result)
-        status = result.get("status", "error")
-    
-    elif intent.action == "scan_network":
-        result = scan_local_network()
-        response_message = chatbot.format_response(intent.action, result)
-        status = result.get("status", "error")
-    
-    elif intent.action == "check_ports":
-        host = intent.parameters.get("host")
-        ports = intent.parameters.get("ports", [22, 80, 443])
-        result = check_ports(host, ports)
-        response_message = chatbot.format_response(intent.action, result)
-        status = result.get("status", "error")
-    
-    elif intent.action == "get_local_ip":
-        result = get_local_ip()
-        response_message = chatbot.format_response(intent.action, result)
-        status = result.get("status", "error")
-    
-    elif intent.action == "get_gateway":
-        result = get_default_gateway()
-        response_message = chatbot.format_response(intent.action, result)
-        status = result.get("status", "error")
-    
-    elif intent.action == "traceroute":
-        result = traceroute(intent.parameters.get("host"))
-        response_message = chatbot.format_response(intent.action, result)
-        status = result.get("status", "error")
+    intents, outcomes, content = await _run_message(request.message, compact)
     
-    elif intent.action == "dns_lookup":
-        result = dns_lookup(intent.parameters.get("host"))
-        response_message = chatbot.format_response(intent.action, result)
-        status = result.get("status", "error")
+    # Log each action; the write blocks, so keep it off the event loop
+    await asyncio.to_thread(_log_outcomes, intents, outcomes)
     
-    elif intent.action == "help":
-        result = {"status": "success"}
-        response_message = chatbot.get_help_text()
-        status = "success"
+    # The records are already typed, so skip the response_model validation
+    return ORJSONResponse(content)
+
+
+@router.websocket("/chat/ws")
+async def chat_ws(websocket: WebSocket):
+    """
+    Chat over one persistent WebSocket connection.
+
+    Each client frame is a request: {"id": ..., "message": "...", "compact": false},
+    where id is a string or an integer.
+    Requests run concurrently and every server frame carries the id of its request:
+    - {"type": "progress", "id", "index", "action", "done", "total", "items"} while
+      check_ports, scan_network and traceroute run (items are the new ports,
+      devices or hops; index is the action's position in a multi-action message)
+    - {"type": "result", "id", "message", "action", "status", "data"} when done,
+      the same body as POST /v1/chat
+    - {"type": "error", "id", "detail"} for a request that couldn't be run
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    outbox: asyncio.Queue = asyncio.Queue()
+    running: Dict[Any, asyncio.Task] = {}
+
+    async def send_frames():
+        # Only this task writes to the socket, so frames never interleave
+        while True:
+            frame = await outbox.get()
+            await websocket.send_text(orjson.dumps(frame).decode())
+
+    async def handle(request_id, message: str, compact: bool):
+        actions = []
+
+        def progress(index: int, done: int, total, items: list):
+            # Called from the action's worker thread
+            frame = {
+                "type": "progress",
+                "id": request_id,
+                "index": index,
+                "action": actions[index] if index < len(actions) else None,
+                "done": done,
+                "total": total,
+                "items": items
+            }
+            try:
+                loop.call_soon_threadsafe(outbox.put_nowait, frame)
+            except RuntimeError:
+                # The connection (and its loop) went away while the action ran
+                pass
+
+        try:
+            intents, outcomes, content = await _run_message(message, compact, progress, actions)
+            outbox.put_nowait({"type": "result", "id": request_id, **content})
+            await asyncio.to_thread(_log_outcomes, intents, outcomes)
+        except Exception as e:
+            outbox.put_nowait({"type": "error", "id": request_id, "detail": str(e)})
+        finally:
+            running.pop(request_id, None)
+
+    sender = asyncio.create_task(send_frames())
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                frame = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                outbox.put_nowait({"type": "error", "id": None, "detail": "Invalid JSON"})
+                continue
+
+            request_id = frame.get("id") if isinstance(frame, dict) else None
+            message = frame.get("message") if isinstance(frame, dict) else None
+            if request_id is None or not isinstance(message, str):
+                outbox.put_nowait({"type": "error", "id": request_id, "detail": "Expected {\"id\", \"message\"}"})
+            elif isinstance(request_id, bool) or not isinstance(request_id, (str, int)):
+                # Ids key the running requests, so they must be hashable (and true isn't 1)
+                outbox.put_nowait({"type": "error", "id": request_id, "detail": "id must be a string or an integer"})
+            elif request_id in running:
+                outbox.put_nowait({"type": "error", "id": request_id, "detail": "Request id already in use"})
+            elif len(running) >= MAX_OUTSTANDING_REQUESTS:
+                outbox.put_nowait({"type": "error", "id": request_id, "detail": "Too many outstanding requests"})
+            else:
+                running[request_id] = asyncio.create_task(
+                    handle(request_id, message, bool(frame.get("compact", False)))
+                )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        for task in list(running.values()):
+            task.cancel()
+
+
+async def _run_message(message: str, compact: bool, progress=None, actions=None):
+    """
+    Parse a message, run its actions and build the response body.
+    actions, if given, is filled with the intent actions before they start
+    (progress events use it to name the action).
+    Returns (intents, outcomes, response body).
+    """
+    # Networking code is loaded on first use to keep startup fast
+    from netbot.core.dispatcher import execute_intents, merge_results
     
-    elif intent.action == "unknown":
-        result = {"status": "unknown"}
-        response_message = chatbot.format_response(intent.action, result)
-        status = "unknown"
+    # Parse user message to extract intents
+    intents = chatbot.parse_intents(message)
+    if actions is not None:
+        actions.extend(intent.action for intent in intents)
     
+    # Execute the actions; independent actions run side by side
+    outcomes = await execute_intents(chatbot, intents, format=not compact, progress=progress)
+    if len(intents) == 1:
+        outcome = outcomes[0]
+        action = intents[0].action
     else:
-        result = {"status": "error", "error": "Unsupported action"}
-        response_message = "Sorry, I don't know how to do that yet."
-        status = "error"
+        outcome = merge_results(intents, outcomes)
+        action = "multi"
+    
+    content = {
+        "message": outcome.message,
+        "action": action,
+        "status": outcome.status,
+        "data": outcome.result if outcome.status != "unknown" else None
+    }
+    if compact:
+        del content["message"]
+    return intents, outcomes, content
+
+
+def _log_outcomes(intents, outcomes):
+    """Log each action to the action log"""
+    from netbot.core.action_log import write_action_logs
     
-    # Log the action to database
     try:
-        db = get_session()
-        create_action_log(
-            db=db,
-            action=intent.action,
-            parameters=intent.parameters,
-            result_summary=response_message[:200],  # Store first 200 chars
-            status=status
-        )
-        db.close()
+        write_action_logs([
+            {
+                "action": intent.action,
+                "parameters": intent.parameters,
+                "result_summary": _summary(intent, intent_outcome),
+                "status": intent_outcome.status,
+                "duration_ms": intent_outcome.duration_ms
+            }
+            for intent, intent_outcome in zip(intents, outcomes)
+        ])
     except Exception as e:
         # Don't fail the request if logging fails
         print(f"Failed to log action: {e}")
-    
-    return ChatResponse(
-        message=response_message,
-        action=intent.action,
-        status=status,
-        data=result if status != "unknown" else None
-    )
+
+
+def _summary(intent, outcome) -> str:
+    """First 200 chars of the message for the action log"""
+    if outcome.message is not None:
+        return outcome.message[:200]
+    # Compact mode skipped the message; log a short plain summary instead
+    host = intent.parameters.get("host")
+    return f"{intent.action} {host} {outcome.status}" if host else f"{intent.action} {outcome.status}"
 
 
 @router.get("/chat/help")
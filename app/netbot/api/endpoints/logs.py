@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/logs/search", response_class=ORJSONResponse)
+def search(
+    q: str = Query(..., min_length=1, description="Words to search for, e.g. an IP or hostname"),
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    status: Optional[str] = Query(None, description="Only logs with this status, e.g. error"),
+    order: str = Query("rank", description="rank (best match first) or recent (newest first)")
+):
+    """
+    Full-text search over action logs, ranked and paginated.
+    """
+    from netbot.core.log_search import search_action_logs
+
+    if order not in ("rank", "recent"):
+        raise HTTPException(status_code=400, detail="order must be 'rank' or 'recent'")
+
+    result = search_action_logs(q, limit=limit, offset=offset, status=status, order=order)
+    if result.status == "error":
+        raise HTTPException(status_code=400, detail=result.error)
+    return ORJSONResponse(result)
+
+
+@router.get("/logs/recent", response_class=ORJSONResponse)
+def recent(limit: int = Query(50, ge=1, le=500)):
+    """
+    The newest action log entries, read back from the configured log sink.
+    """
+    from netbot.core.action_log import recent_action_logs
+
+    result = recent_action_logs(limit=limit)
+    if result.status == "error":
+        raise HTTPException(status_code=500, detail=result.error)
+    return ORJSONResponse(result)
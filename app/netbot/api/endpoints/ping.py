@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Query
-from netbot.core.networking import ping_host
+from fastapi.responses import ORJSONResponse
 
 router = APIRouter()
 
-@router.get("/ping")
+@router.get("/ping", response_class=ORJSONResponse)
 def ping_device(host: str = Query(..., description="IP or hostname to ping")):
     """
     Ping a host and return online status and average latency.
     """
+    # Networking code is loaded on first use to keep startup fast
+    from netbot.core.networking import ping_host
+
     result = ping_host(host)
-    return result
+    return ORJSONResponse(result)
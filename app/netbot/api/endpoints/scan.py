@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/scan/{scan_id}", response_class=ORJSONResponse)
+def scan_page(
+    scan_id: int,
+    cursor: int = Query(0, ge=0, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    change: Optional[str] = Query(None, description="Only devices that joined, left or changed")
+):
+    """
+    Page through the devices found by a network scan.
+    """
+    from netbot.core.inventory import get_scan_page
+
+    if change not in (None, "joined", "left", "changed"):
+        raise HTTPException(status_code=400, detail="change must be 'joined', 'left' or 'changed'")
+
+    page = get_scan_page(scan_id, cursor=cursor, limit=limit, change=change)
+    if page.status == "not_found":
+        raise HTTPException(status_code=404, detail=f"Scan {scan_id} not found")
+    if page.status == "error":
+        raise HTTPException(status_code=500, detail=page.error)
+    return ORJSONResponse(page)
@@ -0,0 +1,321 @@
+"""
+Action log sinks.
+
+Every action run through chat or bulk is written to the configured sink
+(NETBOT_LOG_SINK):
+- sqlite (default): the action_logs table, with analytics rollups and search
+- jsonl: append-only JSON lines files, for a cheap audit trail
+- null: no logging at all
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import glob
+import gzip
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+
+import orjson
+
+from .multiworker import get_log_spool, multi_worker_enabled
+from .results import LogEntry, RecentLogsResult
+
+
+SINK_ENV = "NETBOT_LOG_SINK"
+LOG_DIR_ENV = "NETBOT_LOG_DIR"
+SEGMENT_BYTES_ENV = "NETBOT_LOG_SEGMENT_BYTES"
+COMPRESS_ENV = "NETBOT_LOG_COMPRESS"
+
+# JSONL segments are closed and a new one started once they reach this size
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+
+# Next to netbot.db in the project root
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "action_logs")
+
+
+class ActionLogSink(ABC):
+    """Where action log entries go; subclasses implement all three methods"""
+
+    name = ""
+
+    @abstractmethod
+    def write(self, entries: List[dict]):
+        """
+        Record entries with the keys of create_action_logs' entries
+        (action, parameters, result_summary, status, duration_ms).
+        """
+
+    @abstractmethod
+    def recent(self, limit: int) -> List[LogEntry]:
+        """The newest limit entries, newest first"""
+
+    @abstractmethod
+    def delete_old(self, days: int) -> int:
+        """Delete entries older than days; returns how many (segments for JSONL)"""
+
+
+class NullSink(ActionLogSink):
+    """Drops every entry"""
+
+    name = "null"
+
+    def write(self, entries: List[dict]):
+        pass
+
+    def recent(self, limit: int) -> List[LogEntry]:
+        return []
+
+    def delete_old(self, days: int) -> int:
+        return 0
+
+
+class SQLiteSink(ActionLogSink):
+    """
+    The action_logs table. With several workers the entries go through the
+    log spool and the leader writes them, see multiworker.py.
+    """
+
+    name = "sqlite"
+
+    def write(self, entries: List[dict]):
+        if multi_worker_enabled():
+            now = datetime.utcnow()
+            get_log_spool().append([{"timestamp": now, **entry} for entry in entries])
+            return
+
+        from netbot.db import get_session, create_action_logs
+
+        db = get_session()
+        try:
+            create_action_logs(db, entries)
+        finally:
+            db.close()
+
+    def recent(self, limit: int) -> List[LogEntry]:
+        from netbot.db import get_session, get_recent_logs
+
+        db = get_session()
+        try:
+            logs = get_recent_logs(db, limit=limit)
+        finally:
+            db.close()
+        return [
+            LogEntry(
+                action=log.action,
+                status=log.status,
+                timestamp=log.timestamp.isoformat(),
+                parameters=json.loads(log.parameters) if log.parameters else {},
+                result_summary=log.result_summary,
+                duration_ms=log.duration_ms
+            )
+            for log in logs
+        ]
+
+    def delete_old(self, days: int) -> int:
+        from netbot.db import get_session, delete_old_logs
+
+        db = get_session()
+        try:
+            return delete_old_logs(db, days=days)
+        finally:
+            db.close()
+
+
+class JsonlSink(ActionLogSink):
+    """
+    Append-only JSON lines files in a directory.
+
+    Each process writes its own segment, "actions-<start ns>-<pid>.jsonl", so
+    workers never share a file. A segment is closed once it reaches
+    segment_bytes; with compress, closed segments are gzipped in the
+    background. Reading back memory-maps the segments and walks them from the
+    end, so the newest entries are found without reading whole files.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES, compress: bool = False):
+        self.directory = os.path.abspath(directory)
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def write(self, entries: List[dict]):
+        now = datetime.utcnow()
+        data = b"".join(orjson.dumps({"timestamp": now, **entry}, default=str) + b"\n" for entry in entries)
+        with self._lock:
+            if self._file is None:
+                path = os.path.join(self.directory, f"actions-{time.time_ns()}-{os.getpid()}.jsonl")
+                self._file = open(path, "ab")
+                self._size = 0
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            if self._size >= self.segment_bytes:
+                self._close_segment()
+
+    def close(self):
+        """Close the current segment (the next write starts a new one)"""
+        with self._lock:
+            if self._file is not None:
+                self._close_segment()
+
+    def _close_segment(self):
+        path = self._file.name
+        self._file.close()
+        self._file = None
+        if self.compress:
+            threading.Thread(target=_compress_segment, args=(path,), daemon=True).start()
+
+    def _segments(self) -> List[str]:
+        """All segments, newest write first; a segment being compressed is listed once"""
+        paths = glob.glob(os.path.join(self.directory, "actions-*.jsonl"))
+        compressed = glob.glob(os.path.join(self.directory, "actions-*.jsonl.gz"))
+        done = {path[:-len(".gz")] for path in compressed}
+        segments = []
+        for path in [p for p in paths if p not in done] + compressed:
+            try:
+                segments.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        return [path for _, path in sorted(segments, reverse=True)]
+
+    def recent(self, limit: int) -> List[LogEntry]:
+        # A segment's last write is after all of its entries, so once `limit`
+        # entries newer than the next segment's last write are found, no older
+        # segment can have anything newer
+        found = []
+        for path in self._segments():
+            if len(found) >= limit:
+                found.sort(key=lambda entry: entry["timestamp"], reverse=True)
+                del found[limit:]
+                oldest = datetime.fromisoformat(found[-1]["timestamp"]).replace(tzinfo=timezone.utc)
+                try:
+                    if os.path.getmtime(path) < oldest.timestamp():
+                        break
+                except OSError:
+                    continue
+            try:
+                lines = _tail_gzip(path, limit) if path.endswith(".gz") else _tail_mmap(path, limit)
+            except (OSError, EOFError):
+                # Compressed or deleted while we were looking
+                continue
+            found.extend(orjson.loads(line) for line in lines)
+
+        found.sort(key=lambda entry: entry["timestamp"], reverse=True)
+        return [
+            LogEntry(
+                action=entry["action"],
+                status=entry["status"],
+                timestamp=entry["timestamp"],
+                parameters=entry.get("parameters") or {},
+                result_summary=entry.get("result_summary"),
+                duration_ms=entry.get("duration_ms")
+            )
+            for entry in found[:limit]
+        ]
+
+    def delete_old(self, days: int) -> int:
+        cutoff = time.time() - timedelta(days=days).total_seconds()
+        current = self._file.name if self._file is not None else None
+        deleted = 0
+        for path in self._segments():
+            try:
+                if path != current and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    deleted += 1
+            except OSError:
+                pass
+        return deleted
+
+
+def _tail_mmap(path: str, limit: int) -> List[bytes]:
+    """The last limit complete lines of a file, newest first"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Ignore a line another process is still writing
+            end = mm.rfind(b"\n") + 1
+            lines = []
+            while end > 0 and len(lines) < limit:
+                start = mm.rfind(b"\n", 0, end - 1) + 1
+                if end - 1 > start:
+                    lines.append(mm[start:end - 1])
+                end = start
+            return lines
+
+
+def _tail_gzip(path: str, limit: int) -> List[bytes]:
+    """The last limit lines of a compressed segment, newest first"""
+    with gzip.open(path, "rb") as f:
+        lines = f.read().splitlines()
+    return [line for line in reversed(lines) if line][:limit]
+
+
+def _compress_segment(path: str):
+    """Gzip a closed segment, then remove the original"""
+    try:
+        with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(path + ".gz.tmp", path + ".gz")
+        os.remove(path)
+    except OSError as e:
+        print(f"Failed to compress log segment {path}: {e}")
+
+
+def create_sink(name: Optional[str] = None) -> ActionLogSink:
+    """
+    Build the sink called name, or the one configured by NETBOT_LOG_SINK.
+    The JSONL sink reads NETBOT_LOG_DIR, NETBOT_LOG_SEGMENT_BYTES and
+    NETBOT_LOG_COMPRESS.
+    """
+    name = (name or os.environ.get(SINK_ENV) or "sqlite").lower()
+    if name == "null":
+        return NullSink()
+    if name == "jsonl":
+        segment_bytes = os.environ.get(SEGMENT_BYTES_ENV)
+        return JsonlSink(
+            os.environ.get(LOG_DIR_ENV) or DEFAULT_LOG_DIR,
+            segment_bytes=int(segment_bytes) if segment_bytes else DEFAULT_SEGMENT_BYTES,
+            compress=os.environ.get(COMPRESS_ENV, "").lower() in ("1", "true", "yes", "on")
+        )
+    if name != "sqlite":
+        print(f"Unknown {SINK_ENV} {name!r}, logging to SQLite")
+    return SQLiteSink()
+
+
+_sink: Optional[ActionLogSink] = None
+_sink_lock = threading.Lock()
+
+
+def get_sink() -> ActionLogSink:
+    """The configured sink, created on first use"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = create_sink()
+    return _sink
+
+
+def write_action_logs(entries: List[dict]):
+    """Record actions with the configured sink"""
+    if entries:
+        get_sink().write(entries)
+
+
+def recent_action_logs(limit: int = 50) -> RecentLogsResult:
+    """The newest action log entries from the configured sink"""
+    sink = get_sink()
+    try:
+        return RecentLogsResult(status="success", sink=sink.name, entries=sink.recent(limit))
+    except Exception as e:
+        return RecentLogsResult(status="error", sink=sink.name, error=str(e))
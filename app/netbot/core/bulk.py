@@ -0,0 +1,135 @@
+import asyncio
+import csv
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+from .networking import ping_host, check_ports, dns_lookup_async
+from .results import StatusResult, shallow_dict
+
+
+# Actions that can be run against a list of targets
+BULK_ACTIONS = ("ping", "check_ports", "dns_lookup")
+
+# Upper bound on probes in flight across all bulk requests
+MAX_CONCURRENCY = 64
+
+# Created lazily so it binds to the running event loop
+_global_limit: Optional[asyncio.Semaphore] = None
+
+# The probes are blocking, so they need their own pool sized to the limit
+# (the default executor only has a handful of threads)
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="netbot-bulk")
+
+
+def _get_global_limit() -> asyncio.Semaphore:
+    """Get the process-wide semaphore shared by all bulk requests"""
+    global _global_limit
+    if _global_limit is None:
+        _global_limit = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _global_limit
+
+
+def parse_targets(body: bytes, content_type: str) -> List[str]:
+    """
+    Parse a list of targets from a JSON, NDJSON or CSV request body.
+    Duplicates are dropped, keeping the first occurrence.
+    Raises ValueError for a body that isn't a list of strings or objects.
+
+    Accepted formats:
+    - JSON: ["host1", "host2"] or {"targets": ["host1", "host2"]}
+    - NDJSON: one "host" or {"target": "host"} per line
+    - CSV: first column of every row, an optional "target" header is skipped
+    """
+    text = body.decode("utf-8", errors="ignore")
+    content_type = (content_type or "").split(";")[0].strip().lower()
+
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        raw = [_target_from_item(json.loads(line)) for line in text.splitlines() if line.strip()]
+    elif content_type in ("text/csv", "application/csv"):
+        raw = [row[0] for row in csv.reader(io.StringIO(text)) if row]
+        if raw and raw[0].strip().lower() in ("target", "host"):
+            raw = raw[1:]
+    else:
+        data = json.loads(text) if text.strip() else []
+        if isinstance(data, dict):
+            data = data.get("targets", [])
+        if not isinstance(data, list):
+            raise ValueError(f'expected a list of targets or {{"targets": [...]}}, got {_json_type(data)}')
+        raw = [_target_from_item(item) for item in data]
+
+    # dict preserves insertion order, so this dedupes without reordering
+    return list(dict.fromkeys(t.strip() for t in raw if t and t.strip()))
+
+
+def _target_from_item(item) -> str:
+    """Extract a target string from a JSON list item or NDJSON line"""
+    if isinstance(item, dict):
+        item = item.get("target") or item.get("host") or ""
+    if not isinstance(item, str):
+        raise ValueError(f'targets must be strings or {{"target": "..."}} objects, got {_json_type(item)}')
+    return item
+
+
+def _json_type(value) -> str:
+    """Name of a decoded JSON value's type, for error messages"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return "object" if isinstance(value, dict) else "array"
+
+
+def _run_action(action: str, target: str, ports: List[int], detect: bool = False):
+    """Run a single blocking diagnostic action"""
+    if action == "ping":
+        return ping_host(target)
+    elif action == "check_ports":
+        return check_ports(target, ports, detect=detect)
+    return StatusResult(status="error", error=f"Unsupported bulk action: {action}")
+
+
+async def run_bulk(
+    action: str,
+    targets: List[str],
+    ports: Optional[List[int]] = None,
+    record_types: Optional[List[str]] = None,
+    detect: bool = False
+) -> AsyncIterator[Dict[str, any]]:
+    """
+    Run an action against many targets concurrently.
+    Results are yielded as soon as each probe completes, not in input order.
+    DNS lookups run natively on the event loop; the other probes use worker threads.
+    detect turns on service detection for check_ports.
+    """
+    ports = ports or [22, 80, 443]
+    limit = _get_global_limit()
+    loop = asyncio.get_running_loop()
+
+    async def probe(target: str) -> Dict[str, any]:
+        async with limit:
+            started = time.perf_counter()
+            try:
+                if action == "dns_lookup":
+                    result = await dns_lookup_async(target, record_types)
+                else:
+                    result = await loop.run_in_executor(_executor, _run_action, action, target, ports, detect)
+            except Exception as e:
+                result = StatusResult(status="error", error=str(e))
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        return {"target": target, "action": action, "duration_ms": duration_ms, **shallow_dict(result)}
+
+    tasks = [asyncio.create_task(probe(t)) for t in targets]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away before we finished - stop queued probes
+        for task in tasks:
+            task.cancel()
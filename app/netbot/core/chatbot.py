@@ -1,6 +1,28 @@
 import re
 from typing import Dict, List, Optional
 from dataclasses import dataclass
+from .results import (
+    PingResult,
+    LocalIpResult,
+    GatewayResult,
+    ScanResult,
+    PortScanResult,
+    DnsResult,
+    TracerouteResult,
+    DeviceInfoResult,
+    LogSearchResult
+)
+
+
+# Splits a message into clauses on ";", "and", "then" and commas.
+# Port lists and search text are put back together by parse_intents.
+CLAUSE_SEPARATOR = re.compile(r"(\s*;\s*|\s+(?:and|then)\s+|\s*,\s*)")
+
+# A clause that is just a port, e.g. the "80" in "check ports on 10.0.0.1 22, 80"
+PORT_ONLY = re.compile(r"^\d+$")
+
+# A clause that is just a host, e.g. the "10.0.0.2" in "ping 10.0.0.1, 10.0.0.2"
+HOST_ONLY = re.compile(r"^[\w\.-]+$")
 
 
 @dataclass
@@ -20,6 +42,24 @@ class ChatBot:
     def __init__(self):
         # Define intent patterns (order matters - more specific first)
         self.patterns = [
+            # Search the action logs
+            {
+                "regex": r"search\s+(?:the\s+)?(errors?\s+)?logs?\s+(?:for\s+)?(.+)",
+                "action": "search_logs",
+                "extractor": self._extract_log_search
+            },
+            # Check ports and identify the services behind them
+            {
+                "regex": r"(?:detect|identify|fingerprint)\s+services?\s+(?:on\s+)?(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|[\w\.-]+)(?:\s+(\d+(?:,\d+)*))?",
+                "action": "check_ports",
+                "extractor": self._extract_service_detection
+            },
+            # Check ports on a host
+            {
+                "regex": r"(?:check|test|scan)\s+ports?\s+(?:on\s+)?(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|[\w\.-]+)(?:\s+(\d+(?:,\d+)*))?",
+                "action": "check_ports",
+                "extractor": self._extract_host_and_ports
+            },
             # Ping specific host
             {
                 "regex": r"(?:ping|check|test)\s+(?:connection\s+to\s+)?(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|[\w\.-]+)",
@@ -30,13 +70,7 @@ class ChatBot:
             {
                 "regex": r"(?:scan|find|list|show|discover)\s+(?:all\s+)?(?:devices?|hosts?|computers?|network|lan)",
                 "action": "scan_network",
-                "extractor": lambda m: {}
-            },
-            # Check ports on a host
-            {
-                "regex": r"(?:check|test|scan)\s+ports?\s+(?:on\s+)?(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|[\w\.-]+)(?:\s+(\d+(?:,\d+)*))?",
-                "action": "check_ports",
-                "extractor": self._extract_host_and_ports
+                "extractor": self._extract_scan_options
             },
             # Get local IP
             {
@@ -50,6 +84,12 @@ class ChatBot:
                 "action": "get_gateway",
                 "extractor": lambda m: {}
             },
+            # Look up a device in the inventory
+            {
+                "regex": r"(?:what|who)(?:'s|\s+is)\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})",
+                "action": "device_info",
+                "extractor": self._extract_host
+            },
             # Trace route
             {
                 "regex": r"(?:trace|traceroute|tracert)\s+(?:to\s+)?(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|[\w\.-]+)",
@@ -58,9 +98,9 @@ class ChatBot:
             },
             # DNS lookup
             {
-                "regex": r"(?:lookup|resolve|dns|nslookup)\s+(\S+)",
+                "regex": r"(?:lookup|resolve|dns|nslookup)\s+(?:(a|aaaa|cname|mx|txt|ptr)\s+(?:records?\s+)?(?:for\s+)?)?(\S+)",
                 "action": "dns_lookup",
-                "extractor": self._extract_host
+                "extractor": self._extract_dns_query
             },
             # Help
             {
@@ -77,9 +117,77 @@ class ChatBot:
         """
         message = message.lower().strip()
         
-        # Try to match each pattern
+        intent = self._match_intent(message)
+        if intent:
+            return intent
+        
+        # No match found
+        return Intent(
+            action="unknown",
+            parameters={"original_message": message},
+            confidence=0.0
+        )
+    
+    def parse_intents(self, message: str) -> List[Intent]:
+        """
+        Parse a message that may contain several requests.
+        "ping 10.0.0.1, 10.0.0.2 and lookup example.com" gives three intents.
+        Returns a single "unknown" intent if nothing matches.
+        """
+        message = message.lower().strip()
+        intents = []
+        last = None
+        
+        for clause in self._split_clauses(message):
+            if not clause:
+                continue
+            
+            intent = self._match_intent(clause)
+            if intent:
+                last = intent
+            elif last and "host" in last.parameters and HOST_ONLY.match(clause):
+                # A bare host continues the host list of the previous intent
+                intent = Intent(
+                    action=last.action,
+                    parameters={**last.parameters, "host": clause},
+                    confidence=last.confidence
+                )
+            else:
+                continue
+            
+            if intent not in intents:
+                intents.append(intent)
+        
+        return intents or [self.parse_message(message)]
+    
+    def _split_clauses(self, message: str) -> List[str]:
+        """
+        Split a message into clauses. A port list goes on across commas
+        ("check ports on 10.0.0.1 22, 80"), and a log search takes the rest of
+        the message as its text ("search logs for errors and timeouts").
+        """
+        pieces = CLAUSE_SEPARATOR.split(message)
+        clauses = []
+        action = None
+        # Even pieces are clauses, odd ones the separators between them
+        for i in range(0, len(pieces), 2):
+            clause = pieces[i].strip()
+            if action == "check_ports" and "," in pieces[i - 1] and PORT_ONLY.match(clause):
+                clauses[-1] += "," + clause
+                continue
+            
+            intent = self._match_intent(clause)
+            if intent and intent.action == "search_logs":
+                clauses.append("".join(pieces[i:]).strip())
+                break
+            action = intent.action if intent else None
+            clauses.append(clause)
+        return clauses
+    
+    def _match_intent(self, text: str) -> Optional[Intent]:
+        """Return the first intent whose pattern matches the text"""
         for pattern in self.patterns:
-            match = re.search(pattern["regex"], message, re.IGNORECASE)
+            match = re.search(pattern["regex"], text, re.IGNORECASE)
             if match:
                 params = pattern["extractor"](match)
                 return Intent(
@@ -87,18 +195,32 @@ class ChatBot:
                     parameters=params,
                     confidence=1.0
                 )
-        
-        # No match found
-        return Intent(
-            action="unknown",
-            parameters={"original_message": message},
-            confidence=0.0
-        )
+        return None
     
     def _extract_host(self, match: re.Match) -> Dict[str, str]:
         """Extract host from regex match"""
         return {"host": match.group(1)}
     
+    def _extract_dns_query(self, match: re.Match) -> Dict[str, any]:
+        """Extract the name and optional record type ("lookup mx example.com")"""
+        params = {"host": match.group(2)}
+        if match.group(1):
+            params["record_type"] = match.group(1).upper()
+        return params
+    
+    def _extract_log_search(self, match: re.Match) -> Dict[str, any]:
+        """Extract the search text ("search error logs for 10.0.0.12")"""
+        params = {"query": match.group(2).strip()}
+        if match.group(1):
+            params["status"] = "error"
+        return params
+    
+    def _extract_scan_options(self, match: re.Match) -> Dict[str, any]:
+        """A "full" or "fresh" scan re-probes every device instead of only stale ones"""
+        if re.search(r"\b(?:full|fresh)\b", match.string):
+            return {"incremental": False}
+        return {}
+    
     def _extract_host_and_ports(self, match: re.Match) -> Dict[str, any]:
         """Extract host and optional ports from regex match"""
         host = match.group(1)
@@ -106,21 +228,30 @@ class ChatBot:
         ports = [int(p.strip()) for p in ports_str.split(",")]
         return {"host": host, "ports": ports}
     
+    def _extract_service_detection(self, match: re.Match) -> Dict[str, any]:
+        """Extract host and ports, with service detection turned on"""
+        params = self._extract_host_and_ports(match)
+        params["detect"] = True
+        return params
+    
     def get_help_text(self) -> str:
         """Return help text with available commands"""
         return """I can help you with network diagnostics! Here's what I can do:
 
 🔹 **Ping a device**: "ping 192.168.1.1" or "check connection to google.com"
-🔹 **Scan network**: "scan network" or "list all devices"
+🔹 **Scan network**: "scan network" or "list all devices" ("full scan network" re-probes everything)
+🔹 **Device info**: "what is 192.168.1.57" (answered from the device inventory)
 🔹 **Check ports**: "check ports on 192.168.1.1" or "scan ports 192.168.1.10 22,80,443"
+🔹 **Detect services**: "detect services on 192.168.1.10 22,2222,8080" (reads banners of open ports)
 🔹 **Get local IP**: "what's my IP address?"
 🔹 **Get gateway**: "what's my default gateway?"
 🔹 **Trace route**: "traceroute to google.com"
-🔹 **DNS lookup**: "lookup google.com"
+🔹 **Search logs**: "search logs for 10.0.0.12" or "search error logs for google.com"
+🔹 **DNS lookup**: "lookup google.com" or "lookup mx google.com" (A, AAAA, CNAME, MX, TXT, PTR)
 
 Just type your question naturally, and I'll help you diagnose your network!"""
     
-    def format_response(self, action: str, result: Dict) -> str:
+    def format_response(self, action: str, result) -> str:
         """
         Format technical results into friendly, human-readable responses.
         """
@@ -152,104 +283,145 @@ Just type your question naturally, and I'll help you diagnose your network!"""
         elif action == "dns_lookup":
             return self._format_dns_response(result)
         
+        elif action == "device_info":
+            return self._format_device_response(result)
+        
+        elif action == "search_logs":
+            return self._format_search_response(result)
+        
         else:
             return f"Action completed: {action}"
     
-    def _format_ping_response(self, result: Dict) -> str:
+    def _format_ping_response(self, result: PingResult) -> str:
         """Format ping results"""
-        if result.get("status") == "online":
-            latency = result.get("avg_latency_ms", "N/A")
-            return f"✅ **{result['host']}** is online! Average response time: {latency}ms"
-        elif result.get("status") == "offline":
-            return f"❌ **{result['host']}** is not responding. The device might be offline or blocking pings."
+        if result.status == "online":
+            latency = result.avg_latency_ms or "N/A"
+            return f"✅ **{result.host}** is online! Average response time: {latency}ms"
+        elif result.status == "offline":
+            return f"❌ **{result.host}** is not responding. The device might be offline or blocking pings."
         else:
-            error = result.get("error", "Unknown error")
-            return f"⚠️ Error pinging **{result.get('host', 'host')}**: {error}"
+            error = result.error or "Unknown error"
+            return f"⚠️ Error pinging **{result.host}**: {error}"
     
-    def _format_scan_response(self, result: Dict) -> str:
-        """Format network scan results"""
-        if result.get("status") == "error":
-            return f"⚠️ Scan error: {result.get('error', 'Unknown error')}"
+    def _format_scan_response(self, result: ScanResult) -> str:
+        """Format network scan results: a summary and the first page of devices"""
+        if result.status == "error":
+            return f"⚠️ Scan error: {result.error or 'Unknown error'}"
         
-        devices = result.get("devices", [])
-        if not devices:
+        devices = result.devices
+        total = result.total if result.total is not None else len(devices)
+        if not total:
             return "🔍 No devices found on the network."
         
-        response = f"🔍 Found **{len(devices)}** device(s) on the network:\n\n"
+        lines = [f"🔍 Found **{total}** device(s) on the network:\n"]
         for device in devices:
-            ip = device.get("ip", "unknown")
-            hostname = device.get("hostname", "N/A")
-            mac = device.get("mac", "N/A")
-            status = "✅" if device.get("status") == "online" else "❌"
-            response += f"{status} **{ip}** - {hostname} (MAC: {mac})\n"
+            status = "✅" if device.status == "online" else "❌"
+            lines.append(f"{status} **{device.ip}** - {device.hostname or 'N/A'} (MAC: {device.mac or 'N/A'})")
+        if total > len(devices):
+            lines.append(f"...and {total - len(devices)} more, see /v1/scan/{result.scan_id}?cursor={result.next_cursor}")
         
-        return response
+        if result.joined or result.left or result.changed:
+            lines.append("\n📋 Changes since the last scan:")
+            for device in result.joined:
+                lines.append(f"➕ **{device.ip}** joined ({device.hostname or 'N/A'})")
+            for device in result.left:
+                lines.append(f"➖ **{device.ip}** left ({device.hostname or 'N/A'})")
+            for device in result.changed:
+                lines.append(f"🔄 **{device.ip}** changed (was {device.previous_ip}, {device.previous_hostname})")
+            shown = len(result.joined) + len(result.left) + len(result.changed)
+            counted = (result.joined_count or 0) + (result.left_count or 0) + (result.changed_count or 0)
+            if counted > shown:
+                lines.append(f"...and {counted - shown} more changes, see /v1/scan/{result.scan_id}?change=joined|left|changed")
+        
+        return "\n".join(lines) + "\n"
     
-    def _format_ports_response(self, result: Dict) -> str:
+    def _format_ports_response(self, result: PortScanResult) -> str:
         """Format port scan results"""
-        if result.get("status") == "error":
-            return f"⚠️ Port scan error: {result.get('error', 'Unknown error')}"
+        if result.status == "error":
+            return f"⚠️ Port scan error: {result.error or 'Unknown error'}"
         
-        host = result.get("host", "unknown")
-        ports = result.get("ports", [])
-        
-        response = f"🔍 Port scan results for **{host}**:\n\n"
-        for port_info in ports:
-            port = port_info.get("port")
-            is_open = port_info.get("open", False)
-            service = port_info.get("service", "unknown")
-            status = "✅ OPEN" if is_open else "❌ CLOSED"
-            response += f"{status} - Port **{port}** ({service})\n"
+        response = f"🔍 Port scan results for **{result.host}**:\n\n"
+        for port_info in result.ports:
+            status = "✅ OPEN" if port_info.open else "❌ CLOSED"
+            banner = f": {port_info.banner}" if port_info.banner else ""
+            if port_info.detection_skipped:
+                banner = ", detection skipped"
+            response += f"{status} - Port **{port_info.port}** ({port_info.service}{banner})\n"
         
         return response
     
-    def _format_local_ip_response(self, result: Dict) -> str:
+    def _format_local_ip_response(self, result: LocalIpResult) -> str:
         """Format local IP response"""
-        if result.get("status") == "error":
-            return f"⚠️ Error: {result.get('error', 'Could not determine local IP')}"
+        if result.status == "error":
+            return f"⚠️ Error: {result.error or 'Could not determine local IP'}"
         
-        ip = result.get("ip", "unknown")
-        interface = result.get("interface", "N/A")
-        return f"🌐 Your local IP address is **{ip}** (Interface: {interface})"
+        return f"🌐 Your local IP address is **{result.ip}** (Interface: {result.interface or 'N/A'})"
     
-    def _format_gateway_response(self, result: Dict) -> str:
+    def _format_gateway_response(self, result: GatewayResult) -> str:
         """Format gateway response"""
-        if result.get("status") == "error":
-            return f"⚠️ Error: {result.get('error', 'Could not determine gateway')}"
+        if result.status == "error":
+            return f"⚠️ Error: {result.error or 'Could not determine gateway'}"
         
-        gateway = result.get("gateway", "unknown")
-        return f"🌐 Your default gateway is **{gateway}**"
+        return f"🌐 Your default gateway is **{result.gateway}**"
     
-    def _format_traceroute_response(self, result: Dict) -> str:
+    def _format_traceroute_response(self, result: TracerouteResult) -> str:
         """Format traceroute response"""
-        if result.get("status") == "error":
-            return f"⚠️ Traceroute error: {result.get('error', 'Unknown error')}"
-        
-        host = result.get("host", "unknown")
-        hops = result.get("hops", [])
+        if result.status == "error":
+            return f"⚠️ Traceroute error: {result.error or 'Unknown error'}"
         
-        response = f"🛤️ Route to **{host}**:\n\n"
-        for hop in hops:
-            num = hop.get("hop")
-            ip = hop.get("ip", "*")
-            rtt = hop.get("rtt", "*")
-            response += f"{num}. {ip} ({rtt})\n"
+        response = f"🛤️ Route to **{result.host}**:\n\n"
+        for hop in result.hops:
+            response += f"{hop.hop}. {hop.ip} ({hop.rtt})\n"
         
         return response
     
-    def _format_dns_response(self, result: Dict) -> str:
+    def _format_dns_response(self, result: DnsResult) -> str:
         """Format DNS lookup response"""
-        if result.get("status") == "error":
-            return f"⚠️ DNS lookup error: {result.get('error', 'Unknown error')}"
+        if result.status == "error":
+            return f"⚠️ DNS lookup error: {result.error or 'Unknown error'}"
         
-        hostname = result.get("hostname", "unknown")
-        addresses = result.get("addresses", [])
-        
-        if not addresses:
+        hostname = result.hostname
+        if not result.addresses and not result.records:
             return f"⚠️ No DNS records found for **{hostname}**"
         
         response = f"🌐 DNS records for **{hostname}**:\n\n"
-        for addr in addresses:
-            response += f"• {addr}\n"
+        if not result.records:
+            for addr in result.addresses:
+                response += f"• {addr}\n"
+        for record in result.records:
+            ttl = f" (TTL {record.ttl}s)" if record.ttl is not None else ""
+            response += f"• {record.type} {record.value}{ttl}\n"
         
         return response
+    
+    def _format_device_response(self, result: DeviceInfoResult) -> str:
+        """Format an inventory device lookup"""
+        ip = result.ip
+        if result.status == "not_found":
+            return f"🔍 **{ip}** is not in the device inventory yet. Try 'scan network' first."
+        if result.status == "error":
+            return f"⚠️ Inventory error: {result.error or 'Unknown error'}"
+        
+        state = "✅ online" if result.online else "❌ offline"
+        ports = ", ".join(str(p) for p in result.open_ports) or "none recorded"
+        return (f"🖥️ **{ip}** - {result.hostname or 'N/A'} ({state})\n\n"
+                f"• MAC: {result.mac or 'N/A'}\n"
+                f"• Open ports: {ports}\n"
+                f"• First seen: {result.first_seen}\n"
+                f"• Last seen: {result.last_seen}")
+    
+    def _format_search_response(self, result: LogSearchResult) -> str:
+        """Format action log search results"""
+        if result.status == "error":
+            return f"⚠️ Log search error: {result.error or 'Unknown error'}"
+        
+        query = result.query
+        if not result.matches:
+            return f"🔍 No logs found matching **{query}**"
+        
+        lines = [f"🔍 Logs matching **{query}**:\n"]
+        for match in result.matches:
+            lines.append(f"• {match.timestamp[:19]} - {match.action} ({match.status}): {match.snippet}")
+        if result.has_more:
+            lines.append("\n...more matches available via /v1/logs/search")
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+from .chatbot import ChatBot, Intent
+from .inventory import scan_with_inventory, lookup_device, record_open_ports
+from .log_search import search_action_logs
+from .results import StatusResult, ActionEntry, MultiResult
+from .networking import (
+    ProgressCallback,
+    ping_host,
+    check_ports,
+    get_local_ip,
+    get_default_gateway,
+    traceroute,
+    dns_lookup
+)
+
+
+@dataclass
+class ActionOutcome:
+    """Result of running one intent (or several merged ones)"""
+    result: Any
+    message: Optional[str]
+    status: str
+    duration_ms: float
+
+
+def execute_intent(
+    chatbot: ChatBot,
+    intent: Intent,
+    format: bool = True,
+    progress: Optional[ProgressCallback] = None
+) -> ActionOutcome:
+    """
+    Run the networking action for an intent and time it.
+    With format=False the friendly message is skipped (compact responses).
+    progress is passed on to the actions that report it (scan, ports, traceroute).
+    """
+    started = time.perf_counter()
+    result, message, status = _run_intent(chatbot, intent, format, progress)
+    duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    return ActionOutcome(result, message, status, duration_ms)
+
+
+def _run_intent(
+    chatbot: ChatBot,
+    intent: Intent,
+    format: bool = True,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[Any, Optional[str], str]:
+    """
+    Run the networking action for an intent.
+    Returns (result record, formatted response message or None, status).
+    """
+    if intent.action == "ping":
+        result = ping_host(intent.parameters.get("host"))
+
+    elif intent.action == "scan_network":
+        result = scan_with_inventory(
+            incremental=intent.parameters.get("incremental", True),
+            progress=progress
+        )
+
+    elif intent.action == "check_ports":
+        host = intent.parameters.get("host")
+        ports = intent.parameters.get("ports", [22, 80, 443])
+        result = check_ports(host, ports, progress=progress, detect=intent.parameters.get("detect", False))
+        if result.status == "success":
+            try:
+                record_open_ports(host, result.ports)
+            except Exception as e:
+                print(f"Failed to update inventory: {e}")
+
+    elif intent.action == "get_local_ip":
+        result = get_local_ip()
+
+    elif intent.action == "get_gateway":
+        result = get_default_gateway()
+
+    elif intent.action == "traceroute":
+        result = traceroute(intent.parameters.get("host"), progress=progress)
+
+    elif intent.action == "dns_lookup":
+        record_type = intent.parameters.get("record_type")
+        result = dns_lookup(intent.parameters.get("host"), [record_type] if record_type else None)
+
+    elif intent.action == "device_info":
+        result = lookup_device(intent.parameters.get("host"))
+
+    elif intent.action == "search_logs":
+        result = search_action_logs(
+            intent.parameters.get("query", ""),
+            status=intent.parameters.get("status")
+        )
+
+    elif intent.action == "help":
+        result = StatusResult(status="success")
+        return result, chatbot.get_help_text() if format else None, "success"
+
+    elif intent.action == "unknown":
+        result = StatusResult(status="unknown")
+        return result, chatbot.format_response(intent.action, result) if format else None, "unknown"
+
+    else:
+        result = StatusResult(status="error", error="Unsupported action")
+        return result, "Sorry, I don't know how to do that yet." if format else None, "error"
+
+    response_message = chatbot.format_response(intent.action, result) if format else None
+    return result, response_message, result.status
+
+
+async def execute_intents(
+    chatbot: ChatBot,
+    intents: List[Intent],
+    format: bool = True,
+    progress: Optional[Callable[[int, int, Optional[int], list], None]] = None
+) -> List[ActionOutcome]:
+    """
+    Run several intents concurrently, one worker thread each.
+    Results are returned in the same order as the intents.
+    progress, if given, is called from the worker threads with the index of
+    the intent followed by the usual (done, total, new_items).
+    """
+    return await asyncio.gather(*(
+        asyncio.to_thread(
+            execute_intent, chatbot, intent, format,
+            functools.partial(progress, index) if progress else None
+        )
+        for index, intent in enumerate(intents)
+    ))
+
+
+def merge_results(
+    intents: List[Intent],
+    outcomes: List[ActionOutcome]
+) -> ActionOutcome:
+    """
+    Merge the outcomes of several intents into one response.
+    The status is "success" if every action succeeded, "error" if all failed
+    and "partial" otherwise. The duration is that of the slowest action.
+    """
+    failed = sum(1 for outcome in outcomes if outcome.status in ("error", "unknown"))
+    if failed == 0:
+        status = "success"
+    elif failed == len(outcomes):
+        status = "error"
+    else:
+        status = "partial"
+
+    if all(outcome.message is not None for outcome in outcomes):
+        response_message = "\n\n".join(outcome.message for outcome in outcomes)
+    else:
+        response_message = None
+    data = MultiResult(
+        status=status,
+        actions=[
+            ActionEntry(action=intent.action, parameters=intent.parameters, result=outcome.result)
+            for intent, outcome in zip(intents, outcomes)
+        ]
+    )
+    duration_ms = max(outcome.duration_ms for outcome in outcomes)
+    return ActionOutcome(data, response_message, status, duration_ms)
@@ -0,0 +1,505 @@
+import asyncio
+import ipaddress
+import os
+import random
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+
+# Record types we can query and decode
+RECORD_TYPES = {
+    "A": 1,
+    "CNAME": 5,
+    "SOA": 6,
+    "PTR": 12,
+    "MX": 15,
+    "TXT": 16,
+    "AAAA": 28,
+}
+RECORD_NAMES = {code: name for name, code in RECORD_TYPES.items()}
+
+# Response codes
+RCODE_NOERROR = 0
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+
+# Negative answers without an SOA are cached for this long (seconds)
+DEFAULT_NEGATIVE_TTL = 60
+MAX_NEGATIVE_TTL = 3600
+
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 2
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_BATCH_CONCURRENCY = 256
+
+
+class DNSError(Exception):
+    """Raised when a DNS query cannot be answered"""
+
+
+@dataclass
+class DNSRecord:
+    """A single decoded resource record"""
+    name: str
+    type: str
+    ttl: int
+    value: str
+
+
+@dataclass
+class DNSAnswer:
+    """Answer to one (name, type) question"""
+    name: str
+    type: str
+    rcode: int
+    records: List[DNSRecord] = field(default_factory=list)
+    ttl: int = 0  # How long the answer may be cached, in seconds
+    from_cache: bool = False
+
+    @property
+    def values(self) -> List[str]:
+        """Values of the records of the requested type (CNAMEs in the chain excluded)"""
+        return [r.value for r in self.records if r.type == self.type]
+
+
+def get_default_resolver() -> Optional[Tuple[str, int]]:
+    """
+    Pick the resolver to query: NETBOT_DNS_SERVER ("host" or "host:port"),
+    else the system's configured DNS server (the registry on Windows,
+    /etc/resolv.conf elsewhere). None if there is none; lookups then go
+    through the system resolver.
+    """
+    configured = os.environ.get("NETBOT_DNS_SERVER")
+    if configured:
+        # "host:port" - a bare IPv6 address has more than one colon
+        if configured.count(":") == 1:
+            host, port = configured.split(":")
+            return host, int(port)
+        return configured, 53
+
+    servers = _windows_name_servers() if sys.platform == "win32" else _resolv_conf_name_servers()
+    return (servers[0], 53) if servers else None
+
+
+def _resolv_conf_name_servers() -> List[str]:
+    """The nameserver lines of /etc/resolv.conf"""
+    servers = []
+    try:
+        with open("/etc/resolv.conf") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers
+
+
+def _windows_name_servers() -> List[str]:
+    """
+    DNS servers from the Tcpip registry keys: the global setting first, then
+    each interface's static or DHCP-assigned servers.
+    """
+    import winreg
+
+    base = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters"
+    interfaces_path = base + r"\Interfaces"
+    keys = [base]
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, interfaces_path) as interfaces:
+            for i in range(winreg.QueryInfoKey(interfaces)[0]):
+                keys.append(f"{interfaces_path}\\{winreg.EnumKey(interfaces, i)}")
+    except OSError:
+        pass
+
+    servers = []
+    for key_path in keys:
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
+                for value_name in ("NameServer", "DhcpNameServer"):
+                    try:
+                        value = winreg.QueryValueEx(key, value_name)[0]
+                    except OSError:
+                        continue
+                    # Space- or comma-separated list
+                    for server in value.replace(",", " ").split():
+                        if server not in servers:
+                            servers.append(server)
+        except OSError:
+            continue
+    return servers
+
+
+def reverse_name(ip: str) -> str:
+    """Get the PTR query name for an IP, e.g. 1.0.0.10.in-addr.arpa"""
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+def encode_name(name: str) -> bytes:
+    """Encode a domain name as DNS labels"""
+    out = bytearray()
+    for label in name.rstrip(".").split("."):
+        if not label:
+            continue
+        raw = label.encode("idna")
+        if len(raw) > 63:
+            raise DNSError(f"Label too long: {label}")
+        out.append(len(raw))
+        out += raw
+    out.append(0)
+    return bytes(out)
+
+
+def build_query(query_id: int, name: str, qtype: int) -> bytes:
+    """Build a recursive query for one question"""
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack("!HH", qtype, 1)
+
+
+def decode_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """
+    Decode a possibly compressed domain name.
+    Returns the name and the offset just after it in the original position.
+    """
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DNSError("Truncated name")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise DNSError("Truncated name pointer")
+            if end is None:
+                end = offset + 2
+            jumps += 1
+            if jumps > 64:
+                raise DNSError("Name compression loop")
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+        elif length == 0:
+            offset += 1
+            break
+        else:
+            offset += 1
+            labels.append(data[offset:offset + length].decode("ascii", errors="replace"))
+            offset += length
+    return ".".join(labels), (end if end is not None else offset)
+
+
+def _decode_rdata(data: bytes, offset: int, rtype: int, rdlength: int) -> str:
+    """Decode the RDATA of a record into a display string"""
+    rdata = data[offset:offset + rdlength]
+    if rtype == RECORD_TYPES["A"] and rdlength == 4:
+        return str(ipaddress.IPv4Address(rdata))
+    if rtype == RECORD_TYPES["AAAA"] and rdlength == 16:
+        return str(ipaddress.IPv6Address(rdata))
+    if rtype in (RECORD_TYPES["CNAME"], RECORD_TYPES["PTR"]):
+        return decode_name(data, offset)[0]
+    if rtype == RECORD_TYPES["MX"]:
+        preference = struct.unpack("!H", rdata[:2])[0]
+        return f"{preference} {decode_name(data, offset + 2)[0]}"
+    if rtype == RECORD_TYPES["TXT"]:
+        parts, i = [], 0
+        while i < len(rdata):
+            length = rdata[i]
+            parts.append(rdata[i + 1:i + 1 + length].decode("utf-8", errors="replace"))
+            i += 1 + length
+        return "".join(parts)
+    if rtype == RECORD_TYPES["SOA"]:
+        mname, pos = decode_name(data, offset)
+        rname, pos = decode_name(data, pos)
+        serial, refresh, retry, expire, minimum = struct.unpack("!IIIII", data[pos:pos + 20])
+        return f"{mname} {rname} {serial} {refresh} {retry} {expire} {minimum}"
+    return rdata.hex()
+
+
+def parse_response(data: bytes) -> Tuple[int, int, bool, List[DNSRecord], List[DNSRecord]]:
+    """
+    Parse a DNS response.
+    Returns (id, rcode, truncated, answer records, authority records).
+    """
+    if len(data) < 12:
+        raise DNSError("Response too short")
+    query_id, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", data[:12])
+    truncated = bool(flags & 0x0200)
+    rcode = flags & 0x000F
+
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = decode_name(data, offset)
+        offset += 4
+
+    sections = []
+    for count in (ancount, nscount):
+        records = []
+        for _ in range(count):
+            name, offset = decode_name(data, offset)
+            if offset + 10 > len(data):
+                raise DNSError("Truncated record")
+            rtype, _, ttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+            offset += 10
+            if offset + rdlength > len(data):
+                raise DNSError("Truncated record data")
+            records.append(DNSRecord(
+                name=name,
+                type=RECORD_NAMES.get(rtype, str(rtype)),
+                ttl=ttl,
+                value=_decode_rdata(data, offset, rtype, rdlength)
+            ))
+            offset += rdlength
+        sections.append(records)
+
+    return query_id, rcode, truncated, sections[0], sections[1]
+
+
+class _UDPQueryProtocol(asyncio.DatagramProtocol):
+    """Waits for the datagram answering one query"""
+
+    def __init__(self, query_id: int, future: asyncio.Future):
+        self.query_id = query_id
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        # Ignore anything that isn't the answer to our question (spoofing, stale replies)
+        if len(data) >= 2 and struct.unpack("!H", data[:2])[0] == self.query_id:
+            if not self.future.done():
+                self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+class DNSClient:
+    """
+    Asyncio DNS stub resolver with a TTL-aware cache.
+
+    Queries go over UDP to the configured resolver and are retried over TCP
+    when the answer is truncated. Positive answers are cached for the
+    smallest TTL in the answer, negative answers (NXDOMAIN/NODATA) for the
+    SOA minimum. Concurrent queries for the same question share one request.
+    """
+
+    def __init__(
+        self,
+        server: Optional[Tuple[str, int]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        self.server = server or get_default_resolver()
+        self.timeout = timeout
+        self.retries = retries
+        self.cache_size = cache_size
+        self._cache: Dict[Tuple[str, str], Tuple[float, DNSAnswer]] = {}
+        # Second-level cache shared with the other workers (multi-worker mode)
+        self.shared_cache = None
+        self._inflight: Dict[Tuple[int, str, str], asyncio.Future] = {}
+
+    async def query(self, name: str, record_type: str = "A", use_cache: bool = True) -> DNSAnswer:
+        """Resolve one question, from the cache when possible"""
+        record_type = record_type.upper()
+        if record_type not in RECORD_TYPES:
+            raise DNSError(f"Unsupported record type: {record_type}")
+        name = name.rstrip(".").lower()
+        key = (name, record_type)
+
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is None and self.shared_cache is not None:
+                cached = await self._shared_cache_get(key)
+            if cached is not None:
+                return cached
+
+        # Someone on this event loop is already asking the same question,
+        # wait for their answer instead of sending another query
+        loop = asyncio.get_running_loop()
+        inflight_key = (id(loop), name, record_type)
+        inflight = self._inflight.get(inflight_key)
+        if use_cache and inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = loop.create_future()
+        self._inflight[inflight_key] = future
+        try:
+            answer = await self._resolve(name, record_type)
+            self._cache_put(key, answer)
+            future.set_result(answer)
+        except BaseException as e:
+            future.set_exception(e)
+            # Don't warn about an exception nobody else was waiting for
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(inflight_key) is future:
+                del self._inflight[inflight_key]
+
+        # After the waiters got the answer, so they don't wait on the shared store
+        await self._shared_cache_put(key, answer)
+        return answer
+
+    async def resolve_many(
+        self,
+        names: Iterable[str],
+        record_type: str = "A",
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> Dict[str, object]:
+        """
+        Resolve many names concurrently.
+        Returns name -> DNSAnswer, or the exception raised for that name.
+        """
+        limit = asyncio.Semaphore(concurrency)
+        unique = list(dict.fromkeys(names))
+
+        async def resolve(name: str):
+            async with limit:
+                try:
+                    return await self.query(name, record_type)
+                except Exception as e:
+                    return e
+
+        results = await asyncio.gather(*(resolve(name) for name in unique))
+        return dict(zip(unique, results))
+
+    def clear_cache(self):
+        """Drop every cached answer"""
+        self._cache.clear()
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[DNSAnswer]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, answer = entry
+        if expires_at <= time.monotonic():
+            self._cache.pop(key, None)
+            return None
+        return self._cached_answer(expires_at, answer)
+
+    @staticmethod
+    def _cached_answer(expires_at: float, answer: DNSAnswer) -> DNSAnswer:
+        remaining = int(expires_at - time.monotonic())
+        return DNSAnswer(
+            name=answer.name,
+            type=answer.type,
+            rcode=answer.rcode,
+            records=[DNSRecord(r.name, r.type, min(r.ttl, remaining), r.value) for r in answer.records],
+            ttl=remaining,
+            from_cache=True
+        )
+
+    def _cache_put(self, key: Tuple[str, str], answer: DNSAnswer):
+        if answer.ttl <= 0:
+            return
+
+        self._cache_store(key, time.monotonic() + answer.ttl, answer)
+
+    def _cache_store(self, key: Tuple[str, str], expires_at: float, answer: DNSAnswer):
+        if len(self._cache) >= self.cache_size:
+            # Evict the oldest entry; dicts keep insertion order
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = (expires_at, answer)
+
+    async def _shared_cache_get(self, key: Tuple[str, str]) -> Optional[DNSAnswer]:
+        """An answer another worker cached, copied into the local cache"""
+        # The shared store is a SQLite file; keep its I/O off the event loop
+        entry = await asyncio.to_thread(self.shared_cache.get, f"dns:{key[0]}:{key[1]}")
+        if entry is None:
+            return None
+        data, remaining = entry
+        fields = orjson.loads(data)
+        fields["records"] = [DNSRecord(**r) for r in fields["records"]]
+        answer = DNSAnswer(**fields)
+        expires_at = time.monotonic() + remaining
+        self._cache_store(key, expires_at, answer)
+        return self._cached_answer(expires_at, answer)
+
+    async def _shared_cache_put(self, key: Tuple[str, str], answer: DNSAnswer):
+        """Offer an answer to the other workers"""
+        if self.shared_cache is None or answer.ttl <= 0:
+            return
+        await asyncio.to_thread(
+            self.shared_cache.set, f"dns:{key[0]}:{key[1]}", orjson.dumps(answer), answer.ttl
+        )
+
+    async def _resolve(self, name: str, record_type: str) -> DNSAnswer:
+        if self.server is None:
+            raise DNSError("No DNS server configured")
+
+        qtype = RECORD_TYPES[record_type]
+        last_error: Optional[Exception] = None
+
+        for _ in range(self.retries + 1):
+            query_id = random.randint(0, 0xFFFF)
+            request = build_query(query_id, name, qtype)
+            try:
+                data = await self._send_udp(request, query_id)
+                response_id, rcode, truncated, answers, authority = parse_response(data)
+                if truncated:
+                    data = await self._send_tcp(request)
+                    response_id, rcode, truncated, answers, authority = parse_response(data)
+                if response_id != query_id:
+                    raise DNSError("Mismatched response id")
+            except (asyncio.TimeoutError, OSError, DNSError) as e:
+                last_error = e
+                continue
+
+            if rcode not in (RCODE_NOERROR, RCODE_NXDOMAIN):
+                last_error = DNSError(f"Server returned rcode {rcode}")
+                continue
+
+            # Positive answers live as long as their shortest TTL,
+            # NXDOMAIN/NODATA as long as the zone's negative TTL
+            ttl = min(r.ttl for r in answers) if answers else _negative_ttl(authority)
+            return DNSAnswer(name=name, type=record_type, rcode=rcode, records=answers, ttl=ttl)
+
+        if isinstance(last_error, asyncio.TimeoutError):
+            raise DNSError(f"Timed out querying {self.server[0]}")
+        raise DNSError(str(last_error) if last_error else "Query failed")
+
+    async def _send_udp(self, request: bytes, query_id: int) -> bytes:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPQueryProtocol(query_id, future),
+            remote_addr=self.server
+        )
+        try:
+            transport.sendto(request)
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            transport.close()
+
+    async def _send_tcp(self, request: bytes) -> bytes:
+        async def exchange() -> bytes:
+            reader, writer = await asyncio.open_connection(*self.server)
+            try:
+                writer.write(struct.pack("!H", len(request)) + request)
+                await writer.drain()
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+                return await reader.readexactly(length)
+            finally:
+                writer.close()
+
+        try:
+            return await asyncio.wait_for(exchange(), self.timeout)
+        except asyncio.IncompleteReadError as e:
+            raise DNSError("Truncated TCP response") from e
+
+
+def _negative_ttl(authority: List[DNSRecord]) -> int:
+    """TTL for a negative answer: min(SOA TTL, SOA minimum), per RFC 2308"""
+    for record in authority:
+        if record.type == "SOA":
+            minimum = int(record.value.split()[-1])
+            return min(record.ttl, minimum, MAX_NEGATIVE_TTL)
+    return DEFAULT_NEGATIVE_TTL
+
+
+# Shared by the whole process so every caller benefits from the cache
+dns_client = DNSClient()
@@ -0,0 +1,293 @@
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+import json
+
+from netbot.db import (
+    get_session,
+    make_device_key,
+    upsert_devices,
+    get_device_by_ip,
+    set_device_open_ports,
+    get_devices_by_keys,
+    get_fresh_hostnames,
+    create_scan_run,
+    finish_scan_run,
+    get_scan_run,
+    add_scan_entries,
+    get_scan_entry_ips,
+    record_departed_devices,
+    get_scan_entries,
+    delete_old_scans
+)
+from .networking import get_local_ip, iter_local_network, SCAN_BATCH_SIZE, ProgressCallback
+from .results import (
+    Device,
+    DeviceChange,
+    ScanResult,
+    ScanEntry,
+    ScanPage,
+    DeviceInfoResult,
+    PortResult
+)
+
+
+# Inventory hostnames older than this are looked up again on the next scan
+HOSTNAME_STALE_AFTER = timedelta(hours=6)
+
+# Devices returned with a scan; the rest are paged through /v1/scan/{id}
+SCAN_PAGE_SIZE = 50
+
+# Stored scans kept for paging, older ones are deleted
+SCAN_RETENTION = 20
+
+
+def scan_with_inventory(
+    incremental: bool = True,
+    stale_after: timedelta = HOSTNAME_STALE_AFTER,
+    page_size: int = SCAN_PAGE_SIZE,
+    progress: Optional[ProgressCallback] = None
+) -> ScanResult:
+    """
+    Scan the local network and merge the result into the device inventory.
+
+    In incremental mode only new devices and devices with a stale hostname
+    get a PTR lookup; the rest reuse the hostname from the inventory.
+
+    Devices are merged a batch at a time as the scan yields them and stored
+    as a scan run, so memory use doesn't grow with the size of the network.
+    The result holds the first page of devices and of "joined", "left" and
+    "changed", with the totals and the cursor of the next page.
+    progress, if given, is called with each batch of devices as it's merged.
+    """
+    local_info = get_local_ip()
+    if local_info.status != "success":
+        return ScanResult(status="error", error="Could not determine local IP")
+
+    db = get_session()
+    run = None
+    try:
+        now = datetime.utcnow()
+        run = create_scan_run(db, local_info.ip, incremental, started_at=now)
+
+        # IPs whose hostname came from the inventory rather than a fresh lookup
+        reused = set()
+
+        def known_hostnames(ips: List[str]):
+            hostnames = get_fresh_hostnames(db, ips, now - stale_after)
+            reused.update(hostnames)
+            return hostnames
+
+        devices = iter_local_network(known_hostnames if incremental else None)
+        for batch in _batched(devices, SCAN_BATCH_SIZE):
+            _merge_batch(db, run, batch, reused, now)
+            if progress:
+                progress(run.device_count, None, batch)
+
+        run.left_count = record_departed_devices(db, run.id, now)
+        finish_scan_run(db, run, "success")
+        delete_old_scans(db, keep=SCAN_RETENTION)
+
+        page = get_scan_entries(db, run.id, limit=page_size + 1)
+        return ScanResult(
+            status="success",
+            devices=[Device(ip=e.ip, mac=e.mac, hostname=e.hostname) for e in page[:page_size]],
+            network=run.network,
+            joined=[
+                Device(ip=e.ip, mac=e.mac, hostname=e.hostname)
+                for e in get_scan_entries(db, run.id, limit=page_size, change="joined")
+            ],
+            left=[
+                Device(ip=e.ip, mac=e.mac, hostname=e.hostname, status="offline")
+                for e in get_scan_entries(db, run.id, limit=page_size, change="left")
+            ],
+            changed=[
+                DeviceChange(
+                    ip=e.ip,
+                    mac=e.mac,
+                    hostname=e.hostname,
+                    previous_ip=e.previous_ip,
+                    previous_hostname=e.previous_hostname
+                )
+                for e in get_scan_entries(db, run.id, limit=page_size, change="changed")
+            ],
+            incremental=incremental,
+            scan_id=run.id,
+            total=run.device_count,
+            joined_count=run.joined_count,
+            left_count=run.left_count,
+            changed_count=run.changed_count,
+            next_cursor=page[page_size - 1].id if len(page) > page_size else None
+        )
+    except Exception as e:
+        if run is not None:
+            try:
+                db.rollback()
+                finish_scan_run(db, run, "error")
+            except Exception as finish_error:
+                print(f"Failed to mark scan {run.id} as failed: {finish_error}")
+        return ScanResult(status="error", error=str(e))
+    finally:
+        db.close()
+
+
+def _batched(devices: Iterator[Device], size: int) -> Iterator[List[Device]]:
+    """Group the devices of a scan into lists of up to size"""
+    batch = []
+    for device in devices:
+        batch.append(device)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _merge_batch(db, run, batch: List[Device], reused: set, now: datetime):
+    """
+    Upsert a batch of scanned devices and store them as scan entries.
+
+    Duplicates are found among the scan's stored entries, which are unique
+    per device key, so nothing is kept in memory between batches. When a MAC
+    turns up again with another IP (proxy ARP, multi-homed hosts), the first
+    IP keeps the MAC's key and each other IP gets a key of its own, so the
+    IPs don't overwrite each other. Entries listed twice are skipped.
+    """
+    candidates = {make_device_key(device.ip, device.mac) for device in batch}
+    candidates |= {make_device_key(device.ip, device.mac, shared_mac=True) for device in batch}
+    # Device key -> IP stored under it by this scan so far
+    stored = get_scan_entry_ips(db, run.id, list(candidates))
+
+    keyed = []
+    for device in batch:
+        key = make_device_key(device.ip, device.mac)
+        if stored.get(key, device.ip) != device.ip:
+            key = make_device_key(device.ip, device.mac, shared_mac=True)
+        if key in stored:
+            continue
+        stored[key] = device.ip
+        keyed.append((device, key))
+    known = {device.device_key: device for device in get_devices_by_keys(db, [key for _, key in keyed])}
+
+    rows, entries = [], []
+    for device, key in keyed:
+        rows.append({
+            "device_key": key,
+            "ip": device.ip,
+            "mac": device.mac,
+            "hostname": device.hostname,
+            # Only hostnames that were just looked up are fresh
+            "hostname_checked_at": None if device.ip in reused else now
+        })
+        reused.discard(device.ip)
+
+        entry = {
+            "scan_id": run.id,
+            "device_key": key,
+            "ip": device.ip,
+            "mac": device.mac,
+            "hostname": device.hostname,
+            "online": True,
+            "change": None,
+            "previous_ip": None,
+            "previous_hostname": None
+        }
+        previous = known.get(key)
+        if previous is None or not previous.online:
+            entry["change"] = "joined"
+            run.joined_count += 1
+        elif previous.ip != device.ip or previous.hostname != device.hostname:
+            entry.update(change="changed", previous_ip=previous.ip, previous_hostname=previous.hostname)
+            run.changed_count += 1
+        entries.append(entry)
+
+    upsert_devices(db, rows, seen_at=now)
+    add_scan_entries(db, entries)
+    run.device_count += len(keyed)
+
+
+def get_scan_page(
+    scan_id: int,
+    cursor: int = 0,
+    limit: int = SCAN_PAGE_SIZE,
+    change: Optional[str] = None
+) -> ScanPage:
+    """
+    One page of a stored scan, after the cursor.
+    change selects the joined, changed or left devices instead of all found ones.
+    """
+    db = get_session()
+    try:
+        run = get_scan_run(db, scan_id)
+        if run is None:
+            return ScanPage(status="not_found", scan_id=scan_id)
+
+        rows = get_scan_entries(db, scan_id, cursor=cursor, limit=limit + 1, change=change)
+        totals = {
+            None: run.device_count,
+            "joined": run.joined_count,
+            "changed": run.changed_count,
+            "left": run.left_count
+        }
+        return ScanPage(
+            status="success",
+            scan_id=scan_id,
+            network=run.network,
+            scan_status=run.status,
+            change=change,
+            total=totals.get(change, 0),
+            devices=[
+                ScanEntry(
+                    ip=row.ip,
+                    mac=row.mac,
+                    hostname=row.hostname,
+                    status="online" if row.online else "offline",
+                    change=row.change,
+                    previous_ip=row.previous_ip,
+                    previous_hostname=row.previous_hostname
+                )
+                for row in rows[:limit]
+            ],
+            next_cursor=rows[limit - 1].id if len(rows) > limit else None
+        )
+    except Exception as e:
+        return ScanPage(status="error", scan_id=scan_id, error=str(e))
+    finally:
+        db.close()
+
+
+def lookup_device(ip: str) -> DeviceInfoResult:
+    """
+    Answer "what is <ip>" from the inventory, without scanning.
+    """
+    db = get_session()
+    try:
+        device = get_device_by_ip(db, ip)
+        if device is None:
+            return DeviceInfoResult(status="not_found", ip=ip)
+        return DeviceInfoResult(
+            status="success",
+            ip=device.ip,
+            mac=device.mac,
+            hostname=device.hostname,
+            online=device.online,
+            open_ports=json.loads(device.open_ports) if device.open_ports else [],
+            first_seen=device.first_seen.isoformat() if device.first_seen else None,
+            last_seen=device.last_seen.isoformat() if device.last_seen else None
+        )
+    except Exception as e:
+        return DeviceInfoResult(status="error", ip=ip, error=str(e))
+    finally:
+        db.close()
+
+
+def record_open_ports(host: str, ports: List[PortResult]) -> Optional[int]:
+    """
+    Store the open ports from a check_ports result on the matching inventory device.
+    """
+    db = get_session()
+    try:
+        return set_device_open_ports(
+            db, host, [p.port for p in ports if p.open], [p.port for p in ports if not p.open]
+        )
+    finally:
+        db.close()
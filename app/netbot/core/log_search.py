@@ -0,0 +1,44 @@
+from typing import Optional
+
+from netbot.db import get_session, search_logs
+from .results import LogMatch, LogSearchResult
+
+
+def search_action_logs(
+    query: str,
+    limit: int = 10,
+    offset: int = 0,
+    status: Optional[str] = None,
+    order: str = "rank"
+) -> LogSearchResult:
+    """
+    Search the action logs and return one page of matches.
+    """
+    db = get_session()
+    try:
+        # Ask for one extra row to know whether there is a next page
+        rows = search_logs(db, query, limit=limit + 1, offset=offset, status=status, order=order)
+        return LogSearchResult(
+            status="success",
+            query=query,
+            offset=offset,
+            limit=limit,
+            has_more=len(rows) > limit,
+            matches=[
+                LogMatch(
+                    id=row["id"],
+                    action=row["action"],
+                    status=row["status"],
+                    timestamp=row["timestamp"].isoformat(),
+                    parameters=row["parameters"],
+                    # Summaries already bold hosts with **, don't double the markers
+                    snippet=row["snippet"].replace("****", "**"),
+                    rank=round(row["rank"], 4)
+                )
+                for row in rows[:limit]
+            ]
+        )
+    except Exception as e:
+        return LogSearchResult(status="error", query=query, error=str(e))
+    finally:
+        db.close()
@@ -0,0 +1,364 @@
+"""
+Multi-worker deployment support (uvicorn --workers N).
+
+Set NETBOT_MULTI_WORKER=1 to turn it on. The workers then share:
+- a file-backed cache (DNS answers) in NETBOT_SHARED_DIR,
+- one leader, elected through a lock file, that runs the background tasks
+  (log retention with NETBOT_LOG_RETENTION_DAYS, shared cache cleanup),
+- an action log spool: workers append to their own spool file and the
+  leader writes the entries to SQLite in batches, so SQLite has one writer.
+"""
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import glob
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import orjson
+
+from netbot.workers import FileLock, get_shared_dir, multi_worker_enabled
+
+LOG_RETENTION_ENV = "NETBOT_LOG_RETENTION_DAYS"
+
+# How often each worker runs its background loop (and retries the election)
+TICK_INTERVAL = 1.0
+
+# Spool files are handed to the leader once they are this old or large
+SPOOL_ROTATE_AFTER = 1.0
+SPOOL_ROTATE_BYTES = 1024 * 1024
+
+# An open spool file untouched this long belongs to a worker that died
+SPOOL_ORPHANED_AFTER = 60.0
+
+# How long a shared cache read or write waits for a busy file before giving up
+# (a miss costs one DNS query, cheaper than holding up the request)
+CACHE_BUSY_TIMEOUT = 0.1
+
+# How often the leader removes expired shared cache entries
+CACHE_PURGE_INTERVAL = 300.0
+
+# How often the leader deletes old action logs from the log sink (if a retention is configured)
+RETENTION_INTERVAL = 3600.0
+
+
+def get_log_retention_days() -> Optional[int]:
+    """Days of action logs to keep (NETBOT_LOG_RETENTION_DAYS), None to keep all"""
+    value = os.environ.get(LOG_RETENTION_ENV)
+    try:
+        return int(value) if value else None
+    except ValueError:
+        print(f"Ignoring invalid {LOG_RETENTION_ENV}: {value!r}")
+        return None
+
+
+class SharedCache:
+    """
+    Key/value cache with expiry, stored in a SQLite file (WAL mode) that every
+    worker opens, so an entry cached by one worker is a hit in all of them.
+    Expiry uses wall-clock time since monotonic clocks differ between processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # Workers start together, so setting the file up may have to wait its turn
+        setup = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+        try:
+            setup.execute("PRAGMA journal_mode=WAL")
+            setup.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+        finally:
+            setup.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections can't be shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=CACHE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """(value, seconds left), or None if missing or expired"""
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            # Busy or broken, either way it's a miss
+            print(f"Shared cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        return (row[0], remaining) if remaining > 0 else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        """Cache a value for ttl seconds"""
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+        except sqlite3.Error as e:
+            # A busy cache only costs a miss elsewhere
+            print(f"Shared cache write failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns how many"""
+        cursor = self._connect().execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def clear(self):
+        """Drop every entry"""
+        self._connect().execute("DELETE FROM cache")
+
+
+class LogSpool:
+    """
+    Action log entries waiting for the leader to write them to SQLite.
+
+    Each worker appends to its own "<pid>.open" file and renames it to
+    "<pid>-<id>.ready" once it's old or large enough. The leader only reads
+    .ready files, so nobody reads a file that is still being written.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._opened_at: Optional[float] = None
+
+    @property
+    def _open_path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.open")
+
+    def append(self, entries: List[dict]):
+        """Add entries to this worker's spool file"""
+        data = b"".join(orjson.dumps(entry, default=str) + b"\n" for entry in entries)
+        with self._lock:
+            with open(self._open_path, "ab") as f:
+                f.write(data)
+                size = f.tell()
+            if self._opened_at is None:
+                self._opened_at = time.monotonic()
+            if size >= SPOOL_ROTATE_BYTES:
+                self._rotate()
+
+    def rotate_if_due(self, force: bool = False):
+        """Hand this worker's spool file to the leader if it's old enough"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if force or time.monotonic() - self._opened_at >= SPOOL_ROTATE_AFTER:
+                self._rotate()
+
+    def _rotate(self):
+        ready = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex}.ready")
+        try:
+            os.replace(self._open_path, ready)
+        except FileNotFoundError:
+            pass
+        self._opened_at = None
+
+    def drain(self, write: Callable[[List[dict]], object]) -> int:
+        """
+        Write every ready spool file with write(entries) and delete it (leader only).
+        Open files left behind by dead workers are picked up too. Lines that
+        aren't valid entries are moved to a .bad file next to the spool.
+        Returns the number of entries written.
+        """
+        now = time.time()
+        for path in glob.glob(os.path.join(self.directory, "*.open")):
+            try:
+                if now - os.path.getmtime(path) >= SPOOL_ORPHANED_AFTER:
+                    os.replace(path, path[:-len(".open")] + f"-{uuid.uuid4().hex}.ready")
+            except OSError:
+                pass
+
+        count = 0
+        for path in self._ready_files():
+            try:
+                with open(path, "rb") as f:
+                    entries, bad_lines = _parse_spool_lines(f)
+            except OSError as e:
+                print(f"Failed to read log spool file {path}: {e}")
+                continue
+
+            if bad_lines:
+                # A worker that crashed mid-write leaves a torn last line; keep
+                # the unreadable lines aside and write the rest
+                with open(path[:-len(".ready")] + ".bad", "ab") as f:
+                    f.writelines(line.rstrip(b"\n") + b"\n" for line in bad_lines)
+                print(f"Skipped {len(bad_lines)} unreadable lines in log spool file {path}")
+
+            if entries:
+                try:
+                    write(entries)
+                except Exception as e:
+                    # Retried next tick; the other files still get written
+                    print(f"Failed to write log spool file {path}: {e}")
+                    continue
+                count += len(entries)
+            os.remove(path)
+        return count
+
+    def _ready_files(self) -> List[str]:
+        """Ready spool files, oldest first"""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, "*.ready")):
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        return [path for _, path in sorted(files)]
+
+
+def _parse_spool_lines(lines) -> Tuple[List[dict], List[bytes]]:
+    """Spool entries read from lines, and the lines that aren't valid entries"""
+    entries, bad_lines = [], []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            entry = orjson.loads(line)
+            if not isinstance(entry, dict) or not entry.get("action") or not entry.get("status"):
+                raise ValueError("not an action log entry")
+            if entry.get("timestamp"):
+                entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+        except (ValueError, TypeError):
+            bad_lines.append(line)
+            continue
+        entries.append(entry)
+    return entries, bad_lines
+
+
+_shared_cache: Optional[SharedCache] = None
+_log_spool: Optional[LogSpool] = None
+_leader_lock: Optional[FileLock] = None
+
+
+def get_shared_cache() -> SharedCache:
+    """The cache shared by all workers"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SharedCache(os.path.join(get_shared_dir(), "cache.db"))
+    return _shared_cache
+
+
+def get_log_spool() -> LogSpool:
+    """The action log spool shared by all workers"""
+    global _log_spool
+    if _log_spool is None:
+        _log_spool = LogSpool(os.path.join(get_shared_dir(), "spool"))
+    return _log_spool
+
+
+def is_leader() -> bool:
+    """Whether this worker runs the background tasks (a single worker always does)"""
+    if not multi_worker_enabled():
+        return True
+    return _leader_lock is not None and _leader_lock.held
+
+
+def setup_worker():
+    """Point this worker's caches at the shared store (multi-worker mode only)"""
+    if not multi_worker_enabled():
+        return
+    from .dns_client import dns_client
+    dns_client.shared_cache = get_shared_cache()
+
+
+def _write_spooled_logs(entries: List[dict]):
+    from netbot.db import get_session, create_action_logs
+
+    db = get_session()
+    try:
+        create_action_logs(db, entries)
+    finally:
+        db.close()
+
+
+def _delete_old_logs(days: int):
+    from .action_log import get_sink
+
+    deleted = get_sink().delete_old(days)
+    if deleted:
+        print(f"Deleted {deleted} action logs older than {days} days")
+
+
+class _Schedule:
+    """When each periodic leader task last ran"""
+
+    def __init__(self):
+        now = time.monotonic()
+        self.last_purge = now
+        # Retention runs once right away, then every RETENTION_INTERVAL
+        self.last_retention = now - RETENTION_INTERVAL
+
+    def due(self, name: str, interval: float) -> bool:
+        now = time.monotonic()
+        if now - getattr(self, name) < interval:
+            return False
+        setattr(self, name, now)
+        return True
+
+
+def _leader_tick(schedule: _Schedule):
+    """One round of the background tasks, run only by the leader"""
+    if multi_worker_enabled():
+        get_log_spool().drain(_write_spooled_logs)
+        if schedule.due("last_purge", CACHE_PURGE_INTERVAL):
+            get_shared_cache().purge_expired()
+
+    days = get_log_retention_days()
+    if days is not None and schedule.due("last_retention", RETENTION_INTERVAL):
+        _delete_old_logs(days)
+
+
+async def run_background_tasks():
+    """
+    Background loop of every worker (started from the app lifespan).
+
+    With several workers, each tick the worker hands its spool file over and
+    tries to become the leader through a lock file; only the leader runs the
+    scheduled tasks. When the leader exits, the OS releases its lock and
+    another worker takes over on its next tick.
+    """
+    global _leader_lock
+    multi_worker = multi_worker_enabled()
+    if multi_worker:
+        _leader_lock = FileLock(os.path.join(get_shared_dir(), "leader.lock"))
+    elif get_log_retention_days() is None:
+        # A single worker with nothing scheduled
+        return
+
+    schedule = _Schedule()
+    try:
+        while True:
+            try:
+                if multi_worker:
+                    get_log_spool().rotate_if_due()
+                    _leader_lock.acquire()
+                if is_leader():
+                    await asyncio.to_thread(_leader_tick, schedule)
+            except Exception as e:
+                print(f"Background task failed: {e}")
+            await asyncio.sleep(TICK_INTERVAL)
+    finally:
+        if multi_worker:
+            # Hand over what's left, and let another worker lead
+            get_log_spool().rotate_if_due(force=True)
+            if _leader_lock.held:
+                try:
+                    await asyncio.to_thread(get_log_spool().drain, _write_spooled_logs)
+                except Exception as e:
+                    print(f"Final log spool drain failed: {e}")
+            _leader_lock.release()
@@ -1,33 +1,75 @@
-from pythonping import ping
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .rtt import rtt_estimator, RESOLVER_KEY
+from .dns_client import dns_client, reverse_name, DNSError, RCODE_NXDOMAIN
+from .service_detect import detect_service, get_detect_executor, DETECT_DEADLINE, DETECT_WORKERS
+from .results import (
+    PingResult,
+    LocalIpResult,
+    GatewayResult,
+    Device,
+    ScanResult,
+    PortResult,
+    PortScanResult,
+    DnsRecord,
+    DnsResult,
+    TracerouteHop,
+    TracerouteResult
+)
+import asyncio
 import subprocess
 import socket
+import errno
+import time
 import re
 import ipaddress
+import threading
 
 
-def ping_host(host: str, count: int = 4, timeout: int = 2) -> Dict[str, str]:
+# Called by long running actions as they go: progress(done, total, new_items).
+# total is None when it isn't known up front (network scans). Runs in the
+# worker thread of the action.
+ProgressCallback = Callable[[int, Optional[int], list], None]
+
+# Seconds before a traceroute is given up
+TRACEROUTE_TIMEOUT = 90
+
+# ARP cache entries handled per batch by iter_local_network
+SCAN_BATCH_SIZE = 256
+
+# "  192.168.1.1           b0-a7-b9-63-f6-b8     dynamic"
+ARP_ENTRY = re.compile(r'\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\s+([\w-]+)\s+(\w+)')
+
+# connect_ex results that mean the host answered (so the round trip is measurable)
+ANSWERED_CONNECT_CODES = {0, errno.ECONNREFUSED, getattr(errno, "WSAECONNREFUSED", 10061)}
+
+
+def ping_host(host: str, count: int = 4, timeout: Optional[float] = None) -> PingResult:
     """
     Ping a host and return status and average latency.
+    The timeout defaults to one derived from the host's measured RTT.
     """
+    if timeout is None:
+        timeout = rtt_estimator.timeout(host, default=2.0, floor=0.1, ceiling=5.0)
     try:
+        # Imported on first use, it isn't needed to start the server
+        from pythonping import ping
+        
         response_list = ping(host, count=count, timeout=timeout)
+        for response in response_list:
+            if response.success:
+                rtt_estimator.observe(host, response.time_elapsed)
         avg_latency = round(response_list.rtt_avg_ms, 2)
         success = response_list.success()
-        return {
-            "host": host,
-            "status": "online" if success else "offline",
-            "avg_latency_ms": str(avg_latency) if success else None
-        }
+        return PingResult(
+            host=host,
+            status="online" if success else "offline",
+            avg_latency_ms=str(avg_latency) if success else None
+        )
     except Exception as e:
-        return {
-            "host": host,
-            "status": "error",
-            "error": str(e)
-        }
+        return PingResult(host=host, status="error", error=str(e))
 
 
-def get_local_ip() -> Dict[str, str]:
+def get_local_ip() -> LocalIpResult:
     """
     Get the local IP address of this machine.
     """
@@ -41,19 +83,12 @@ def get_local_ip() -> Dict[str, str]:
         finally:
             s.close()
         
-        return {
-            "status": "success",
-            "ip": local_ip,
-            "interface": "Primary"
-        }
+        return LocalIpResult(status="success", ip=local_ip, interface="Primary")
     except Exception as e:
-        return {
-            "status": "error",
-            "error": str(e)
-        }
+        return LocalIpResult(status="error", error=str(e))
 
 
-def get_default_gateway() -> Dict[str, str]:
+def get_default_gateway() -> GatewayResult:
     """
     Get the default gateway using Windows route command.
     More reliable than ipconfig on Windows 11.
@@ -77,109 +112,165 @@ def get_default_gateway() -> Dict[str, str]:
                 ips = re.findall(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', line)
                 # The gateway is typically the 3rd IP in the route output
                 if len(ips) >= 3:
-                    return {
-                        "status": "success",
-                        "gateway": ips[2]
-                    }
+                    return GatewayResult(status="success", gateway=ips[2])
         
-        return {
-            "status": "error",
-            "error": "Could not find default gateway"
-        }
+        return GatewayResult(status="error", error="Could not find default gateway")
     except Exception as e:
-        return {
-            "status": "error",
-            "error": str(e)
-        }
+        return GatewayResult(status="error", error=str(e))
 
 
-def scan_local_network() -> Dict[str, any]:
+def scan_local_network(hostname_cache: Optional[Dict[str, str]] = None) -> ScanResult:
     """
     Scan the local network for active devices using ARP.
     Windows 11 compatible - uses 'arp -a' command.
+    IPs found in hostname_cache reuse the cached hostname instead of a PTR lookup.
+    Collects every device; use iter_local_network for large networks.
     """
+    hostname_cache = hostname_cache or {}
     try:
         # Get local network info first
         local_info = get_local_ip()
-        if local_info["status"] != "success":
-            return {
-                "status": "error",
-                "error": "Could not determine local IP"
-            }
-        
-        # Run arp -a to get ARP cache
-        result = subprocess.run(
-            ["arp", "-a"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-            encoding='utf-8',
-            errors='ignore'
-        )
+        if local_info.status != "success":
+            return ScanResult(status="error", error="Could not determine local IP")
         
-        devices = []
-        lines = result.stdout.split('\n')
+        def known_hostnames(ips: List[str]) -> Dict[str, str]:
+            return {ip: hostname_cache[ip] for ip in ips if ip in hostname_cache}
         
-        for line in lines:
+        devices = list(iter_local_network(known_hostnames))
+        return ScanResult(status="success", devices=devices, network=local_info.ip or "unknown")
+    except Exception as e:
+        return ScanResult(status="error", error=str(e))
+
+
+def iter_local_network(
+    known_hostnames: Optional[Callable[[List[str]], Dict[str, str]]] = None,
+    batch_size: int = SCAN_BATCH_SIZE
+) -> Iterator[Device]:
+    """
+    Yield the devices in the ARP cache as 'arp -a' prints them.
+
+    Entries are handled in batches: known_hostnames gets the IPs of a batch and
+    returns the hostnames that can be reused; the others get a PTR lookup.
+    Only one batch is held in memory, however large the network.
+    Raises on failure.
+    """
+    process = subprocess.Popen(
+        ["arp", "-a"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding='utf-8',
+        errors='ignore'
+    )
+    try:
+        batch = []
+        for line in process.stdout:
             # Match lines with IP addresses in ARP table
             # Format: "  192.168.1.1           b0-a7-b9-63-f6-b8     dynamic"
-            match = re.search(r'\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\s+([\w-]+)\s+(\w+)', line)
-            if match:
-                ip = match.group(1)
-                mac = match.group(2)
-                entry_type = match.group(3)
-                
-                # Skip multicast and broadcast addresses
-                if ip.startswith('224.') or ip.startswith('239.') or ip.endswith('.255'):
-                    continue
-                
-                # Try to get hostname (with timeout)
-                hostname = "Unknown"
-                try:
-                    socket.setdefaulttimeout(0.5)
-                    hostname = socket.gethostbyaddr(ip)[0]
-                except:
-                    pass
-                finally:
-                    socket.setdefaulttimeout(None)
-                
-                devices.append({
-                    "ip": ip,
-                    "mac": mac,
-                    "hostname": hostname,
-                    "status": "online"
-                })
+            match = ARP_ENTRY.search(line)
+            if not match:
+                continue
+            ip, mac = match.group(1), match.group(2)
+            
+            # Skip multicast and broadcast addresses
+            if ip.startswith('224.') or ip.startswith('239.') or ip.endswith('.255'):
+                continue
+            
+            batch.append((ip, mac))
+            if len(batch) >= batch_size:
+                yield from _resolve_batch(batch, known_hostnames)
+                batch = []
         
-        return {
-            "status": "success",
-            "devices": devices,
-            "network": local_info.get("ip", "unknown")
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "error": str(e)
-        }
+        yield from _resolve_batch(batch, known_hostnames)
+        process.wait(timeout=10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
 
+def _resolve_batch(
+    batch: List[Tuple[str, str]],
+    known_hostnames: Optional[Callable[[List[str]], Dict[str, str]]]
+) -> Iterator[Device]:
+    """Yield a Device per ARP entry, reusing known hostnames where possible"""
+    if not batch:
+        return
+    cached = known_hostnames([ip for ip, _ in batch]) if known_hostnames else {}
+    missing = [ip for ip, _ in batch if ip not in cached]
+    looked_up = asyncio.run(_reverse_lookups(missing)) if missing else {}
+    for ip, mac in batch:
+        yield Device(ip=ip, mac=mac, hostname=cached[ip] if ip in cached else looked_up[ip])
 
-def check_port(host: str, port: int, timeout: int = 1) -> bool:
+
+async def _reverse_lookups(ips: List[str]) -> Dict[str, str]:
+    """PTR lookups for a batch of IPs, run concurrently"""
+    hostnames = await asyncio.gather(*(_reverse_lookup(ip) for ip in ips))
+    return dict(zip(ips, hostnames))
+
+
+async def _reverse_lookup(ip: str) -> str:
+    """
+    PTR lookup through the DNS client, with a timeout learnt from the resolver's RTT.
+    When the DNS server has no name for the IP (or there is no DNS server),
+    the system resolver gets the same timeout: it also knows the hosts file
+    and NetBIOS/LLMNR names.
+    """
+    timeout = rtt_estimator.timeout(RESOLVER_KEY, default=0.5, floor=0.05, ceiling=2.0)
+    started = time.monotonic()
+    try:
+        answer = await asyncio.wait_for(dns_client.query(reverse_name(ip), "PTR"), timeout)
+        if not answer.from_cache:
+            # A negative answer still measures the resolver's round trip
+            rtt_estimator.observe(RESOLVER_KEY, time.monotonic() - started)
+        if answer.values:
+            return answer.values[0]
+    except (asyncio.TimeoutError, DNSError, OSError, ValueError):
+        pass
+
+    try:
+        return (await asyncio.wait_for(asyncio.to_thread(socket.gethostbyaddr, ip), timeout))[0]
+    except (asyncio.TimeoutError, OSError):
+        return "Unknown"
+
+
+def check_port(host: str, port: int, timeout: Optional[float] = None) -> bool:
     """
     Check if a specific port is open on a host.
-    Reduced timeout for faster scanning.
+    The timeout defaults to one derived from the host's measured RTT,
+    so LAN hosts are probed quickly and distant hosts get longer.
     """
+    if timeout is None:
+        timeout = rtt_estimator.timeout(host, default=1.0, floor=0.1, ceiling=3.0)
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(timeout)
+        started = time.monotonic()
         result = sock.connect_ex((host, port))
+        elapsed = time.monotonic() - started
         sock.close()
+        # Both SYN-ACK and RST are a full round trip
+        if result in ANSWERED_CONNECT_CODES:
+            rtt_estimator.observe(host, elapsed)
         return result == 0
     except:
         return False
 
 
-def check_ports(host: str, ports: List[int]) -> Dict[str, any]:
+def check_ports(
+    host: str,
+    ports: List[int],
+    progress: Optional[ProgressCallback] = None,
+    detect: bool = False
+) -> PortScanResult:
     """
     Check multiple ports on a host.
+    progress, if given, is called with each port's result as it's checked.
+
+    With detect=True every open port is handed to the service detection pool
+    as soon as it's found, so detection runs behind the scan instead of
+    after it. Detected services replace the well-known port names; ports
+    whose detection didn't finish in time have detection_skipped set.
     """
     try:
         results = []
@@ -201,114 +292,195 @@ def check_ports(host: str, ports: List[int]) -> Dict[str, any]:
             8080: "HTTP-Alt"
         }
         
+        detections = []
         for port in ports:
             is_open = check_port(host, port)
-            results.append({
-                "port": port,
-                "open": is_open,
-                "service": service_names.get(port, "Unknown")
-            })
+            port_result = PortResult(port=port, open=is_open, service=service_names.get(port, "Unknown"))
+            results.append(port_result)
+            if is_open and detect:
+                detections.append((port_result, get_detect_executor().submit(detect_service, host, port)))
+            if progress:
+                progress(len(results), len(ports), [port_result])
         
-        return {
-            "status": "success",
-            "host": host,
-            "ports": results
-        }
+        # One deadline for the whole batch, not per port: enough for this
+        # scan's detections to run through the pool in rounds, plus one round
+        # of queueing behind other requests. Detections that don't finish
+        # are cancelled and reported as skipped.
+        rounds = -(-len(detections) // DETECT_WORKERS) + 1
+        ends_at = time.monotonic() + DETECT_DEADLINE * rounds
+        for port_result, detection in detections:
+            try:
+                info = detection.result(timeout=max(ends_at - time.monotonic(), 0))
+            except Exception:
+                detection.cancel()
+                port_result.detection_skipped = True
+                continue
+            if info.name:
+                port_result.service = info.name
+            port_result.banner = info.banner
+        
+        return PortScanResult(status="success", host=host, ports=results)
     except Exception as e:
-        return {
-            "status": "error",
-            "host": host,
-            "error": str(e)
-        }
+        return PortScanResult(status="error", host=host, error=str(e))
 
 
-def dns_lookup(hostname: str) -> Dict[str, any]:
+def dns_lookup(hostname: str, record_types: Optional[List[str]] = None) -> DnsResult:
     """
     Perform DNS lookup for a hostname.
+    Blocking wrapper around dns_lookup_async for callers without an event loop.
+    """
+    return asyncio.run(dns_lookup_async(hostname, record_types))
+
+
+async def dns_lookup_async(hostname: str, record_types: Optional[List[str]] = None) -> DnsResult:
+    """
+    Perform DNS lookup for a hostname with the native asyncio DNS client.
+    Queries A and AAAA by default, PTR for IP addresses. Names the DNS server
+    doesn't know (hosts file, LLMNR/NetBIOS names) fall back to the system resolver.
     """
     try:
-        addresses = socket.gethostbyname_ex(hostname)[2]
-        return {
-            "status": "success",
-            "hostname": hostname,
-            "addresses": addresses
-        }
+        ipaddress.ip_address(hostname)
+        is_ip = True
+    except ValueError:
+        is_ip = False
+    
+    record_types = [t.upper() for t in (record_types or (["PTR"] if is_ip else ["A", "AAAA"]))]
+    
+    try:
+        answers = await asyncio.gather(*(
+            dns_client.query(reverse_name(hostname) if is_ip and t == "PTR" else hostname, t)
+            for t in record_types
+        ), return_exceptions=True)
+        
+        records, errors, nxdomain = [], [], False
+        for record_type, answer in zip(record_types, answers):
+            if isinstance(answer, Exception):
+                errors.append(f"{record_type}: {answer}")
+                continue
+            nxdomain = nxdomain or answer.rcode == RCODE_NXDOMAIN
+            for record in answer.records:
+                entry = DnsRecord(type=record.type, value=record.value, ttl=record.ttl)
+                # CNAMEs in the chain come back once per queried type
+                if entry not in records:
+                    records.append(entry)
+        
+        addresses = [r.value for r in records if r.type in ("A", "AAAA")]
+        if is_ip:
+            addresses = [hostname]
+        elif not addresses and {"A", "AAAA"} & set(record_types):
+            try:
+                addresses = (await asyncio.to_thread(socket.gethostbyname_ex, hostname))[2]
+                records += [DnsRecord(type="A", value=a) for a in addresses]
+            except OSError:
+                pass
+        
+        # An IP address is a valid answer on its own, even without a PTR record
+        if not records and errors and not is_ip:
+            return DnsResult(status="error", hostname=hostname, error="; ".join(errors))
+        if not records and nxdomain and not is_ip:
+            return DnsResult(status="error", hostname=hostname, error="Name does not exist (NXDOMAIN)")
+        
+        return DnsResult(status="success", hostname=hostname, addresses=addresses, records=records)
     except Exception as e:
-        return {
-            "status": "error",
-            "hostname": hostname,
-            "error": str(e)
-        }
+        return DnsResult(status="error", hostname=hostname, error=str(e))
 
 
-def traceroute(host: str, max_hops: int = 30) -> Dict[str, any]:
+def traceroute(
+    host: str,
+    max_hops: int = 30,
+    progress: Optional[ProgressCallback] = None
+) -> TracerouteResult:
     """
     Perform traceroute to a host using Windows tracert command.
+    The per-hop wait is derived from the host's measured RTT.
+    tracert's output is read as it's printed; progress, if given, is called
+    with each hop as soon as it's resolved.
     """
+    wait_ms = int(rtt_estimator.timeout(host, default=1.0, floor=0.2, ceiling=5.0) * 1000)
     try:
-        result = subprocess.run(
-            ["tracert", "-h", str(max_hops), "-w", "1000", host],
-            capture_output=True,
+        process = subprocess.Popen(
+            ["tracert", "-h", str(max_hops), "-w", str(wait_ms), host],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             text=True,
-            timeout=90,
             encoding='utf-8',
             errors='ignore'
         )
+        # Same overall limit as before, the output is now read line by line
+        timed_out = threading.Event()
         
-        hops = []
-        lines = result.stdout.split('\n')
-        hop_num = 0
+        def kill():
+            timed_out.set()
+            process.kill()
         
-        for line in lines:
-            # Skip header lines
-            if 'Tracing route' in line or 'over a maximum' in line or not line.strip():
-                continue
-                
-            # Match tracert output lines - more flexible pattern
-            # Format: "  1    <1 ms    <1 ms    <1 ms  192.168.1.1"
-            # Or:     "  2     *        *        *     Request timed out."
-            if re.match(r'\s*\d+', line):
-                hop_num += 1
-                
-                # Extract IP or hostname
-                ip_match = re.search(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', line)
-                hostname_match = re.search(r'([\w\.\-]+\.\w{2,})\s*(?:\[|$)', line)
+        timer = threading.Timer(TRACEROUTE_TIMEOUT, kill)
+        timer.start()
+        try:
+            hops = []
+            hop_num = 0
+            target_ip = None
+            
+            for line in process.stdout:
+                # Header: "Tracing route to google.com [142.250.185.78]"
+                target_match = re.search(r'Tracing route to .*?\[?(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\]?', line)
+                if target_match:
+                    target_ip = target_match.group(1)
                 
-                if 'timed out' in line.lower() or '*' in line:
-                    destination = "*"
-                    avg_time = "*"
-                elif ip_match:
-                    destination = ip_match.group(1)
-                    # Extract timing info
-                    times = re.findall(r'(\d+)\s*ms', line)
-                    avg_time = round(sum(int(t) for t in times) / len(times), 1) if times else "*"
-                elif hostname_match:
-                    destination = hostname_match.group(1)
-                    times = re.findall(r'(\d+)\s*ms', line)
-                    avg_time = round(sum(int(t) for t in times) / len(times), 1) if times else "*"
-                else:
+                # Skip header lines
+                if 'Tracing route' in line or 'over a maximum' in line or not line.strip():
                     continue
-                
-                hops.append({
-                    "hop": hop_num,
-                    "ip": destination,
-                    "rtt": f"{avg_time}ms" if avg_time != "*" else "*"
-                })
+                    
+                # Match tracert output lines - more flexible pattern
+                # Format: "  1    <1 ms    <1 ms    <1 ms  192.168.1.1"
+                # Or:     "  2     *        *        *     Request timed out."
+                if re.match(r'\s*\d+', line):
+                    hop_num += 1
+                    
+                    # Extract IP or hostname
+                    ip_match = re.search(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', line)
+                    hostname_match = re.search(r'([\w\.\-]+\.\w{2,})\s*(?:\[|$)', line)
+                    
+                    if 'timed out' in line.lower() or '*' in line:
+                        destination = "*"
+                        avg_time = "*"
+                    elif ip_match:
+                        destination = ip_match.group(1)
+                        # Extract timing info
+                        times = re.findall(r'(\d+)\s*ms', line)
+                        avg_time = round(sum(int(t) for t in times) / len(times), 1) if times else "*"
+                        if avg_time != "*":
+                            rtt_estimator.observe(destination, avg_time / 1000)
+                            if destination == target_ip:
+                                rtt_estimator.observe(host, avg_time / 1000)
+                    elif hostname_match:
+                        destination = hostname_match.group(1)
+                        times = re.findall(r'(\d+)\s*ms', line)
+                        avg_time = round(sum(int(t) for t in times) / len(times), 1) if times else "*"
+                    else:
+                        continue
+                    
+                    hop = TracerouteHop(
+                        hop=hop_num,
+                        ip=destination,
+                        rtt=f"{avg_time}ms" if avg_time != "*" else "*"
+                    )
+                    hops.append(hop)
+                    if progress:
+                        progress(hop_num, max_hops, [hop])
+            
+            process.wait()
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
         
-        return {
-            "status": "success",
-            "host": host,
-            "hops": hops
-        }
-    except subprocess.TimeoutExpired:
-        return {
-            "status": "error",
-            "host": host,
-            "error": "Traceroute timed out - destination may be unreachable"
-        }
+        if timed_out.is_set():
+            return TracerouteResult(
+                status="error",
+                host=host,
+                error="Traceroute timed out - destination may be unreachable"
+            )
+        return TracerouteResult(status="success", host=host, hops=hops)
     except Exception as e:
-        return {
-            "status": "error",
-            "host": host,
-            "error": str(e)
-        }
+        return TracerouteResult(status="error", host=host, error=str(e))
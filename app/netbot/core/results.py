@@ -0,0 +1,247 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+# Typed results returned by the networking functions and actions.
+# Slotted dataclasses keep large results (thousands of devices) small, and
+# orjson serialises them natively without going through pydantic.
+
+
+@dataclass(slots=True)
+class StatusResult:
+    """Result of an action that only has a status (help, unknown, errors)"""
+    status: str
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class PingResult:
+    """Result of ping_host"""
+    host: str
+    status: str  # online, offline, error
+    avg_latency_ms: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class LocalIpResult:
+    """Result of get_local_ip"""
+    status: str
+    ip: Optional[str] = None
+    interface: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class GatewayResult:
+    """Result of get_default_gateway"""
+    status: str
+    gateway: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Device:
+    """A device found on the local network"""
+    ip: str
+    mac: Optional[str] = None
+    hostname: Optional[str] = None
+    status: str = "online"
+
+
+@dataclass(slots=True)
+class DeviceChange:
+    """A device whose IP or hostname changed since the last scan"""
+    ip: str
+    mac: Optional[str]
+    hostname: Optional[str]
+    previous_ip: str
+    previous_hostname: Optional[str]
+
+
+@dataclass(slots=True)
+class ScanResult:
+    """
+    Result of scan_local_network, plus the inventory diff when there is one.
+    Scans stored in the inventory only carry their first page of devices (and
+    of each change list); the rest is paged through with scan_id/next_cursor.
+    """
+    status: str
+    devices: List[Device] = field(default_factory=list)
+    network: Optional[str] = None
+    joined: List[Device] = field(default_factory=list)
+    left: List[Device] = field(default_factory=list)
+    changed: List[DeviceChange] = field(default_factory=list)
+    incremental: Optional[bool] = None
+    scan_id: Optional[int] = None
+    total: Optional[int] = None
+    joined_count: Optional[int] = None
+    left_count: Optional[int] = None
+    changed_count: Optional[int] = None
+    next_cursor: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ScanEntry:
+    """A device of a stored scan, with how it changed since the previous scan"""
+    ip: str
+    mac: Optional[str]
+    hostname: Optional[str]
+    status: str  # online, offline
+    change: Optional[str] = None  # joined, changed, left
+    previous_ip: Optional[str] = None
+    previous_hostname: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ScanPage:
+    """One page of a stored scan"""
+    status: str
+    scan_id: int
+    network: Optional[str] = None
+    scan_status: Optional[str] = None  # running, success, error
+    change: Optional[str] = None
+    total: int = 0
+    devices: List[ScanEntry] = field(default_factory=list)
+    next_cursor: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class PortResult:
+    """
+    State of one port; banner is only set by service detection.
+    detection_skipped: detection was asked for but didn't finish in time
+    (the detection pool was busy), so service is the well-known port name.
+    """
+    port: int
+    open: bool
+    service: str = "Unknown"
+    banner: Optional[str] = None
+    detection_skipped: bool = False
+
+
+@dataclass(slots=True)
+class PortScanResult:
+    """Result of check_ports"""
+    status: str
+    host: str
+    ports: List[PortResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class DnsRecord:
+    """One DNS record; ttl is None for answers from the system resolver"""
+    type: str
+    value: str
+    ttl: Optional[int] = None
+
+
+@dataclass(slots=True)
+class DnsResult:
+    """Result of dns_lookup"""
+    status: str
+    hostname: str
+    addresses: List[str] = field(default_factory=list)
+    records: List[DnsRecord] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class TracerouteHop:
+    """One hop of a traceroute"""
+    hop: int
+    ip: str
+    rtt: str
+
+
+@dataclass(slots=True)
+class TracerouteResult:
+    """Result of traceroute"""
+    status: str
+    host: str
+    hops: List[TracerouteHop] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class DeviceInfoResult:
+    """An inventory device looked up by IP"""
+    status: str  # success, not_found, error
+    ip: str
+    mac: Optional[str] = None
+    hostname: Optional[str] = None
+    online: Optional[bool] = None
+    open_ports: List[int] = field(default_factory=list)
+    first_seen: Optional[str] = None
+    last_seen: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class LogMatch:
+    """One action log search hit"""
+    id: int
+    action: str
+    status: str
+    timestamp: str
+    parameters: str
+    snippet: str
+    rank: float
+
+
+@dataclass(slots=True)
+class LogSearchResult:
+    """One page of action log search hits"""
+    status: str
+    query: str
+    offset: int = 0
+    limit: int = 0
+    has_more: bool = False
+    matches: List[LogMatch] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class LogEntry:
+    """One action log entry read back from the configured log sink"""
+    action: str
+    status: str
+    timestamp: str
+    parameters: dict = field(default_factory=dict)
+    result_summary: Optional[str] = None
+    duration_ms: Optional[float] = None
+
+
+@dataclass(slots=True)
+class RecentLogsResult:
+    """The newest action log entries, newest first"""
+    status: str
+    sink: str
+    entries: List[LogEntry] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ActionEntry:
+    """One action of a multi-action message"""
+    action: str
+    parameters: dict
+    result: object
+
+
+@dataclass(slots=True)
+class MultiResult:
+    """Merged result of a message with several actions"""
+    status: str
+    actions: List[ActionEntry] = field(default_factory=list)
+
+
+def shallow_dict(record) -> Dict[str, object]:
+    """
+    Top-level fields of a result record as a dict, for merging extra keys in.
+    Nested records are left as they are; orjson serialises them directly.
+    """
+    return {name: getattr(record, name) for name in record.__slots__}
@@ -0,0 +1,80 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+# Smoothing gains and variance multiplier from RFC 6298
+ALPHA = 1 / 8
+BETA = 1 / 4
+K = 4
+
+# Key used for round trips to the DNS resolver (PTR lookups during scans)
+RESOLVER_KEY = "__resolver__"
+
+
+@dataclass
+class RTTStats:
+    """Smoothed round trip time and variance for one host, in seconds"""
+    srtt: float
+    rttvar: float
+    samples: int = 1
+
+
+class RTTEstimator:
+    """
+    Per-host round trip time estimator, like TCP's SRTT/RTTVAR.
+    Every probe reports what it measured, and probes derive their
+    timeouts from what has been learnt about the target so far.
+    """
+
+    def __init__(self, max_hosts: int = 4096):
+        self.max_hosts = max_hosts
+        self._stats: Dict[str, RTTStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, host: str, rtt: float):
+        """Record a measured round trip time (seconds) for a host"""
+        if host is None or rtt is None or rtt < 0:
+            return
+
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                if len(self._stats) >= self.max_hosts:
+                    # Forget the oldest host; dicts keep insertion order
+                    self._stats.pop(next(iter(self._stats)))
+                self._stats[host] = RTTStats(srtt=rtt, rttvar=rtt / 2)
+            else:
+                stats.rttvar = (1 - BETA) * stats.rttvar + BETA * abs(stats.srtt - rtt)
+                stats.srtt = (1 - ALPHA) * stats.srtt + ALPHA * rtt
+                stats.samples += 1
+
+    def get(self, host: str) -> Optional[RTTStats]:
+        """Get the current estimate for a host, if any"""
+        with self._lock:
+            return self._stats.get(host)
+
+    def timeout(
+        self,
+        host: str,
+        default: float,
+        floor: float = 0.05,
+        ceiling: float = 5.0
+    ) -> float:
+        """
+        Get a probe timeout (seconds) for a host: SRTT + 4 * RTTVAR,
+        clamped to [floor, ceiling]. Unknown hosts get the default.
+        """
+        stats = self.get(host)
+        if stats is None:
+            return default
+        return min(ceiling, max(floor, stats.srtt + K * stats.rttvar))
+
+    def clear(self):
+        """Forget everything that has been learnt"""
+        with self._lock:
+            self._stats.clear()
+
+
+# Shared by all probes in the process
+rtt_estimator = RTTEstimator()
@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+import re
+import socket
+import ssl
+import threading
+import time
+
+
+# Time one port's detection may take, across all its probes
+DETECT_DEADLINE = 1.5
+
+# How long to wait for a server that speaks first (SSH, SMTP, FTP, ...)
+BANNER_WAIT = 0.4
+
+# Detections running at once across all requests
+DETECT_WORKERS = 16
+
+# Ports where TLS is tried before plain HTTP
+TLS_PORTS = {443, 465, 636, 853, 993, 995, 8443}
+
+# Longest banner kept in results
+MAX_BANNER_LENGTH = 200
+
+# What servers that speak first say, checked in order
+BANNER_SIGNATURES = [
+    (re.compile(rb"^SSH-\d"), "SSH"),
+    (re.compile(rb"^220[ -][^\r\n]*\b(?:E?SMTP|Postfix|Exim|Sendmail|mail)\b", re.IGNORECASE), "SMTP"),
+    (re.compile(rb"^220[ -][^\r\n]*\bFTP\b", re.IGNORECASE), "FTP"),
+    (re.compile(rb"^\+OK"), "POP3"),
+    (re.compile(rb"^\* OK"), "IMAP"),
+    (re.compile(rb"^HTTP/\d"), "HTTP"),
+    (re.compile(rb"^RFB \d{3}\.\d{3}"), "VNC"),
+    (re.compile(rb"^.{4}\x0a\d+\.\d+[\w.-]*\x00", re.DOTALL), "MySQL"),
+]
+
+
+@dataclass(slots=True)
+class ServiceInfo:
+    """What a detection found on a port; name is None when nothing was recognised"""
+    name: Optional[str]
+    banner: Optional[str] = None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_detect_executor() -> ThreadPoolExecutor:
+    """The bounded pool detections run in, created on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DETECT_WORKERS, thread_name_prefix="netbot-detect")
+    return _executor
+
+
+def detect_service(host: str, port: int, deadline: float = DETECT_DEADLINE) -> ServiceInfo:
+    """
+    Identify the service on an open port.
+
+    Listens for a banner first, then sends light probes: a TLS ClientHello
+    and an HTTP HEAD request (TLS first on the usual TLS ports). Every probe
+    shares the same deadline, so a silent port costs at most deadline seconds.
+    """
+    ends_at = time.monotonic() + deadline
+
+    banner = _read_banner(host, port, ends_at)
+    if banner:
+        return _classify_banner(banner)
+
+    probes = (_probe_tls, _probe_http) if port in TLS_PORTS else (_probe_http, _probe_tls)
+    for probe in probes:
+        if time.monotonic() >= ends_at:
+            break
+        info = probe(host, port, ends_at)
+        if info is not None:
+            return info
+
+    return ServiceInfo(name=None)
+
+
+def _remaining(ends_at: float) -> float:
+    """Seconds left before the deadline, never quite zero"""
+    return max(ends_at - time.monotonic(), 0.01)
+
+
+def _connect(host: str, port: int, ends_at: float) -> socket.socket:
+    """Open a TCP connection that times out at the deadline"""
+    sock = socket.create_connection((host, port), timeout=_remaining(ends_at))
+    sock.settimeout(_remaining(ends_at))
+    return sock
+
+
+def _read_banner(host: str, port: int, ends_at: float) -> Optional[bytes]:
+    """Connect and wait briefly for the server to speak first"""
+    try:
+        with _connect(host, port, ends_at) as sock:
+            sock.settimeout(min(BANNER_WAIT, _remaining(ends_at)))
+            return sock.recv(1024) or None
+    except OSError:
+        return None
+
+
+def _classify_banner(banner: bytes) -> ServiceInfo:
+    """Name the service from its greeting"""
+    for pattern, name in BANNER_SIGNATURES:
+        if pattern.match(banner):
+            return ServiceInfo(name=name, banner=_banner_text(banner))
+    return ServiceInfo(name=None, banner=_banner_text(banner))
+
+
+def _banner_text(banner: bytes) -> str:
+    """First line of a banner as printable text"""
+    line = banner.split(b"\n", 1)[0].rstrip(b"\r")
+    text = "".join(c if c.isprintable() else "." for c in line.decode("latin-1"))
+    return text[:MAX_BANNER_LENGTH]
+
+
+def _http_head(sock, host: str) -> Optional[ServiceInfo]:
+    """Send HEAD / and describe the server if it answers HTTP"""
+    sock.sendall(f"HEAD / HTTP/1.0\r\nHost: {host}\r\nUser-Agent: NetBot\r\n\r\n".encode())
+    response = sock.recv(2048)
+    if not response.startswith(b"HTTP/"):
+        return None
+    server = re.search(rb"^Server:\s*([^\r\n]+)", response, re.IGNORECASE | re.MULTILINE)
+    return ServiceInfo(name="HTTP", banner=_banner_text(server.group(1) if server else response))
+
+
+def _probe_http(host: str, port: int, ends_at: float) -> Optional[ServiceInfo]:
+    """Plain HTTP probe"""
+    try:
+        with _connect(host, port, ends_at) as sock:
+            return _http_head(sock, host)
+    except OSError:
+        return None
+
+
+def _probe_tls(host: str, port: int, ends_at: float) -> Optional[ServiceInfo]:
+    """
+    TLS ClientHello probe. Certificates aren't checked, we only want to know
+    whether the port speaks TLS (and HTTP inside it).
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    try:
+        with _connect(host, port, ends_at) as raw:
+            with context.wrap_socket(raw, server_hostname=host) as sock:
+                version = sock.version()
+                try:
+                    sock.settimeout(_remaining(ends_at))
+                    info = _http_head(sock, host)
+                except OSError:
+                    info = None
+                if info is not None:
+                    return ServiceInfo(name="HTTPS", banner=f"{version}, {info.banner}")
+                return ServiceInfo(name="TLS", banner=version)
+    except (OSError, ssl.SSLError):
+        return None
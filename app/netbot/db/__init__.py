@@ -1,21 +1,55 @@
 # Database package initialization
-from .models import Base, ActionLog, init_db, get_session
-from .crud import (
-    create_action_log,
-    get_recent_logs,
-    get_logs_by_action,
-    get_logs_by_date_range,
-    delete_old_logs
-)
+# Names are loaded on first access so that importing the API modules doesn't
+# pull in SQLAlchemy before the server is up.
+import importlib
 
-__all__ = [
-    "Base",
-    "ActionLog",
-    "init_db",
-    "get_session",
-    "create_action_log",
-    "get_recent_logs",
-    "get_logs_by_action",
-    "get_logs_by_date_range",
-    "delete_old_logs"
-]
+_EXPORTS = {
+    "Base": ".models",
+    "ActionLog": ".models",
+    "Device": ".models",
+    "ScanRun": ".models",
+    "ScanEntry": ".models",
+    "ActionRollupHourly": ".models",
+    "ActionRollupDaily": ".models",
+    "TargetStat": ".models",
+    "init_db": ".models",
+    "get_session": ".models",
+    "create_action_log": ".crud",
+    "create_action_logs": ".crud",
+    "rebuild_rollups": ".crud",
+    "get_action_rollups": ".crud",
+    "get_error_rates": ".crud",
+    "get_slowest_targets": ".crud",
+    "search_logs": ".crud",
+    "get_recent_logs": ".crud",
+    "get_logs_by_action": ".crud",
+    "get_logs_by_date_range": ".crud",
+    "delete_old_logs": ".crud",
+    "make_device_key": ".crud",
+    "upsert_devices": ".crud",
+    "get_devices": ".crud",
+    "get_device_by_ip": ".crud",
+    "mark_devices_offline": ".crud",
+    "set_device_open_ports": ".crud",
+    "get_devices_by_keys": ".crud",
+    "get_fresh_hostnames": ".crud",
+    "create_scan_run": ".crud",
+    "finish_scan_run": ".crud",
+    "get_scan_run": ".crud",
+    "add_scan_entries": ".crud",
+    "get_scan_entry_ips": ".crud",
+    "record_departed_devices": ".crud",
+    "get_scan_entries": ".crud",
+    "delete_old_scans": ".crud",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
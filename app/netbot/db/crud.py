@@ -1,8 +1,19 @@
+from sqlalchemy import DateTime, func, case, text, select, literal, insert, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from .models import ActionLog
-from typing import List, Optional
+from .models import (
+    ActionLog, Device, ScanRun, ScanEntry, ActionRollupHourly, ActionRollupDaily, TargetStat
+)
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime, timedelta
 import json
+import re
+
+
+# Rows per INSERT statement, keeps us under SQLite's bound parameter limit
+UPSERT_CHUNK_SIZE = 500
+
+MAC_PATTERN = re.compile(r"^[0-9a-f]{2}([-:])(?:[0-9a-f]{2}\1){4}[0-9a-f]{2}$")
 
 
 def create_action_log(
@@ -10,24 +21,334 @@ def create_action_log(
     action: str,
     parameters: dict,
     result_summary: str,
-    status: str
+    status: str,
+    duration_ms: Optional[float] = None
 ) -> ActionLog:
     """
-    Create a new action log entry.
+    Create a new action log entry and update the analytics rollups.
     """
     log_entry = ActionLog(
         action=action,
         parameters=json.dumps(parameters),
         result_summary=result_summary,
         status=status,
-        timestamp=datetime.utcnow()
+        timestamp=datetime.utcnow(),
+        target=parameters.get("host"),
+        duration_ms=duration_ms
     )
     db.add(log_entry)
+    _update_rollups(db, [log_entry])
     db.commit()
     db.refresh(log_entry)
     return log_entry
 
 
+def create_action_logs(db: Session, entries: List[dict]) -> int:
+    """
+    Create many action log entries in a single transaction.
+    Each entry has the same keys as create_action_log's arguments, plus an
+    optional "timestamp" (now if missing).
+    Returns the number of inserted records.
+    """
+    now = datetime.utcnow()
+    log_entries = [
+        ActionLog(
+            action=entry["action"],
+            parameters=json.dumps(entry.get("parameters", {})),
+            result_summary=entry.get("result_summary"),
+            status=entry["status"],
+            timestamp=entry.get("timestamp") or now,
+            target=entry.get("parameters", {}).get("host"),
+            duration_ms=entry.get("duration_ms")
+        )
+        for entry in entries
+    ]
+    db.add_all(log_entries)
+    _update_rollups(db, log_entries)
+    db.commit()
+    return len(entries)
+
+
+def _hour_bucket(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _day_bucket(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _upsert_rollup_rows(db: Session, model, rows: List[dict]):
+    """Add counts and durations to existing rollup rows, inserting missing ones"""
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(model).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket", "action", "status"],
+            set_={
+                "count": model.count + stmt.excluded.count,
+                "total_duration_ms": model.total_duration_ms + stmt.excluded.total_duration_ms,
+                "max_duration_ms": func.max(model.max_duration_ms, stmt.excluded.max_duration_ms),
+            }
+        )
+        db.execute(stmt)
+
+
+def _upsert_target_rows(db: Session, rows: List[dict]):
+    """Add counts and durations to existing target stats, inserting missing ones"""
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(TargetStat).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["action", "target"],
+            set_={
+                "count": TargetStat.count + stmt.excluded.count,
+                "total_duration_ms": TargetStat.total_duration_ms + stmt.excluded.total_duration_ms,
+                "max_duration_ms": func.max(TargetStat.max_duration_ms, stmt.excluded.max_duration_ms),
+                "last_seen": stmt.excluded.last_seen,
+            }
+        )
+        db.execute(stmt)
+
+
+def _update_rollups(db: Session, log_entries: List[ActionLog]):
+    """
+    Fold new log entries into the hourly/daily rollups and target stats.
+    Runs in the caller's transaction, so rollups and logs commit together.
+    """
+    for model, bucket_of in ((ActionRollupHourly, _hour_bucket), (ActionRollupDaily, _day_bucket)):
+        groups: Dict[tuple, dict] = {}
+        for entry in log_entries:
+            key = (bucket_of(entry.timestamp), entry.action, entry.status)
+            duration = entry.duration_ms or 0.0
+            row = groups.setdefault(key, {
+                "bucket": key[0], "action": key[1], "status": key[2],
+                "count": 0, "total_duration_ms": 0.0, "max_duration_ms": 0.0
+            })
+            row["count"] += 1
+            row["total_duration_ms"] += duration
+            row["max_duration_ms"] = max(row["max_duration_ms"], duration)
+        _upsert_rollup_rows(db, model, list(groups.values()))
+
+    targets: Dict[tuple, dict] = {}
+    for entry in log_entries:
+        if not entry.target or entry.duration_ms is None:
+            continue
+        row = targets.setdefault((entry.action, entry.target), {
+            "action": entry.action, "target": entry.target,
+            "count": 0, "total_duration_ms": 0.0, "max_duration_ms": 0.0,
+            "last_seen": entry.timestamp
+        })
+        row["count"] += 1
+        row["total_duration_ms"] += entry.duration_ms
+        row["max_duration_ms"] = max(row["max_duration_ms"], entry.duration_ms)
+    _upsert_target_rows(db, list(targets.values()))
+
+
+def rebuild_rollups(db: Session, since: Optional[datetime] = None) -> int:
+    """
+    Recompute rollups from the raw action logs, e.g. to backfill logs written
+    before rollups existed. Only buckets from `since` (start of that day) are
+    rebuilt.
+
+    Retention deletes raw logs but keeps their rollups, so buckets older than
+    the oldest raw log are never touched, and the bucket it falls in is only
+    filled in when it has no rollup yet. Target stats are only raised, never
+    lowered below what the incremental updates recorded.
+    Returns the number of raw logs aggregated.
+    """
+    oldest = db.query(func.min(ActionLog.timestamp)).scalar()
+    if oldest is None:
+        # Nothing to rebuild from, and nothing to throw away
+        return 0
+
+    since = _day_bucket(since) if since else None
+    logs = db.query(ActionLog)
+    if since:
+        logs = logs.filter(ActionLog.timestamp >= since)
+    count = logs.count()
+
+    for model, fmt, bucket_of, step in (
+        (ActionRollupHourly, "%Y-%m-%d %H:00:00", _hour_bucket, timedelta(hours=1)),
+        (ActionRollupDaily, "%Y-%m-%d 00:00:00", _day_bucket, timedelta(days=1)),
+    ):
+        # First bucket that no deleted log can have contributed to
+        covered_from = bucket_of(oldest)
+        if covered_from < oldest:
+            covered_from += step
+        start = max(covered_from, since) if since else covered_from
+
+        db.query(model).filter(model.bucket >= start).delete(synchronize_session=False)
+        _upsert_rollup_rows(db, model, _grouped_rollup_rows(db, fmt, ActionLog.timestamp >= start))
+
+        if start > oldest and (since is None or since < start):
+            # The bucket with the oldest raw log may have lost logs to retention
+            _insert_missing_rollup_rows(db, model, _grouped_rollup_rows(db, fmt, ActionLog.timestamp < start))
+
+    grouped = db.query(
+        ActionLog.action,
+        ActionLog.target,
+        func.count(ActionLog.id),
+        func.sum(ActionLog.duration_ms),
+        func.max(ActionLog.duration_ms),
+        func.max(ActionLog.timestamp)
+    ).filter(
+        ActionLog.target.isnot(None),
+        ActionLog.duration_ms.isnot(None)
+    ).group_by(ActionLog.action, ActionLog.target)
+    _replace_smaller_target_rows(db, [
+        {
+            "action": action, "target": target, "count": count,
+            "total_duration_ms": total, "max_duration_ms": longest, "last_seen": last_seen
+        }
+        for action, target, count, total, longest, last_seen in grouped
+    ])
+
+    db.commit()
+    return count
+
+
+def _grouped_rollup_rows(db: Session, fmt: str, condition) -> List[dict]:
+    """Raw logs matching condition, aggregated into rollup rows of fmt buckets"""
+    bucket = func.strftime(fmt, ActionLog.timestamp)
+    grouped = db.query(
+        bucket,
+        ActionLog.action,
+        ActionLog.status,
+        func.count(ActionLog.id),
+        func.coalesce(func.sum(ActionLog.duration_ms), 0.0),
+        func.coalesce(func.max(ActionLog.duration_ms), 0.0)
+    ).filter(condition).group_by(bucket, ActionLog.action, ActionLog.status)
+    return [
+        {
+            "bucket": datetime.strptime(b, "%Y-%m-%d %H:%M:%S"), "action": action, "status": status,
+            "count": count, "total_duration_ms": total, "max_duration_ms": longest
+        }
+        for b, action, status, count, total, longest in grouped
+    ]
+
+
+def _insert_missing_rollup_rows(db: Session, model, rows: List[dict]):
+    """Insert rollup rows, leaving existing ones as they are"""
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(model).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["bucket", "action", "status"]))
+
+
+def _replace_smaller_target_rows(db: Session, rows: List[dict]):
+    """Insert target stats, replacing existing ones only where the new count is larger"""
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(TargetStat).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["action", "target"],
+            set_={
+                "count": stmt.excluded.count,
+                "total_duration_ms": stmt.excluded.total_duration_ms,
+                "max_duration_ms": stmt.excluded.max_duration_ms,
+                "last_seen": stmt.excluded.last_seen,
+            },
+            where=stmt.excluded.count > TargetStat.count
+        )
+        db.execute(stmt)
+
+
+def get_action_rollups(
+    db: Session,
+    granularity: str,
+    since: datetime,
+    action: Optional[str] = None
+) -> list:
+    """
+    Get rollup rows ("hour" or "day" buckets) from `since` onwards.
+    """
+    model = ActionRollupHourly if granularity == "hour" else ActionRollupDaily
+    query = db.query(model).filter(model.bucket >= since)
+    if action:
+        query = query.filter(model.action == action)
+    return query.order_by(model.bucket, model.action, model.status).all()
+
+
+def get_error_rates(db: Session, since: datetime) -> list:
+    """
+    Get total and failed action counts per action from the daily rollups.
+    Returns rows of (action, total, errors).
+    """
+    return db.query(
+        ActionRollupDaily.action,
+        func.sum(ActionRollupDaily.count),
+        func.sum(case((ActionRollupDaily.status == "error", ActionRollupDaily.count), else_=0))
+    ).filter(
+        ActionRollupDaily.bucket >= _day_bucket(since)
+    ).group_by(ActionRollupDaily.action).all()
+
+
+def get_slowest_targets(db: Session, limit: int = 10, action: Optional[str] = None) -> List[TargetStat]:
+    """
+    Get the targets with the highest average duration.
+    """
+    query = db.query(TargetStat)
+    if action:
+        query = query.filter(TargetStat.action == action)
+    return query.order_by(
+        (TargetStat.total_duration_ms / TargetStat.count).desc()
+    ).limit(limit).all()
+
+
+def build_fts_query(search: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, and each word
+    is quoted so that IPs, hostnames and FTS operators are taken literally.
+    Commas and "or" separate alternatives ("10.0.0.1, 10.0.0.2"); "and"
+    between words is dropped, since every word must match anyway.
+    """
+    alternatives = []
+    for part in re.split(r",|\bor\b", search):
+        words = [word for word in part.split() if word != "and"]
+        if words:
+            alternatives.append(" ".join('"' + word.replace('"', '""') + '"' for word in words))
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return " OR ".join(f"({alternative})" for alternative in alternatives)
+
+
+def search_logs(
+    db: Session,
+    search: str,
+    limit: int = 20,
+    offset: int = 0,
+    status: Optional[str] = None,
+    order: str = "rank",
+    exclude_actions: Iterable[str] = ("search_logs",)
+) -> List[dict]:
+    """
+    Full-text search over action logs.
+    Results are ordered by relevance ("rank") or newest first ("recent"),
+    with a highlighted snippet of the matching text.
+    """
+    fts_query = build_fts_query(search)
+    if not fts_query:
+        return []
+
+    filters = ""
+    params = {"query": fts_query, "limit": limit, "offset": offset}
+    if status:
+        filters += " AND l.status = :status"
+        params["status"] = status
+    for i, action in enumerate(exclude_actions):
+        filters += f" AND l.action != :exclude_{i}"
+        params[f"exclude_{i}"] = action
+    order_by = "l.timestamp DESC" if order == "recent" else "rank"
+
+    rows = db.execute(text(f"""
+        SELECT l.id, l.action, l.parameters, l.result_summary, l.status, l.timestamp,
+               bm25(action_logs_fts) AS rank,
+               snippet(action_logs_fts, -1, '**', '**', '…', 12) AS snippet
+        FROM action_logs_fts
+        JOIN action_logs l ON l.id = action_logs_fts.rowid
+        WHERE action_logs_fts MATCH :query{filters}
+        ORDER BY {order_by}
+        LIMIT :limit OFFSET :offset
+    """).columns(timestamp=DateTime), params)
+    return [dict(row._mapping) for row in rows]
+
+
 def get_recent_logs(db: Session, limit: int = 50) -> List[ActionLog]:
     """
     Get recent action logs.
@@ -73,3 +394,271 @@ def delete_old_logs(db: Session, days: int = 30) -> int:
     ).delete()
     db.commit()
     return count
+
+
+def make_device_key(ip: str, mac: Optional[str], shared_mac: bool = False) -> str:
+    """
+    Build the inventory key for a device: its MAC address if known, else its IP.
+    shared_mac: the MAC also answers for other IPs (proxy ARP, multi-homed
+    hosts), so the key is "<mac>@<ip>" to keep one device per IP.
+    """
+    if mac and MAC_PATTERN.match(mac.lower()):
+        key = mac.lower().replace("-", ":")
+        return f"{key}@{ip}" if shared_mac else key
+    return ip
+
+
+def upsert_devices(
+    db: Session,
+    devices: Iterable[dict],
+    seen_at: Optional[datetime] = None
+) -> int:
+    """
+    Insert or update inventory devices, marking them online.
+    Each dict has "ip", "mac", "hostname" and optionally "hostname_checked_at"
+    and "device_key" (else built with make_device_key).
+    first_seen is only set when a device is inserted.
+    Returns the number of upserted records.
+    """
+    seen_at = seen_at or datetime.utcnow()
+    rows = [
+        {
+            "device_key": d.get("device_key") or make_device_key(d["ip"], d.get("mac")),
+            "ip": d["ip"],
+            "mac": d.get("mac"),
+            "hostname": d.get("hostname"),
+            "online": True,
+            "first_seen": seen_at,
+            "last_seen": seen_at,
+            "hostname_checked_at": d.get("hostname_checked_at"),
+        }
+        for d in devices
+    ]
+    
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(Device).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Device.device_key],
+            set_={
+                "ip": stmt.excluded.ip,
+                "mac": stmt.excluded.mac,
+                "hostname": stmt.excluded.hostname,
+                "online": True,
+                "last_seen": stmt.excluded.last_seen,
+                "hostname_checked_at": func.coalesce(
+                    stmt.excluded.hostname_checked_at, Device.hostname_checked_at
+                ),
+            }
+        )
+        db.execute(stmt)
+    db.commit()
+    return len(rows)
+
+
+def get_devices(db: Session, online_only: bool = False) -> List[Device]:
+    """
+    Get all inventory devices.
+    """
+    query = db.query(Device)
+    if online_only:
+        query = query.filter(Device.online.is_(True))
+    return query.order_by(Device.ip).all()
+
+
+def get_device_by_ip(db: Session, ip: str) -> Optional[Device]:
+    """
+    Get the most recently seen inventory device with this IP.
+    """
+    return db.query(Device).filter(
+        Device.ip == ip
+    ).order_by(Device.last_seen.desc()).first()
+
+
+def mark_devices_offline(db: Session, device_keys: List[str]) -> int:
+    """
+    Mark inventory devices as offline.
+    Returns the number of updated records.
+    """
+    if not device_keys:
+        return 0
+    count = db.query(Device).filter(
+        Device.device_key.in_(device_keys)
+    ).update({Device.online: False}, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def set_device_open_ports(
+    db: Session,
+    ip: str,
+    open_ports: List[int],
+    closed_ports: Iterable[int] = ()
+) -> int:
+    """
+    Merge a port check into the open ports of the inventory device(s) with
+    this IP: open_ports are added, closed_ports (checked and found closed)
+    removed, and ports that weren't checked are kept.
+    Returns the number of updated records.
+    """
+    devices = db.query(Device).filter(Device.ip == ip).all()
+    for device in devices:
+        ports = set(json.loads(device.open_ports)) if device.open_ports else set()
+        ports = (ports - set(closed_ports)) | set(open_ports)
+        device.open_ports = json.dumps(sorted(ports))
+    db.commit()
+    return len(devices)
+
+
+def get_devices_by_keys(db: Session, device_keys: List[str]) -> List[Device]:
+    """
+    Get the inventory devices with these keys.
+    """
+    devices = []
+    for start in range(0, len(device_keys), UPSERT_CHUNK_SIZE):
+        devices += db.query(Device).filter(
+            Device.device_key.in_(device_keys[start:start + UPSERT_CHUNK_SIZE])
+        ).all()
+    return devices
+
+
+def get_fresh_hostnames(db: Session, ips: List[str], checked_since: datetime) -> Dict[str, str]:
+    """
+    Map each of these IPs to its inventory hostname, if the hostname was
+    looked up after checked_since.
+    """
+    hostnames = {}
+    for start in range(0, len(ips), UPSERT_CHUNK_SIZE):
+        rows = db.query(Device.ip, Device.hostname).filter(
+            Device.ip.in_(ips[start:start + UPSERT_CHUNK_SIZE]),
+            Device.hostname_checked_at > checked_since
+        ).all()
+        hostnames.update((ip, hostname) for ip, hostname in rows)
+    return hostnames
+
+
+def create_scan_run(
+    db: Session,
+    network: Optional[str],
+    incremental: bool,
+    started_at: Optional[datetime] = None
+) -> ScanRun:
+    """
+    Start recording a network scan.
+    """
+    run = ScanRun(
+        network=network,
+        incremental=incremental,
+        started_at=started_at or datetime.utcnow(),
+        status="running"
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def finish_scan_run(db: Session, run: ScanRun, status: str) -> ScanRun:
+    """
+    Mark a scan as finished. The counts are set by the caller on the run.
+    """
+    run.status = status
+    run.finished_at = datetime.utcnow()
+    db.commit()
+    return run
+
+
+def get_scan_run(db: Session, scan_id: int) -> Optional[ScanRun]:
+    """
+    Get a scan by id.
+    """
+    return db.query(ScanRun).filter(ScanRun.id == scan_id).first()
+
+
+def add_scan_entries(db: Session, entries: List[dict]) -> int:
+    """
+    Store devices found by a scan. Each dict has the ScanEntry columns.
+    Entries whose device_key the scan already has are skipped.
+    Returns the number of inserted records.
+    """
+    if not entries:
+        return 0
+    stmt = sqlite_insert(ScanEntry).on_conflict_do_nothing(index_elements=["scan_id", "device_key"])
+    count = db.connection().execute(stmt, entries).rowcount
+    db.commit()
+    return count
+
+
+def get_scan_entry_ips(db: Session, scan_id: int, device_keys: List[str]) -> Dict[str, str]:
+    """
+    Map each of these device keys that the scan already has an entry for
+    to that entry's IP.
+    """
+    ips = {}
+    for start in range(0, len(device_keys), UPSERT_CHUNK_SIZE):
+        rows = db.query(ScanEntry.device_key, ScanEntry.ip).filter(
+            ScanEntry.scan_id == scan_id,
+            ScanEntry.device_key.in_(device_keys[start:start + UPSERT_CHUNK_SIZE])
+        ).all()
+        ips.update((key, ip) for key, ip in rows)
+    return ips
+
+
+def record_departed_devices(db: Session, scan_id: int, seen_at: datetime) -> int:
+    """
+    Store the online devices not seen by this scan as "left" entries and
+    mark them offline. Runs entirely in SQLite, nothing is loaded into Python.
+    Returns the number of departed devices.
+    """
+    departed = (
+        Device.online.is_(True),
+        Device.last_seen < seen_at
+    )
+    db.execute(insert(ScanEntry).from_select(
+        ["scan_id", "device_key", "ip", "mac", "hostname", "online", "change"],
+        select(
+            literal(scan_id), Device.device_key, Device.ip, Device.mac, Device.hostname,
+            literal(False), literal("left")
+        ).where(*departed).order_by(Device.ip)
+    ))
+    count = db.query(Device).filter(*departed).update(
+        {Device.online: False}, synchronize_session=False
+    )
+    db.commit()
+    return count
+
+
+def get_scan_entries(
+    db: Session,
+    scan_id: int,
+    cursor: int = 0,
+    limit: int = 100,
+    change: Optional[str] = None
+) -> List[ScanEntry]:
+    """
+    Get one page of a scan's entries, starting after the cursor (an entry id).
+    Without a change filter only the devices the scan found are returned;
+    otherwise only the joined, changed or left ones.
+    """
+    query = db.query(ScanEntry).filter(ScanEntry.scan_id == scan_id, ScanEntry.id > cursor)
+    if change is None:
+        query = query.filter(ScanEntry.online.is_(True))
+    else:
+        query = query.filter(ScanEntry.change == change)
+    return query.order_by(ScanEntry.id).limit(limit).all()
+
+
+def delete_old_scans(db: Session, keep: int = 20) -> int:
+    """
+    Delete all but the newest scans and their entries.
+    Returns the number of deleted scans.
+    """
+    old_ids = [
+        scan_id for (scan_id,) in
+        db.query(ScanRun.id).order_by(ScanRun.id.desc()).offset(keep).all()
+    ]
+    for start in range(0, len(old_ids), UPSERT_CHUNK_SIZE):
+        chunk = old_ids[start:start + UPSERT_CHUNK_SIZE]
+        db.execute(delete(ScanEntry).where(ScanEntry.scan_id.in_(chunk)))
+        db.execute(delete(ScanRun).where(ScanRun.id.in_(chunk)))
+    db.commit()
+    return len(old_ids)
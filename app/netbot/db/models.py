@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, create_engine
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import (
+    Column, Integer, String, Text, DateTime, Boolean, Float,
+    Index, UniqueConstraint, create_engine, event, inspect, text
+)
+from sqlalchemy.ext.declarative import declarative_base, declared_attr
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+from netbot.workers import multi_worker_enabled, worker_lock
 import os
+import threading
 
 Base = declarative_base()
 
@@ -19,28 +24,248 @@ class ActionLog(Base):
     result_summary = Column(Text, nullable=True)
     status = Column(String(20), nullable=False)  # success, error, partial
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    target = Column(String(255), nullable=True, index=True)  # Host the action ran against
+    duration_ms = Column(Float, nullable=True)
     
     def __repr__(self):
         return f"<ActionLog(id={self.id}, action={self.action}, status={self.status})>"
 
 
+class Device(Base):
+    """
+    Inventory of devices seen on the local network.
+    Keyed by MAC address, or by IP when the MAC is unknown.
+    """
+    __tablename__ = "devices"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    device_key = Column(String(64), nullable=False, unique=True)
+    ip = Column(String(45), nullable=False, index=True)
+    mac = Column(String(32), nullable=True, index=True)
+    hostname = Column(String(255), nullable=True)
+    open_ports = Column(Text, nullable=True)  # JSON list of open port numbers
+    online = Column(Boolean, default=True, nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    hostname_checked_at = Column(DateTime, nullable=True)  # Last PTR lookup
+    
+    def __repr__(self):
+        return f"<Device(ip={self.ip}, mac={self.mac}, hostname={self.hostname})>"
+
+
+class ScanRun(Base):
+    """
+    One network scan. Its devices are stored in scan_entries so large scans
+    can be paged through instead of being held in memory.
+    """
+    __tablename__ = "scan_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    network = Column(String(45), nullable=True)  # Local IP the scan ran from
+    status = Column(String(20), nullable=False, default="running")  # running, success, error
+    incremental = Column(Boolean, default=True, nullable=False)
+    device_count = Column(Integer, default=0, nullable=False)
+    joined_count = Column(Integer, default=0, nullable=False)
+    left_count = Column(Integer, default=0, nullable=False)
+    changed_count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<ScanRun(id={self.id}, status={self.status}, devices={self.device_count})>"
+
+
+class ScanEntry(Base):
+    """
+    A device found by a scan, or one that left since the previous scan.
+    The id is the pagination cursor. A scan has one entry per device key,
+    so duplicates in the ARP cache are caught by SQLite, not in memory.
+    """
+    __tablename__ = "scan_entries"
+    __table_args__ = (Index("uq_scan_entries_device", "scan_id", "device_key", unique=True),)
+    
+    id = Column(Integer, primary_key=True)
+    scan_id = Column(Integer, nullable=False, index=True)
+    device_key = Column(String(64), nullable=True)  # NULL for entries from before it was added
+    ip = Column(String(45), nullable=False)
+    mac = Column(String(32), nullable=True)
+    hostname = Column(String(255), nullable=True)
+    online = Column(Boolean, default=True, nullable=False)
+    change = Column(String(10), nullable=True)  # joined, changed, left or None
+    previous_ip = Column(String(45), nullable=True)
+    previous_hostname = Column(String(255), nullable=True)
+
+
+class RollupMixin:
+    """
+    Pre-aggregated action log counts per time bucket, action and status.
+    Kept up to date as logs are written so dashboards never scan action_logs.
+    """
+    id = Column(Integer, primary_key=True)
+    bucket = Column(DateTime, nullable=False, index=True)  # Start of the hour/day
+    action = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    total_duration_ms = Column(Float, default=0.0, nullable=False)
+    max_duration_ms = Column(Float, default=0.0, nullable=False)
+    
+    @declared_attr
+    def __table_args__(cls):
+        return (UniqueConstraint("bucket", "action", "status", name=f"uq_{cls.__tablename__}_key"),)
+
+
+class ActionRollupHourly(RollupMixin, Base):
+    """Hourly action log rollup"""
+    __tablename__ = "action_rollups_hourly"
+
+
+class ActionRollupDaily(RollupMixin, Base):
+    """Daily action log rollup"""
+    __tablename__ = "action_rollups_daily"
+
+
+class TargetStat(Base):
+    """
+    Running duration statistics per action and target, for "slowest targets".
+    """
+    __tablename__ = "target_stats"
+    __table_args__ = (UniqueConstraint("action", "target", name="uq_target_stats_key"),)
+    
+    id = Column(Integer, primary_key=True)
+    action = Column(String(50), nullable=False)
+    target = Column(String(255), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    total_duration_ms = Column(Float, default=0.0, nullable=False)
+    max_duration_ms = Column(Float, default=0.0, nullable=False, index=True)
+    last_seen = Column(DateTime, nullable=False)
+
+
+# Columns added after the first release, created on existing databases by init_db
+ADDED_COLUMNS = {
+    "action_logs": {
+        "target": "VARCHAR(255)",
+        "duration_ms": "FLOAT",
+    },
+    "scan_entries": {
+        "device_key": "VARCHAR(64)",
+    },
+}
+
+ADDED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_action_logs_target ON action_logs (target)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_scan_entries_device ON scan_entries (scan_id, device_key)",
+]
+
+
+def _add_missing_columns(engine):
+    """Add columns (and their indexes) that create_all() won't add to existing tables"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            for name, ddl_type in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}"))
+        for ddl in ADDED_INDEXES:
+            conn.execute(text(ddl))
+
+
+# Full-text index over action logs. External content table, so the text is
+# stored once in action_logs and the triggers keep the index in sync.
+ACTION_LOGS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS action_logs_fts USING fts5(
+        action, parameters, result_summary,
+        content='action_logs', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS action_logs_fts_insert AFTER INSERT ON action_logs BEGIN
+        INSERT INTO action_logs_fts(rowid, action, parameters, result_summary)
+        VALUES (new.id, new.action, new.parameters, new.result_summary);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS action_logs_fts_delete AFTER DELETE ON action_logs BEGIN
+        INSERT INTO action_logs_fts(action_logs_fts, rowid, action, parameters, result_summary)
+        VALUES ('delete', old.id, old.action, old.parameters, old.result_summary);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS action_logs_fts_update AFTER UPDATE ON action_logs BEGIN
+        INSERT INTO action_logs_fts(action_logs_fts, rowid, action, parameters, result_summary)
+        VALUES ('delete', old.id, old.action, old.parameters, old.result_summary);
+        INSERT INTO action_logs_fts(rowid, action, parameters, result_summary)
+        VALUES (new.id, new.action, new.parameters, new.result_summary);
+    END""",
+]
+
+
+def _create_fts_index(engine):
+    """Create the action log full-text index, indexing existing logs the first time"""
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'action_logs_fts'"
+        )).first()
+        for ddl in ACTION_LOGS_FTS_DDL:
+            conn.execute(text(ddl))
+        if not exists:
+            conn.execute(text("INSERT INTO action_logs_fts(action_logs_fts) VALUES ('rebuild')"))
+
+
 # Database setup
 def get_database_url():
-    """Get SQLite database URL"""
+    """Get SQLite database URL (NETBOT_DATABASE_URL overrides it)"""
+    configured = os.environ.get("NETBOT_DATABASE_URL")
+    if configured:
+        return configured
     # Store database in the project root
     db_path = os.path.join(os.path.dirname(__file__), "..", "..", "..", "netbot.db")
     return f"sqlite:///{db_path}"
 
 
+# Seconds a connection waits for another worker's write lock before failing
+SQLITE_BUSY_TIMEOUT = 30
+
+_engine = None
+_SessionLocal = None
+_init_lock = threading.Lock()
+
+
 def init_db():
-    """Initialize the database"""
-    engine = create_engine(get_database_url(), echo=False)
-    Base.metadata.create_all(engine)
-    return engine
+    """
+    Initialize the database.
+    The schema is set up once per process; later calls return the same engine.
+    """
+    global _engine, _SessionLocal
+    if _engine is not None:
+        return _engine
+    
+    with _init_lock:
+        if _engine is None:
+            engine = create_engine(
+                get_database_url(), echo=False, connect_args={"timeout": SQLITE_BUSY_TIMEOUT}
+            )
+            _use_wal_with_workers(engine)
+            # Workers starting together would race to create the same tables
+            with worker_lock("schema"):
+                Base.metadata.create_all(engine)
+                _add_missing_columns(engine)
+                _create_fts_index(engine)
+            _SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+            _engine = engine
+    return _engine
+
+
+def _use_wal_with_workers(engine):
+    """
+    With several workers, use WAL mode so readers in one worker don't block
+    the writer in another (and the other way round).
+    """
+    if not multi_worker_enabled():
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
 
 
 def get_session():
     """Get a database session"""
-    engine = init_db()
-    SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
-    return SessionLocal()
+    init_db()
+    return _SessionLocal()
@@ -2,15 +2,11 @@
 from .chat import (
     ChatRequest,
     ChatResponse,
-    DeviceInfo,
-    PortInfo,
     ActionLogResponse
 )
 
 __all__ = [
     "ChatRequest",
     "ChatResponse",
-    "DeviceInfo",
-    "PortInfo",
     "ActionLogResponse"
 ]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, Any
 from datetime import datetime
 
 
@@ -17,10 +17,10 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     """Response model for chat endpoint"""
-    message: str = Field(..., description="Bot's response message")
+    message: Optional[str] = Field(None, description="Bot's response message (omitted in compact mode)")
     action: str = Field(..., description="Action that was performed")
     status: str = Field(..., description="Status of the action (success/error)")
-    data: Optional[Dict[str, Any]] = Field(None, description="Raw data from the action")
+    data: Optional[Any] = Field(None, description="Raw data from the action")
     
     class Config:
         json_schema_extra = {
@@ -37,21 +37,6 @@ class ChatResponse(BaseModel):
         }
 
 
-class DeviceInfo(BaseModel):
-    """Model for network device information"""
-    ip: str
-    mac: Optional[str] = None
-    hostname: Optional[str] = None
-    status: str
-
-
-class PortInfo(BaseModel):
-    """Model for port scan information"""
-    port: int
-    open: bool
-    service: Optional[str] = None
-
-
 class ActionLogResponse(BaseModel):
     """Response model for action log"""
     id: int
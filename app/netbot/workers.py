@@ -0,0 +1,92 @@
+"""
+Process-level helpers for running several workers (uvicorn --workers N).
+
+Kept apart from netbot.core.multiworker, which builds the shared cache, log
+spool and leader election on top of these, so the database layer can take a
+worker lock without depending on the service code.
+"""
+from contextlib import contextmanager
+import os
+import tempfile
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+MULTI_WORKER_ENV = "NETBOT_MULTI_WORKER"
+SHARED_DIR_ENV = "NETBOT_SHARED_DIR"
+
+
+def multi_worker_enabled() -> bool:
+    """Whether NETBOT_MULTI_WORKER is set"""
+    return os.environ.get(MULTI_WORKER_ENV, "").lower() in ("1", "true", "yes", "on")
+
+
+def get_shared_dir() -> str:
+    """Directory shared by the workers for the cache, spool and lock files"""
+    path = os.environ.get(SHARED_DIR_ENV) or os.path.join(tempfile.gettempdir(), "netbot")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class FileLock:
+    """
+    Non-blocking exclusive lock on a file (fcntl on POSIX, msvcrt on Windows).
+    The OS drops the lock when the holding process exits, even if it crashes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self, blocking: bool = False) -> bool:
+        """Take the lock, waiting for it if blocking; returns whether we hold it"""
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                lock_file.seek(0)
+                # LK_LOCK retries for about 10 seconds before giving up
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        """Give the lock up"""
+        if self._file is None:
+            return
+        try:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+@contextmanager
+def worker_lock(name: str):
+    """Run a block in one worker at a time (does nothing with a single worker)"""
+    if not multi_worker_enabled():
+        yield
+        return
+    lock = FileLock(os.path.join(get_shared_dir(), f"{name}.lock"))
+    lock.acquire(blocking=True)
+    try:
+        yield
+    finally:
+        lock.release()
@@ -13,6 +13,12 @@ const themeToggle = document.getElementById("themeToggle");
 const quickActionBtns = document.querySelectorAll(".quick-action-btn");
 const headerLogo = document.getElementById("headerLogo");
 
+// Persistent chat channel; messages fall back to POST /v1/chat while it's down
+let chatSocket = null;
+let nextRequestId = 1;
+const pendingRequests = new Map(); // request id -> typing indicator id
+let nextTypingId = 1;
+
 // Theme management
 function initTheme() {
   const savedTheme = localStorage.getItem("netbot-theme") || "light";
@@ -62,8 +68,102 @@ document.addEventListener("DOMContentLoaded", () => {
 
   // Check connection
   checkConnection();
+  connectChatSocket();
 });
 
+// Open the chat WebSocket, reconnecting when it drops
+function connectChatSocket() {
+  const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+  const socket = new WebSocket(`${protocol}://${window.location.host}${API_BASE_URL}/chat/ws`);
+
+  socket.addEventListener("open", () => {
+    chatSocket = socket;
+  });
+  socket.addEventListener("message", (event) => {
+    handleSocketFrame(JSON.parse(event.data));
+  });
+  socket.addEventListener("close", () => {
+    chatSocket = null;
+    // Requests in flight on this socket will never be answered
+    pendingRequests.forEach((typingId, id) => {
+      handleSocketFrame({ type: "error", id, detail: "Connection lost" });
+    });
+    setTimeout(connectChatSocket, 3000);
+  });
+}
+
+// Handle a progress, result or error frame from the chat WebSocket
+function handleSocketFrame(frame) {
+  const typingId = pendingRequests.get(frame.id);
+  if (typingId === undefined) return;
+
+  if (frame.type === "progress") {
+    showProgress(typingId, frame);
+    return;
+  }
+
+  pendingRequests.delete(frame.id);
+  removeTypingIndicator(typingId);
+
+  if (frame.type === "result") {
+    addBotMessage(frame.message, frame.status, frame.data);
+  } else {
+    addMessage(`⚠️ Sorry, I encountered an error: ${frame.detail}`, "bot", "error");
+  }
+
+  if (pendingRequests.size === 0) {
+    updateStatus("Ready", "ready");
+    document.querySelector(".status-indicator").classList.remove("loading");
+  }
+}
+
+// Render partial results of a running action under its typing indicator
+function showProgress(typingId, frame) {
+  const indicator = document.getElementById(typingId);
+  if (!indicator) return;
+
+  let progressDiv = indicator.querySelector(".message-progress");
+  if (!progressDiv) {
+    progressDiv = document.createElement("div");
+    progressDiv.className = "message-progress";
+    progressDiv.style.fontSize = "12px";
+    progressDiv.style.color = "var(--text-secondary)";
+    progressDiv.style.marginTop = "8px";
+    indicator.querySelector(".message-text").appendChild(progressDiv);
+  }
+
+  const lines = [];
+  if (frame.action === "check_ports") {
+    lines.push(`Checked ${frame.done}/${frame.total} ports`);
+    frame.items.forEach((port) => {
+      lines.push(`${port.open ? "✅" : "❌"} Port ${port.port} (${port.service})`);
+    });
+  } else if (frame.action === "scan_network") {
+    lines.push(`Found ${frame.done} device(s) so far`);
+  } else if (frame.action === "traceroute") {
+    lines.push(`Resolved ${frame.done} hop(s)`);
+    frame.items.forEach((hop) => {
+      lines.push(`${hop.hop}. ${hop.ip} (${hop.rtt})`);
+    });
+  }
+
+  // First line is the running count, the rest accumulate
+  const [summary, ...items] = lines;
+  let summaryDiv = progressDiv.querySelector(".progress-summary");
+  if (!summaryDiv) {
+    summaryDiv = document.createElement("div");
+    summaryDiv.className = "progress-summary";
+    progressDiv.appendChild(summaryDiv);
+  }
+  summaryDiv.textContent = summary || "";
+  items.forEach((text) => {
+    const line = document.createElement("div");
+    line.textContent = text;
+    progressDiv.appendChild(line);
+  });
+  scrollToBottom();
+}
+
 // Check API connection
 async function checkConnection() {
   try {
@@ -93,6 +193,18 @@ async function handleSubmit(e) {
   // Clear input
   messageInput.value = "";
 
+  // Over the WebSocket several messages can be outstanding at once,
+  // so the input stays enabled and the answer arrives in handleSocketFrame
+  if (chatSocket && chatSocket.readyState === WebSocket.OPEN) {
+    const id = nextRequestId++;
+    pendingRequests.set(id, addTypingIndicator());
+    chatSocket.send(JSON.stringify({ id, message }));
+    updateStatus("Processing...", "loading");
+    document.querySelector(".status-indicator").classList.add("loading");
+    messageInput.focus();
+    return;
+  }
+
   // Disable input while processing
   setLoading(true);
 
@@ -291,28 +403,45 @@ function formatData(data) {
     table.appendChild(thead);
 
     const tbody = document.createElement("tbody");
-    data.devices.slice(0, 10).forEach((device) => {
-      const row = document.createElement("tr");
-      row.innerHTML = `
-                <td><code>${device.ip || "N/A"}</code></td>
-                <td><code>${device.mac || "N/A"}</code></td>
-                <td><span class="status-badge ${device.status || "online"}">${
-        device.status || "online"
-      }</span></td>
-            `;
-      tbody.appendChild(row);
-    });
+    appendDeviceRows(tbody, data.devices);
     table.appendChild(tbody);
 
     container.appendChild(table);
 
-    if (data.devices.length > 10) {
-      const note = document.createElement("p");
-      note.style.fontSize = "12px";
-      note.style.color = "var(--text-secondary)";
-      note.style.marginTop = "8px";
-      note.textContent = `... and ${data.devices.length - 10} more devices`;
-      container.appendChild(note);
+    // Large scans only send their first page, the rest is fetched on demand
+    if (data.scan_id && data.next_cursor !== null && data.next_cursor !== undefined) {
+      const total = data.total || data.devices.length;
+      const moreBtn = document.createElement("button");
+      moreBtn.className = "quick-action-btn";
+      moreBtn.style.marginTop = "8px";
+      let cursor = data.next_cursor;
+      let shown = data.devices.length;
+      moreBtn.textContent = `Load more (${total - shown} remaining)`;
+      moreBtn.addEventListener("click", async () => {
+        moreBtn.disabled = true;
+        try {
+          const response = await fetch(
+            `${API_BASE_URL}/scan/${data.scan_id}?cursor=${cursor}&limit=100`
+          );
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+          }
+          const page = await response.json();
+          appendDeviceRows(tbody, page.devices);
+          shown += page.devices.length;
+          cursor = page.next_cursor;
+          if (cursor === null || cursor === undefined) {
+            moreBtn.remove();
+          } else {
+            moreBtn.textContent = `Load more (${total - shown} remaining)`;
+            moreBtn.disabled = false;
+          }
+        } catch (error) {
+          console.error("Error:", error);
+          moreBtn.disabled = false;
+        }
+      });
+      container.appendChild(moreBtn);
     }
   }
   // If data has ports array
@@ -350,11 +479,26 @@ function formatData(data) {
   return container.children.length > 0 ? container : null;
 }
 
+// Add one table row per device
+function appendDeviceRows(tbody, devices) {
+  devices.forEach((device) => {
+    const row = document.createElement("tr");
+    row.innerHTML = `
+                <td><code>${device.ip || "N/A"}</code></td>
+                <td><code>${device.mac || "N/A"}</code></td>
+                <td><span class="status-badge ${device.status || "online"}">${
+      device.status || "online"
+    }</span></td>
+            `;
+    tbody.appendChild(row);
+  });
+}
+
 // Add typing indicator
 function addTypingIndicator() {
   const typingDiv = document.createElement("div");
   typingDiv.className = "message bot-message";
-  typingDiv.id = "typing-indicator";
+  typingDiv.id = `typing-indicator-${nextTypingId++}`;
 
   const avatar = document.createElement("div");
   avatar.className = "message-avatar";
@@ -385,7 +529,7 @@ function addTypingIndicator() {
   chatMessages.appendChild(typingDiv);
   scrollToBottom();
 
-  return "typing-indicator";
+  return typingDiv.id;
 }
 
 // Remove typing indicator
@@ -0,0 +1,116 @@
+"""
+Action log sink benchmark: what logging adds to each request.
+
+Writes the entry a single-action chat request logs, one request at a time,
+to each sink (NETBOT_LOG_SINK), then a bulk-sized batch, then reads the
+newest entries back. Everything goes to a temporary directory.
+
+Run from the repository root:
+    python bench_log_sinks.py [--requests 2000] [--batch 100]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="netbot-bench-")
+os.environ["NETBOT_DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'netbot.db')}"
+os.environ["NETBOT_SHARED_DIR"] = os.path.join(WORK_DIR, "shared")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from netbot.core.action_log import JsonlSink, NullSink, SQLiteSink
+from netbot.core.multiworker import MULTI_WORKER_ENV, get_log_spool
+from netbot.db import init_db
+
+
+def make_entry(i):
+    """The entry POST /v1/chat logs for one ping"""
+    host = f"10.0.{i >> 8 & 255}.{i & 255}"
+    return {
+        "action": "ping",
+        "parameters": {"host": host},
+        "result_summary": f"✅ **{host}** is online! Average latency: 1.23 ms",
+        "status": "success",
+        "duration_ms": 12.5
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run_case(name, sink, multi_worker, args):
+    """Print per-request, per-batch and readback timings of one sink"""
+    if multi_worker:
+        os.environ[MULTI_WORKER_ENV] = "1"
+    else:
+        os.environ.pop(MULTI_WORKER_ENV, None)
+
+    times = []
+    for i in range(args.requests):
+        entries = [make_entry(i)]
+        started = time.perf_counter()
+        sink.write(entries)
+        times.append((time.perf_counter() - started) * 1_000_000)
+
+    batch = [make_entry(i) for i in range(args.batch)]
+    started = time.perf_counter()
+    sink.write(batch)
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    if multi_worker:
+        # What the leader does a second later, off the request path
+        os.environ.pop(MULTI_WORKER_ENV)
+        get_log_spool().rotate_if_due(force=True)
+        get_log_spool().drain(sink.write)
+
+    started = time.perf_counter()
+    count = len(sink.recent(50))
+    read_ms = (time.perf_counter() - started) * 1000
+
+    print(
+        f"{name:<24}{statistics.median(times):>10.1f}{percentile(times, 0.99):>10.1f}"
+        f"{batch_ms:>12.2f}{read_ms:>12.2f}{count:>6}"
+    )
+
+
+def directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    init_db()
+    jsonl_dir = os.path.join(WORK_DIR, "jsonl")
+    gzip_dir = os.path.join(WORK_DIR, "jsonl-gzip")
+    cases = [
+        ("null", NullSink(), False),
+        ("jsonl", JsonlSink(jsonl_dir), False),
+        # Small segments so rotation and compression happen during the run
+        ("jsonl, 64 KiB gzip", JsonlSink(gzip_dir, segment_bytes=64 * 1024, compress=True), False),
+        ("sqlite", SQLiteSink(), False),
+        ("sqlite, multi-worker", SQLiteSink(), True),
+    ]
+
+    print(f"Action log sinks: {args.requests} requests, then a batch of {args.batch}\n" + "=" * 74)
+    print(f"{'sink':<24}{'median us':>10}{'p99 us':>10}{'batch ms':>12}{'read ms':>12}{'read':>6}")
+    for name, sink, multi_worker in cases:
+        run_case(name, sink, multi_worker, args)
+
+    time.sleep(0.5)  # Let the last compression finish
+    print(f"\nOn disk: jsonl {directory_size(jsonl_dir) / 1024:.0f} KiB, "
+          f"jsonl gzip {directory_size(gzip_dir) / 1024:.0f} KiB")
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Serialisation benchmark: a /v1/chat scan response with thousands of devices.
+
+Compares the old path (dict results validated by the pydantic ChatResponse and
+dumped with json) with the new one (slotted result records dumped by orjson).
+
+Run from the repository root:
+    python bench_serialization.py [--devices 5000] [--runs 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+import orjson
+
+from netbot.core.chatbot import ChatBot
+from netbot.core.results import Device, ScanResult
+from netbot.schemas import ChatResponse
+
+
+def make_scan(count):
+    """A scan result with count devices, as records"""
+    devices = [
+        Device(
+            ip=f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+            mac=f"aa-bb-cc-{i >> 16 & 255:02x}-{i >> 8 & 255:02x}-{i & 255:02x}",
+            hostname=f"host-{i}.lan"
+        )
+        for i in range(count)
+    ]
+    return ScanResult(status="success", devices=devices, network="10.0.0.1", incremental=True)
+
+
+def as_dict(scan):
+    """The same scan result in the old plain dict form"""
+    return {
+        "status": scan.status,
+        "devices": [
+            {"ip": d.ip, "mac": d.mac, "hostname": d.hostname, "status": d.status}
+            for d in scan.devices
+        ],
+        "network": scan.network,
+        "joined": [],
+        "left": [],
+        "changed": [],
+        "incremental": scan.incremental
+    }
+
+
+def old_path(message, data):
+    """pydantic validation plus json.dumps, like FastAPI's default response"""
+    response = ChatResponse(message=message, action="scan_network", status="success", data=data)
+    return json.dumps(response.model_dump(), ensure_ascii=False).encode("utf-8")
+
+
+def new_path(message, scan):
+    """orjson straight from the records"""
+    return orjson.dumps({"message": message, "action": "scan_network", "status": "success", "data": scan})
+
+
+def compact_path(scan):
+    """orjson without the formatted message"""
+    return orjson.dumps({"action": "scan_network", "status": "success", "data": scan})
+
+
+def measure(func, runs):
+    """Median milliseconds, peak allocated KiB and output size of func()"""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        body = func()
+        times.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak / 1024, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    chatbot = ChatBot()
+    scan = make_scan(args.devices)
+    data = as_dict(scan)
+
+    print(f"Serialisation benchmark: scan response with {args.devices} devices\n" + "=" * 60)
+
+    format_ms, _, _ = measure(lambda: chatbot.format_response("scan_network", scan), args.runs)
+    message = chatbot.format_response("scan_network", scan)
+    print(f"Formatting the message (skipped in compact mode): {format_ms:.2f} ms\n")
+
+    cases = [
+        ("dict + pydantic + json", lambda: old_path(message, data)),
+        ("records + orjson", lambda: new_path(message, scan)),
+        ("records + orjson, compact", lambda: compact_path(scan)),
+    ]
+    print(f"{'path':<28}{'median ms':>12}{'peak KiB':>12}{'bytes':>12}")
+    for name, func in cases:
+        ms, peak, size = measure(func, args.runs)
+        print(f"{name:<28}{ms:>12.2f}{peak:>12.0f}{size:>12}")
+
+    # Per-device container overhead (the strings are shared by both forms)
+    dict_size = sum(sys.getsizeof(d) for d in data["devices"])
+    record_size = sum(sys.getsizeof(d) for d in scan.devices)
+    print(f"\nDevice containers in memory: dicts {dict_size / 1024:.0f} KiB, records {record_size / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup benchmark: import time of the app and time to the first /health response.
+
+Run from the repository root:
+    python bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+
+
+def measure_import_time():
+    """
+    Import main with -X importtime.
+    Returns (total microseconds, [(cumulative us, module)] slowest first).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if match:
+            modules.append((int(match.group(1)), len(match.group(2)), match.group(3)))
+
+    total = next((us for us, _, name in modules if name == "main"), 0)
+    # Only report top level packages, nested modules are counted in them
+    top_level = sorted(((us, name) for us, depth, name in modules if depth <= 3), reverse=True)
+    return total, top_level
+
+
+def free_port():
+    """Find a free TCP port on loopback"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_health(timeout=30.0):
+    """Start uvicorn and return seconds until /health first answers 200"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=APP_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("Server did not answer /health in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("Startup benchmark\n" + "=" * 50)
+
+    import_totals = []
+    for _ in range(args.runs):
+        total, top_level = measure_import_time()
+        import_totals.append(total)
+    print(f"\nImport time of main (median of {args.runs}): {statistics.median(import_totals) / 1000:.1f} ms")
+    print("Slowest imports (last run):")
+    for us, name in top_level[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    health_times = [measure_first_health() for _ in range(args.runs)]
+    print(f"\nTime to first /health (median of {args.runs}): {statistics.median(health_times) * 1000:.1f} ms")
+    print(f"  min {min(health_times) * 1000:.1f} ms, max {max(health_times) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
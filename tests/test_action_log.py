@@ -0,0 +1,39 @@
+import pytest
+
+from netbot.core.action_log import ActionLogSink, JsonlSink, NullSink, create_sink
+
+
+def entry(host):
+    return {
+        "action": "ping",
+        "parameters": {"host": host},
+        "result_summary": f"{host} is online",
+        "status": "success",
+        "duration_ms": 1.5
+    }
+
+
+def test_incomplete_sink_fails_at_instantiation():
+    class WriteOnlySink(ActionLogSink):
+        def write(self, entries):
+            pass
+
+    with pytest.raises(TypeError, match="recent"):
+        WriteOnlySink()
+
+
+def test_create_sink_by_name(tmp_path, monkeypatch):
+    monkeypatch.setenv("NETBOT_LOG_DIR", str(tmp_path))
+    assert isinstance(create_sink("null"), NullSink)
+    assert isinstance(create_sink("jsonl"), JsonlSink)
+
+
+def test_jsonl_sink_reads_back_newest_first(tmp_path):
+    sink = JsonlSink(str(tmp_path))
+    sink.write([entry("10.0.0.1"), entry("10.0.0.2")])
+    sink.write([entry("10.0.0.3")])
+    sink.close()
+
+    recent = sink.recent(2)
+    assert [log.parameters["host"] for log in recent] == ["10.0.0.3", "10.0.0.2"]
+    assert recent[0].status == "success"
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import orjson
+import pytest
+
+from netbot.api.endpoints import bulk as bulk_endpoint
+from netbot.core import action_log, bulk
+from netbot.core.action_log import NullSink
+from netbot.core.bulk import parse_targets
+from netbot.core.results import StatusResult
+
+
+@pytest.mark.parametrize("body", [
+    b'["10.0.0.1", "10.0.0.2", "10.0.0.1"]',
+    b'{"targets": ["10.0.0.1", {"target": "10.0.0.2"}]}',
+    b'[{"host": " 10.0.0.1 "}, {"target": "10.0.0.2"}]',
+])
+def test_json_targets(body):
+    assert parse_targets(body, "application/json") == ["10.0.0.1", "10.0.0.2"]
+
+
+def test_ndjson_and_csv_targets():
+    ndjson = b'"10.0.0.1"\n{"target": "10.0.0.2"}\n\n'
+    assert parse_targets(ndjson, "application/x-ndjson") == ["10.0.0.1", "10.0.0.2"]
+    csv = b"target\n10.0.0.1,web\n10.0.0.2\n"
+    assert parse_targets(csv, "text/csv; charset=utf-8") == ["10.0.0.1", "10.0.0.2"]
+
+
+def test_empty_body_and_blank_targets():
+    assert parse_targets(b"", "application/json") == []
+    assert parse_targets(b'["", "  ", {"target": null}]', "application/json") == []
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b"5", "application/json"),
+    (b'"10.0.0.1"', "application/json"),
+    (b'{"targets": "abc"}', "application/json"),
+    (b'{"targets": null}', "application/json"),
+    (b'[null]', "application/json"),
+    (b'["10.0.0.1", 42]', "application/json"),
+    (b'[["10.0.0.1"]]', "application/json"),
+    (b'{"target": 5}\n', "application/x-ndjson"),
+    (b"not json", "application/json"),
+])
+def test_invalid_bodies_raise_value_error(body, content_type):
+    with pytest.raises(ValueError):
+        parse_targets(body, content_type)
+
+
+class RecordingSink(NullSink):
+    """Keeps each write as one batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def write(self, entries):
+        self.batches.append([entry["parameters"]["host"] for entry in entries])
+
+
+class JsonRequest:
+    """The parts of a Request the bulk endpoint reads"""
+
+    def __init__(self, body):
+        self._body = body
+        self.headers = {"content-type": "application/json"}
+
+    async def body(self):
+        return self._body
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Replace the probes with sleeps; delays maps target -> seconds"""
+    delays = {}
+    calls = []
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def fake_run_action(action, target, ports, detect=False):
+        with lock:
+            calls.append(target)
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        time.sleep(delays.get(target, 0.05))
+        with lock:
+            in_flight["now"] -= 1
+        return StatusResult(status="success")
+
+    monkeypatch.setattr(bulk, "_run_action", fake_run_action)
+    # The semaphore binds to the loop that first uses it, so give each test its own
+    monkeypatch.setattr(bulk, "_global_limit", None)
+    return delays, calls, in_flight
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = RecordingSink()
+    monkeypatch.setattr(action_log, "_sink", sink)
+    return sink
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_yields_in_completion_order(probes):
+    delays, _, _ = probes
+    delays.update({"slow": 0.3, "medium": 0.15, "fast": 0.0})
+    results = await collect(bulk.run_bulk("ping", ["slow", "medium", "fast"]))
+    assert [result["target"] for result in results] == ["fast", "medium", "slow"]
+    assert all(result["status"] == "success" and result["action"] == "ping" for result in results)
+    assert results[-1]["duration_ms"] >= 300
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_respects_the_global_limit(probes, monkeypatch):
+    _, calls, in_flight = probes
+    monkeypatch.setattr(bulk, "_global_limit", asyncio.Semaphore(3))
+    results = await collect(bulk.run_bulk("ping", [f"10.0.0.{i}" for i in range(10)]))
+    assert len(results) == 10
+    assert len(calls) == 10
+    assert in_flight["max"] == 3
+
+
+@pytest.mark.asyncio
+async def test_endpoint_probes_duplicates_once_and_logs_in_batches(probes, sink, monkeypatch):
+    delays, calls, _ = probes
+    delays.update({"a": 0.0, "b": 0.05, "c": 0.1, "d": 0.15, "e": 0.2})
+    monkeypatch.setattr(bulk_endpoint, "LOG_BATCH_SIZE", 2)
+    body = orjson.dumps(["a", "b", "a", "c", "d", {"target": "b"}, "e"])
+
+    response = await bulk_endpoint.bulk(JsonRequest(body), "ping", None, None, False)
+    lines = [orjson.loads(line) async for line in response.body_iterator]
+
+    assert [line["target"] for line in lines] == ["a", "b", "c", "d", "e"]
+    assert sorted(calls) == ["a", "b", "c", "d", "e"]
+    # Full batches as they fill up, the remainder at the end
+    assert sink.batches == [["a", "b"], ["c", "d"], ["e"]]
+
+
+@pytest.mark.asyncio
+async def test_endpoint_flushes_logs_when_the_client_disconnects(probes, sink):
+    delays, _, _ = probes
+    delays.update({"fast": 0.0, "slow": 1.0})
+    body = orjson.dumps(["fast", "slow"])
+
+    response = await bulk_endpoint.bulk(JsonRequest(body), "ping", None, None, False)
+    stream = response.body_iterator
+    first = orjson.loads(await stream.__anext__())
+    # What Starlette does when the client goes away mid-stream
+    await stream.aclose()
+
+    assert first["target"] == "fast"
+    assert sink.batches == [["fast"]]
@@ -0,0 +1,123 @@
+import socket
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from netbot.api.endpoints import chat
+from netbot.core import action_log
+
+
+class RecordingSink(action_log.NullSink):
+    """Keeps what was written"""
+
+    def __init__(self):
+        self.entries = []
+
+    def write(self, entries):
+        self.entries.extend(entries)
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = RecordingSink()
+    monkeypatch.setattr(action_log, "_sink", sink)
+    return sink
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(chat.router)
+    return TestClient(app)
+
+
+def test_post_chat_logs_the_action(client, sink):
+    response = client.post("/chat", json={"message": "help"})
+    assert response.status_code == 200
+    assert response.json()["action"] == "help"
+    assert [entry["action"] for entry in sink.entries] == ["help"]
+
+
+@pytest.mark.parametrize("request_id", [[1], {"a": 1}, 1.5, True])
+def test_websocket_rejects_unusable_ids(client, sink, request_id):
+    with client.websocket_connect("/chat/ws") as websocket:
+        websocket.send_text(orjson.dumps({"id": request_id, "message": "help"}).decode())
+        frame = orjson.loads(websocket.receive_text())
+        assert frame["type"] == "error"
+        assert frame["id"] == request_id
+        assert "string or an integer" in frame["detail"]
+
+        # The connection is still usable
+        websocket.send_text(orjson.dumps({"id": 7, "message": "help"}).decode())
+        frame = orjson.loads(websocket.receive_text())
+        assert frame["type"] == "result"
+        assert frame["id"] == 7
+
+
+@pytest.fixture
+def ports(monkeypatch):
+    """An open and a closed port on loopback"""
+    from netbot.core import dispatcher
+    # Port checks update the inventory; keep the test off the real database
+    monkeypatch.setattr(dispatcher, "record_open_ports", lambda host, ports: None)
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    yield listener.getsockname()[1], closed.getsockname()[1]
+    listener.close()
+    closed.close()
+
+
+def receive_until_result(websocket):
+    """Frames up to and including the first result frame"""
+    frames = []
+    while not frames or frames[-1]["type"] != "result":
+        frames.append(orjson.loads(websocket.receive_text()))
+    return frames
+
+
+def test_websocket_streams_port_progress_then_the_result(client, sink, ports):
+    open_port, closed_port = ports
+    with client.websocket_connect("/chat/ws") as websocket:
+        websocket.send_text(orjson.dumps({
+            "id": "scan-1",
+            "message": f"check ports 127.0.0.1 {open_port},{closed_port}"
+        }).decode())
+        frames = receive_until_result(websocket)
+
+    progress, result = frames[:-1], frames[-1]
+    assert [(f["done"], f["total"]) for f in progress] == [(1, 2), (2, 2)]
+    assert all(f["id"] == "scan-1" and f["index"] == 0 and f["action"] == "check_ports" for f in progress)
+    assert [(f["items"][0]["port"], f["items"][0]["open"]) for f in progress] == [
+        (open_port, True), (closed_port, False)
+    ]
+
+    assert result["id"] == "scan-1"
+    assert result["action"] == "check_ports"
+    assert result["status"] == "success"
+    assert [(p["port"], p["open"]) for p in result["data"]["ports"]] == [(open_port, True), (closed_port, False)]
+    assert [entry["action"] for entry in sink.entries] == ["check_ports"]
+
+
+def test_websocket_progress_of_a_multi_action_message(client, sink, ports):
+    open_port, closed_port = ports
+    with client.websocket_connect("/chat/ws") as websocket:
+        websocket.send_text(orjson.dumps({
+            "id": 3,
+            "message": f"check ports 127.0.0.1 {open_port} and then check ports 127.0.0.1 {closed_port}",
+            "compact": True
+        }).decode())
+        frames = receive_until_result(websocket)
+
+    progress, result = frames[:-1], frames[-1]
+    # One progress frame per action, told apart by index
+    assert sorted((f["index"], f["items"][0]["port"]) for f in progress) == [(0, open_port), (1, closed_port)]
+    assert all(f["id"] == 3 for f in frames)
+    assert result["action"] == "multi"
+    assert "message" not in result
+    assert [a["result"]["ports"][0]["open"] for a in result["data"]["actions"]] == [True, False]
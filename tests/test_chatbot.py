@@ -0,0 +1,73 @@
+import pytest
+
+from netbot.core.chatbot import ChatBot
+
+
+@pytest.fixture
+def chatbot():
+    return ChatBot()
+
+
+def actions(intents):
+    return [(intent.action, intent.parameters) for intent in intents]
+
+
+@pytest.mark.parametrize("message", [
+    "scan ports 10.0.0.1 22,80",
+    "scan ports 10.0.0.1 22, 80",
+    "check ports on 10.0.0.1 22 , 80",
+])
+def test_port_list_with_or_without_spaces(chatbot, message):
+    assert actions(chatbot.parse_intents(message)) == [
+        ("check_ports", {"host": "10.0.0.1", "ports": [22, 80]}),
+    ]
+
+
+def test_port_list_followed_by_another_request(chatbot):
+    assert actions(chatbot.parse_intents("check ports on 10.0.0.1 22, 80, 443 and ping 10.0.0.2")) == [
+        ("check_ports", {"host": "10.0.0.1", "ports": [22, 80, 443]}),
+        ("ping", {"host": "10.0.0.2"}),
+    ]
+
+
+def test_host_after_port_list_is_another_host(chatbot):
+    assert actions(chatbot.parse_intents("check ports on 10.0.0.1 22, 80, 10.0.0.2")) == [
+        ("check_ports", {"host": "10.0.0.1", "ports": [22, 80]}),
+        ("check_ports", {"host": "10.0.0.2", "ports": [22, 80]}),
+    ]
+
+
+def test_numbers_after_other_requests_are_not_ports(chatbot):
+    assert actions(chatbot.parse_intents("ping 10.0.0.1, 10.0.0.2 and lookup example.com")) == [
+        ("ping", {"host": "10.0.0.1"}),
+        ("ping", {"host": "10.0.0.2"}),
+        ("dns_lookup", {"host": "example.com"}),
+    ]
+
+
+def test_separators_split_requests(chatbot):
+    assert [i.action for i in chatbot.parse_intents("what is my ip; show gateway then scan network")] == [
+        "get_local_ip", "get_gateway", "scan_network",
+    ]
+
+
+def test_unknown_message(chatbot):
+    assert actions(chatbot.parse_intents("make me a sandwich")) == [
+        ("unknown", {"original_message": "make me a sandwich"}),
+    ]
+
+
+@pytest.mark.parametrize("message, query", [
+    ("search logs for errors and timeouts", "errors and timeouts"),
+    ("search logs for 10.0.0.1, 10.0.0.2", "10.0.0.1, 10.0.0.2"),
+    ("search logs for timeout then retry", "timeout then retry"),
+])
+def test_search_text_runs_to_the_end(chatbot, message, query):
+    assert actions(chatbot.parse_intents(message)) == [("search_logs", {"query": query})]
+
+
+def test_search_after_another_request(chatbot):
+    assert actions(chatbot.parse_intents("ping 10.0.0.1 and search error logs for 10.0.0.1, 10.0.0.2")) == [
+        ("ping", {"host": "10.0.0.1"}),
+        ("search_logs", {"query": "10.0.0.1, 10.0.0.2", "status": "error"}),
+    ]
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from netbot.core import dispatcher
+from netbot.core.chatbot import ChatBot, Intent
+from netbot.core.dispatcher import ActionOutcome, execute_intents, merge_results
+from netbot.core.results import PingResult, StatusResult
+
+# Seconds each fake ping takes, by host
+DELAYS = {"slow.test": 0.6, "fast.test": 0.4}
+
+
+def fake_ping(host):
+    time.sleep(DELAYS[host])
+    return PingResult(host=host, status="online", avg_latency_ms="1.00")
+
+
+def ping(host):
+    return Intent(action="ping", parameters={"host": host}, confidence=1.0)
+
+
+@pytest.mark.asyncio
+async def test_intents_run_concurrently(monkeypatch):
+    monkeypatch.setattr(dispatcher, "ping_host", fake_ping)
+    intents = [ping("slow.test"), ping("fast.test")]
+
+    started = time.perf_counter()
+    outcomes = await execute_intents(ChatBot(), intents)
+    elapsed = time.perf_counter() - started
+
+    # Close to the slowest action (0.6 s), well short of the sum (1.0 s)
+    assert 0.6 <= elapsed < 0.9
+    # Same order as the intents, whatever finished first
+    assert [outcome.result.host for outcome in outcomes] == ["slow.test", "fast.test"]
+    assert all(outcome.status == "online" for outcome in outcomes)
+    assert outcomes[0].duration_ms >= 600 > outcomes[1].duration_ms >= 400
+
+    merged = merge_results(intents, outcomes)
+    assert merged.duration_ms == outcomes[0].duration_ms
+    assert "slow.test" in merged.message and "fast.test" in merged.message
+
+
+def outcome(status, message="done"):
+    return ActionOutcome(result=StatusResult(status=status), message=message, status=status, duration_ms=1.0)
+
+
+@pytest.mark.parametrize("statuses, merged", [
+    (["online", "success"], "success"),
+    (["online", "error"], "partial"),
+    (["unknown", "success"], "partial"),
+    (["error", "unknown"], "error"),
+])
+def test_merged_status(statuses, merged):
+    intents = [ping(f"{i}.test") for i in range(len(statuses))]
+    result = merge_results(intents, [outcome(status) for status in statuses])
+    assert result.status == merged
+    assert result.result.status == merged
+    assert [entry.parameters["host"] for entry in result.result.actions] == ["0.test", "1.test"]
+
+
+def test_merged_message_is_skipped_in_compact_mode():
+    intents = [ping("a.test"), ping("b.test")]
+    assert merge_results(intents, [outcome("online"), outcome("online")]).message == "done\n\ndone"
+    assert merge_results(intents, [outcome("online", None), outcome("online", None)]).message is None
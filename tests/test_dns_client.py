@@ -0,0 +1,265 @@
+import asyncio
+import socket
+import struct
+import time
+from collections import Counter
+
+import pytest
+import pytest_asyncio
+
+from netbot.core import networking
+from netbot.core.dns_client import (
+    RCODE_NXDOMAIN, RECORD_TYPES, DNSClient, DNSError, decode_name, encode_name
+)
+from netbot.core.rtt import RESOLVER_KEY, RTTEstimator
+
+
+def txt(text):
+    return bytes([len(text)]) + text.encode()
+
+
+def soa(minimum):
+    return encode_name("ns.test") + encode_name("admin.test") + struct.pack("!IIIII", 1, 3600, 600, 86400, minimum)
+
+
+# (name, type) -> [(type, ttl, rdata)]
+ZONE = {
+    ("host.test", "A"): [("A", 300, bytes([10, 0, 0, 1]))],
+    ("mail.test", "MX"): [("MX", 300, struct.pack("!H", 10) + encode_name("mx1.mail.test"))],
+    ("mail.test", "TXT"): [("TXT", 300, txt("v=spf1 ") + txt("-all"))],
+    ("1.0.0.10.in-addr.arpa", "PTR"): [("PTR", 300, encode_name("host.test"))],
+    # More than fits in a UDP answer, so the stub truncates it
+    ("big.test", "A"): [("A", 300, bytes([10, 0, 1, i])) for i in range(1, 41)],
+}
+SOA_TTL = 300
+SOA_MINIMUM = 30
+
+
+class StubDNSServer:
+    """Answers queries for ZONE over UDP and TCP on loopback, counting them"""
+
+    def __init__(self):
+        self.queries = Counter()  # (transport, name, type)
+
+    def answer(self, request, transport):
+        query_id = struct.unpack("!H", request[:2])[0]
+        name, offset = decode_name(request, 12)
+        qtype = struct.unpack("!H", request[offset:offset + 2])[0]
+        type_name = next(t for t, code in RECORD_TYPES.items() if code == qtype)
+        self.queries[(transport, name, type_name)] += 1
+        question = request[12:offset + 4]
+
+        records = ZONE.get((name, type_name), [])
+        known = any(zone_name == name for zone_name, _ in ZONE)
+        truncated = transport == "udp" and len(records) > 10
+        if truncated:
+            records = []
+        flags = 0x8180 | (0x0200 if truncated else 0) | (0 if known else RCODE_NXDOMAIN)
+
+        answers = b"".join(
+            encode_name(name) + struct.pack("!HHIH", RECORD_TYPES[rtype], 1, ttl, len(rdata)) + rdata
+            for rtype, ttl, rdata in records
+        )
+        authority = b""
+        if not known:
+            rdata = soa(SOA_MINIMUM)
+            authority = encode_name("test") + struct.pack("!HHIH", RECORD_TYPES["SOA"], 1, SOA_TTL, len(rdata)) + rdata
+        header = struct.pack("!HHHHHH", query_id, flags, 1, len(records), 1 if authority else 0, 0)
+        return header + question + answers + authority
+
+
+class _UDPServer(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(self.server.answer(data, "udp"), addr)
+
+
+@pytest_asyncio.fixture
+async def stub():
+    """A stub DNS server and a client pointed at it"""
+    server = StubDNSServer()
+
+    async def handle_tcp(reader, writer):
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+        response = server.answer(await reader.readexactly(length), "tcp")
+        writer.write(struct.pack("!H", len(response)) + response)
+        await writer.drain()
+        writer.close()
+
+    loop = asyncio.get_running_loop()
+    tcp = await asyncio.start_server(handle_tcp, "127.0.0.1", 0)
+    port = tcp.sockets[0].getsockname()[1]
+    udp, _ = await loop.create_datagram_endpoint(lambda: _UDPServer(server), local_addr=("127.0.0.1", port))
+
+    yield server, DNSClient(server=("127.0.0.1", port), timeout=1.0, retries=0)
+
+    udp.close()
+    tcp.close()
+    await tcp.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_a_record_over_udp_is_cached(stub):
+    server, client = stub
+    answer = await client.query("host.test", "A")
+    assert answer.values == ["10.0.0.1"]
+    assert answer.ttl == 300
+
+    again = await client.query("host.test", "A")
+    assert again.from_cache
+    assert again.values == ["10.0.0.1"]
+    assert server.queries == Counter({("udp", "host.test", "A"): 1})
+
+
+@pytest.mark.asyncio
+async def test_truncated_answer_is_retried_over_tcp(stub):
+    server, client = stub
+    answer = await client.query("big.test", "A")
+    assert len(answer.values) == 40
+    assert answer.values[0] == "10.0.1.1"
+    assert server.queries[("udp", "big.test", "A")] == 1
+    assert server.queries[("tcp", "big.test", "A")] == 1
+
+
+@pytest.mark.asyncio
+async def test_mx_and_txt_records(stub):
+    _, client = stub
+    mx, txt_answer = await asyncio.gather(client.query("mail.test", "MX"), client.query("mail.test", "TXT"))
+    assert mx.values == ["10 mx1.mail.test"]
+    # Character strings of one record are joined
+    assert txt_answer.values == ["v=spf1 -all"]
+
+
+@pytest.mark.asyncio
+async def test_nxdomain_is_cached_for_soa_minimum(stub):
+    server, client = stub
+    answer = await client.query("missing.test", "A")
+    assert answer.rcode == RCODE_NXDOMAIN
+    assert answer.records == []
+    assert answer.ttl == SOA_MINIMUM
+
+    again = await client.query("missing.test", "A")
+    assert again.from_cache
+    assert again.rcode == RCODE_NXDOMAIN
+    assert server.queries[("udp", "missing.test", "A")] == 1
+
+    # Bypassing the cache asks the server again
+    await client.query("missing.test", "A", use_cache=False)
+    assert server.queries[("udp", "missing.test", "A")] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_request(stub):
+    server, client = stub
+    answers = await asyncio.gather(*(client.query("host.test", "A") for _ in range(5)))
+    assert all(answer.values == ["10.0.0.1"] for answer in answers)
+    assert server.queries[("udp", "host.test", "A")] == 1
+
+
+def system_resolver(names):
+    """A gethostbyaddr that knows only names (IP -> hostname)"""
+    def gethostbyaddr(ip):
+        if ip not in names:
+            raise socket.herror(1, "Unknown host")
+        return names[ip], [], [ip]
+    return gethostbyaddr
+
+
+@pytest.mark.asyncio
+async def test_scan_reverse_lookups_use_the_dns_client(stub, monkeypatch):
+    server, client = stub
+    estimator = RTTEstimator()
+    monkeypatch.setattr(networking, "dns_client", client)
+    monkeypatch.setattr(networking, "rtt_estimator", estimator)
+    # Names only the system resolver knows (hosts file, NetBIOS/LLMNR)
+    monkeypatch.setattr(networking.socket, "gethostbyaddr", system_resolver({
+        "10.0.0.1": "not-asked.lan",
+        "10.0.0.2": "printer.lan",
+    }))
+
+    hostnames = await networking._reverse_lookups(["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+    # The DNS answer wins; NXDOMAIN falls back to the system resolver
+    assert hostnames == {"10.0.0.1": "host.test", "10.0.0.2": "printer.lan", "10.0.0.3": "Unknown"}
+    assert server.queries[("udp", "1.0.0.10.in-addr.arpa", "PTR")] == 1
+    assert server.queries[("udp", "2.0.0.10.in-addr.arpa", "PTR")] == 1
+    # Every answer, positive and NXDOMAIN, measured the resolver
+    assert estimator.get(RESOLVER_KEY).samples == 3
+
+
+@pytest.mark.asyncio
+async def test_scan_reverse_lookups_without_a_dns_server(stub, monkeypatch):
+    server, client = stub
+    client.server = None
+    monkeypatch.setattr(networking, "dns_client", client)
+    monkeypatch.setattr(networking, "rtt_estimator", RTTEstimator())
+    monkeypatch.setattr(networking.socket, "gethostbyaddr", system_resolver({"10.0.0.1": "router.lan"}))
+
+    hostnames = await networking._reverse_lookups(["10.0.0.1", "10.0.0.2"])
+    assert hostnames == {"10.0.0.1": "router.lan", "10.0.0.2": "Unknown"}
+    assert not server.queries
+
+
+@pytest.mark.asyncio
+async def test_scan_reverse_lookup_falls_back_when_dns_times_out(monkeypatch):
+    # A UDP socket that never answers
+    loop = asyncio.get_running_loop()
+    silent, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, local_addr=("127.0.0.1", 0))
+    port = silent.get_extra_info("sockname")[1]
+    estimator = RTTEstimator()
+    estimator.observe(RESOLVER_KEY, 0.05)
+    monkeypatch.setattr(networking, "dns_client", DNSClient(server=("127.0.0.1", port), timeout=5.0, retries=0))
+    monkeypatch.setattr(networking, "rtt_estimator", estimator)
+    monkeypatch.setattr(networking.socket, "gethostbyaddr", system_resolver({"10.0.0.1": "router.lan"}))
+
+    started = time.monotonic()
+    try:
+        assert await networking._reverse_lookup("10.0.0.1") == "router.lan"
+    finally:
+        silent.close()
+    # Bounded by the RTT-derived timeout, not the client's 5 s
+    assert time.monotonic() - started < 1.0
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_dedupes_and_limits_concurrency(stub, monkeypatch):
+    server, client = stub
+    in_flight = {"now": 0, "max": 0}
+    resolve = client._resolve
+
+    async def slow_resolve(name, record_type):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        try:
+            await asyncio.sleep(0.05)
+            return await resolve(name, record_type)
+        finally:
+            in_flight["now"] -= 1
+
+    monkeypatch.setattr(client, "_resolve", slow_resolve)
+    names = ["host.test", "big.test", "host.test", "missing.test", "mail.test", "big.test"]
+
+    results = await client.resolve_many(names, "A", concurrency=2)
+
+    # One entry and one query per unique name, in first-seen order
+    assert list(results) == ["host.test", "big.test", "missing.test", "mail.test"]
+    assert server.queries[("udp", "host.test", "A")] == 1
+    assert server.queries[("udp", "big.test", "A")] == 1
+    assert in_flight["max"] == 2
+    assert results["host.test"].values == ["10.0.0.1"]
+    assert len(results["big.test"].values) == 40
+    assert results["missing.test"].rcode == RCODE_NXDOMAIN
+    # mail.test exists but has no A record: NODATA
+    assert results["mail.test"].values == []
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_returns_errors_per_name(stub):
+    _, client = stub
+    client.server = None
+    results = await client.resolve_many(["host.test", "mail.test"])
+    assert all(isinstance(result, DNSError) for result in results.values())
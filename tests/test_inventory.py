@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timedelta
+
+from netbot.core.inventory import _merge_batch
+from netbot.core.results import Device as ScannedDevice
+from netbot.db.crud import (
+    create_scan_run, get_device_by_ip, get_scan_entries, record_departed_devices,
+    set_device_open_ports, upsert_devices
+)
+from netbot.db.models import Device
+
+MAC = "aa-bb-cc-dd-ee-ff"
+
+
+def scan(db, batches, now):
+    """Merge batches of scanned devices as one scan run"""
+    run = create_scan_run(db, "10.0.0.0", incremental=False, started_at=now)
+    for batch in batches:
+        _merge_batch(db, run, batch, set(), now)
+    run.left_count = record_departed_devices(db, run.id, now)
+    db.commit()
+    return run
+
+
+def test_open_ports_are_merged(db):
+    upsert_devices(db, [{"ip": "10.0.0.5", "mac": MAC, "hostname": "nas"}])
+    set_device_open_ports(db, "10.0.0.5", [22, 80])
+    # A later check of other ports keeps what it didn't check
+    set_device_open_ports(db, "10.0.0.5", [443], closed_ports=[80, 8080])
+    assert json.loads(get_device_by_ip(db, "10.0.0.5").open_ports) == [22, 443]
+
+
+def test_open_ports_of_unknown_ip(db):
+    assert set_device_open_ports(db, "10.0.0.9", [22]) == 0
+
+
+def test_shared_mac_keeps_one_device_per_ip(db):
+    now = datetime(2026, 1, 1, 12, 0)
+    router = ScannedDevice(ip="10.0.0.1", mac=MAC, hostname="router")
+    proxied = ScannedDevice(ip="10.0.0.50", mac=MAC, hostname="Unknown")
+
+    # The duplicate MAC shows up in a later batch of the same scan
+    first = scan(db, [[router], [proxied]], now)
+    assert first.device_count == 2
+    assert first.joined_count == 2
+    assert db.query(Device).count() == 2
+    assert get_device_by_ip(db, "10.0.0.1").hostname == "router"
+    assert get_device_by_ip(db, "10.0.0.50").device_key == "aa:bb:cc:dd:ee:ff@10.0.0.50"
+
+    # Scanning the same network again reports no changes
+    second = scan(db, [[router, proxied]], now + timedelta(minutes=5))
+    assert (second.joined_count, second.changed_count, second.left_count) == (0, 0, 0)
+    assert get_device_by_ip(db, "10.0.0.1").ip == "10.0.0.1"
+
+
+def test_entry_listed_twice_is_merged_once(db):
+    now = datetime(2026, 1, 1, 12, 0)
+    device = ScannedDevice(ip="10.0.0.7", mac=MAC, hostname="printer")
+    # Same IP and MAC on two interfaces
+    run = scan(db, [[device, device]], now)
+    assert run.device_count == 1
+    assert len(get_scan_entries(db, run.id, limit=10)) == 1
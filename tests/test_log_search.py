@@ -0,0 +1,26 @@
+import pytest
+
+from netbot.db.crud import build_fts_query, create_action_logs, search_logs
+
+
+@pytest.mark.parametrize("search, query", [
+    ("10.0.0.1", '"10.0.0.1"'),
+    ("errors and timeouts", '"errors" "timeouts"'),
+    ("10.0.0.1, 10.0.0.2", '("10.0.0.1") OR ("10.0.0.2")'),
+    ("router or printer", '("router") OR ("printer")'),
+    ('say "hi"', '"say" """hi"""'),
+    (" , ", ""),
+])
+def test_build_fts_query(search, query):
+    assert build_fts_query(search) == query
+
+
+def test_search_with_several_hosts_finds_each(db):
+    create_action_logs(db, [
+        {"action": "ping", "parameters": {"host": host}, "result_summary": f"{host} is online", "status": "success"}
+        for host in ("10.0.0.1", "10.0.0.2", "10.0.0.3")
+    ])
+
+    hosts = sorted(row["parameters"] for row in search_logs(db, "10.0.0.1, 10.0.0.2"))
+    assert hosts == ['{"host": "10.0.0.1"}', '{"host": "10.0.0.2"}']
+    assert len(search_logs(db, "online and 10.0.0.3")) == 1
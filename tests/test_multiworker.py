@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import time
+
+import orjson
+import pytest
+
+from netbot.core.dns_client import DNSAnswer, DNSClient, DNSRecord
+from netbot.core.multiworker import LogSpool, SharedCache
+from netbot.workers import FileLock
+
+
+def make_entry(host):
+    return {
+        "timestamp": "2026-01-02T03:04:05.123456",
+        "action": "ping",
+        "parameters": {"host": host},
+        "result_summary": f"{host} is online",
+        "status": "success",
+        "duration_ms": 1.5
+    }
+
+
+def write_ready(spool, name, lines):
+    path = os.path.join(spool.directory, name)
+    with open(path, "wb") as f:
+        f.write(b"".join(lines))
+    return path
+
+
+def test_drain_writes_ready_files_oldest_first(tmp_path):
+    spool = LogSpool(str(tmp_path))
+    first = write_ready(spool, "1-a.ready", [orjson.dumps(make_entry("10.0.0.1")) + b"\n"])
+    second = write_ready(spool, "1-b.ready", [orjson.dumps(make_entry("10.0.0.2")) + b"\n"])
+    os.utime(first, (1000, 1000))
+    os.utime(second, (2000, 2000))
+
+    written = []
+    assert spool.drain(written.extend) == 2
+    assert [e["parameters"]["host"] for e in written] == ["10.0.0.1", "10.0.0.2"]
+    assert written[0]["timestamp"].year == 2026
+    assert not list(tmp_path.glob("*.ready"))
+
+
+def test_drain_quarantines_torn_line_and_keeps_going(tmp_path):
+    spool = LogSpool(str(tmp_path))
+    # What a worker that crashed mid-append leaves behind
+    torn = write_ready(spool, "1-a.ready", [
+        orjson.dumps(make_entry("10.0.0.1")) + b"\n",
+        b'{"action":"pi',
+    ])
+    behind = write_ready(spool, "2-b.ready", [orjson.dumps(make_entry("10.0.0.2")) + b"\n"])
+    os.utime(torn, (1000, 1000))
+    os.utime(behind, (2000, 2000))
+
+    written = []
+    assert spool.drain(written.extend) == 2
+    assert [e["parameters"]["host"] for e in written] == ["10.0.0.1", "10.0.0.2"]
+    assert not list(tmp_path.glob("*.ready"))
+    assert (tmp_path / "1-a.bad").read_bytes() == b'{"action":"pi\n'
+
+    # Nothing is left to retry
+    assert spool.drain(written.extend) == 0
+
+
+def test_drain_skips_lines_that_are_not_entries(tmp_path):
+    spool = LogSpool(str(tmp_path))
+    write_ready(spool, "1-a.ready", [b"[1, 2]\n", b'{"status": "success"}\n', b"\n"])
+
+    written = []
+    assert spool.drain(written.extend) == 0
+    assert written == []
+    assert len((tmp_path / "1-a.bad").read_bytes().splitlines()) == 2
+
+
+def test_failed_write_keeps_file_for_retry_without_blocking_others(tmp_path):
+    spool = LogSpool(str(tmp_path))
+    failing = write_ready(spool, "1-a.ready", [orjson.dumps(make_entry("10.0.0.1")) + b"\n"])
+    other = write_ready(spool, "2-b.ready", [orjson.dumps(make_entry("10.0.0.2")) + b"\n"])
+    os.utime(failing, (1000, 1000))
+    os.utime(other, (2000, 2000))
+
+    written = []
+
+    def write(entries):
+        if entries[0]["parameters"]["host"] == "10.0.0.1":
+            raise RuntimeError("database is locked")
+        written.extend(entries)
+
+    assert spool.drain(write) == 1
+    assert [e["parameters"]["host"] for e in written] == ["10.0.0.2"]
+    assert os.path.exists(failing)
+    assert not os.path.exists(other)
+
+    assert spool.drain(written.extend) == 1
+    assert not os.path.exists(failing)
+
+
+def test_file_lock_goes_to_the_next_holder_once_released(tmp_path):
+    path = str(tmp_path / "leader.lock")
+    # Two handles on one file stand in for two workers; flock treats them apart
+    leader, follower = FileLock(path), FileLock(path)
+    assert leader.acquire()
+    assert not follower.acquire()
+    assert not follower.held
+
+    leader.release()
+    assert follower.acquire()
+    assert not leader.acquire()
+    follower.release()
+
+
+def test_shared_cache_entries_are_seen_by_other_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SharedCache(path), SharedCache(path)
+    first.set("dns:example.test:A", b"answer", 60)
+    value, remaining = second.get("dns:example.test:A")
+    assert value == b"answer"
+    assert 0 < remaining <= 60
+
+    first.set("dns:gone.test:A", b"old", -1)
+    assert second.get("dns:gone.test:A") is None
+    assert second.purge_expired() == 1
+
+
+def test_busy_shared_cache_skips_the_write_without_waiting(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SharedCache(path)
+    cache.set("dns:example.test:A", b"answer", 60)
+
+    # Another worker holding the write lock
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        started = time.perf_counter()
+        cache.set("dns:example.test:A", b"newer", 60)
+        assert time.perf_counter() - started < 1.0
+        # WAL readers aren't blocked by the writer
+        assert cache.get("dns:example.test:A")[0] == b"answer"
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    assert cache.get("dns:example.test:A")[0] == b"answer"
+
+
+@pytest.mark.asyncio
+async def test_dns_answer_cached_by_one_worker_is_a_hit_in_another(tmp_path):
+    path = str(tmp_path / "cache.db")
+    answer = DNSAnswer(
+        name="example.test", type="A", rcode=0,
+        records=[DNSRecord("example.test", "A", 300, "192.0.2.1")], ttl=300
+    )
+    first = DNSClient(server="127.0.0.1")
+    first.shared_cache = SharedCache(path)
+    await first._shared_cache_put(("example.test", "A"), answer)
+
+    # No server to ask, so the answer can only come from the shared cache
+    second = DNSClient(server="127.0.0.1")
+    second.server = None
+    second.shared_cache = SharedCache(path)
+    cached = await second.query("example.test", "A")
+    assert cached.from_cache
+    assert cached.records[0].value == "192.0.2.1"
+    # And it's kept locally after that
+    second.shared_cache = None
+    assert (await second.query("example.test", "A")).records[0].value == "192.0.2.1"
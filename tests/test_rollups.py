@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from netbot.db.crud import create_action_logs, rebuild_rollups
+from netbot.db.models import ActionLog, ActionRollupDaily, ActionRollupHourly, TargetStat
+
+
+def log_at(timestamp, host="10.0.0.1"):
+    return {
+        "timestamp": timestamp,
+        "action": "ping",
+        "parameters": {"host": host},
+        "result_summary": "online",
+        "status": "success",
+        "duration_ms": 10.0
+    }
+
+
+def hourly(db):
+    return {row.bucket: row.count for row in db.query(ActionRollupHourly)}
+
+
+def daily(db):
+    return {row.bucket: row.count for row in db.query(ActionRollupDaily)}
+
+
+def seed(db):
+    create_action_logs(db, [
+        log_at(datetime(2026, 1, 1, 9, 15)),
+        log_at(datetime(2026, 1, 1, 9, 45)),
+        log_at(datetime(2026, 1, 2, 10, 5)),
+        log_at(datetime(2026, 1, 2, 10, 50)),
+        log_at(datetime(2026, 1, 3, 8, 0)),
+    ])
+
+
+def test_rebuild_restores_deleted_rollups(db):
+    seed(db)
+    before_hourly, before_daily = hourly(db), daily(db)
+    db.query(ActionRollupHourly).delete()
+    db.query(ActionRollupDaily).delete()
+    db.query(TargetStat).delete()
+    db.commit()
+
+    assert rebuild_rollups(db) == 5
+    assert hourly(db) == before_hourly
+    assert daily(db) == before_daily
+    assert db.query(TargetStat).one().count == 5
+
+
+def test_rebuild_keeps_history_of_logs_removed_by_retention(db):
+    seed(db)
+    before_hourly, before_daily = hourly(db), daily(db)
+
+    # Retention removed everything before 2026-01-02 10:30
+    db.query(ActionLog).filter(ActionLog.timestamp < datetime(2026, 1, 2, 10, 30)).delete()
+    db.commit()
+
+    assert rebuild_rollups(db) == 2
+    assert hourly(db) == before_hourly
+    assert daily(db) == before_daily
+    assert db.query(TargetStat).one().count == 5
+
+
+def test_rebuild_fills_partly_covered_bucket_only_when_missing(db):
+    seed(db)
+    db.query(ActionLog).filter(ActionLog.timestamp < datetime(2026, 1, 2, 10, 30)).delete()
+    db.query(ActionRollupHourly).delete()
+    db.commit()
+
+    rebuild_rollups(db)
+    # The 10:00 bucket had no rollup left, so it's rebuilt from the log still there
+    assert hourly(db) == {datetime(2026, 1, 2, 10): 1, datetime(2026, 1, 3, 8): 1}
+
+
+def test_rebuild_without_logs_keeps_rollups(db):
+    seed(db)
+    before_daily = daily(db)
+    db.query(ActionLog).delete()
+    db.commit()
+
+    assert rebuild_rollups(db) == 0
+    assert daily(db) == before_daily
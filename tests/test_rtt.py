@@ -0,0 +1,79 @@
+import pytest
+
+from netbot.core.rtt import ALPHA, BETA, K, RTTEstimator
+
+
+def test_first_sample_sets_srtt_and_half_variance():
+    estimator = RTTEstimator()
+    estimator.observe("10.0.0.1", 0.1)
+    stats = estimator.get("10.0.0.1")
+    assert stats.srtt == pytest.approx(0.1)
+    assert stats.rttvar == pytest.approx(0.05)
+    assert stats.samples == 1
+
+
+def test_later_samples_are_smoothed():
+    estimator = RTTEstimator()
+    estimator.observe("10.0.0.1", 0.1)
+    estimator.observe("10.0.0.1", 0.3)
+    stats = estimator.get("10.0.0.1")
+    # RTTVAR uses the SRTT from before this sample
+    assert stats.rttvar == pytest.approx((1 - BETA) * 0.05 + BETA * 0.2)
+    assert stats.srtt == pytest.approx((1 - ALPHA) * 0.1 + ALPHA * 0.3)
+    assert stats.samples == 2
+
+
+def test_steady_samples_converge():
+    estimator = RTTEstimator()
+    for _ in range(100):
+        estimator.observe("10.0.0.1", 0.02)
+    stats = estimator.get("10.0.0.1")
+    assert stats.srtt == pytest.approx(0.02)
+    assert stats.rttvar == pytest.approx(0, abs=1e-6)
+
+
+def test_invalid_samples_are_ignored():
+    estimator = RTTEstimator()
+    estimator.observe("10.0.0.1", -1)
+    estimator.observe("10.0.0.1", None)
+    estimator.observe(None, 0.1)
+    assert estimator.get("10.0.0.1") is None
+
+
+def test_timeout_of_unknown_host_is_the_default():
+    assert RTTEstimator().timeout("10.0.0.1", default=1.0) == 1.0
+
+
+def test_timeout_is_srtt_plus_k_rttvar():
+    estimator = RTTEstimator()
+    estimator.observe("10.0.0.1", 0.1)
+    assert estimator.timeout("10.0.0.1", default=1.0) == pytest.approx(0.1 + K * 0.05)
+
+
+def test_timeout_is_clamped():
+    estimator = RTTEstimator()
+    estimator.observe("lan", 0.0001)
+    estimator.observe("far", 10.0)
+    assert estimator.timeout("lan", default=1.0, floor=0.05) == 0.05
+    assert estimator.timeout("far", default=1.0, ceiling=5.0) == 5.0
+
+
+def test_oldest_host_is_evicted():
+    estimator = RTTEstimator(max_hosts=2)
+    estimator.observe("a", 0.1)
+    estimator.observe("b", 0.1)
+    # Updating a known host doesn't evict anything
+    estimator.observe("a", 0.2)
+    assert estimator.get("a") is not None and estimator.get("b") is not None
+
+    estimator.observe("c", 0.1)
+    assert estimator.get("a") is None
+    assert estimator.get("b") is not None
+    assert estimator.get("c") is not None
+
+
+def test_clear():
+    estimator = RTTEstimator()
+    estimator.observe("10.0.0.1", 0.1)
+    estimator.clear()
+    assert estimator.get("10.0.0.1") is None
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from netbot.api.endpoints import scan
+from netbot.core import inventory
+from netbot.core.inventory import get_scan_page
+from netbot.db.crud import add_scan_entries, create_scan_run
+
+
+@pytest.fixture
+def scan_id(db, monkeypatch):
+    """A stored scan: four devices found (two joined, one changed) and one left"""
+    monkeypatch.setattr(inventory, "get_session", sessionmaker(bind=db.get_bind()))
+    run = create_scan_run(db, "10.0.0.10", incremental=True, started_at=datetime(2026, 1, 1, 12, 0))
+    changes = [("10.0.0.1", "joined"), ("10.0.0.2", None), ("10.0.0.3", "changed"), ("10.0.0.4", "joined")]
+    add_scan_entries(db, [
+        {"scan_id": run.id, "device_key": ip, "ip": ip, "hostname": f"host{ip[-1]}", "online": True, "change": change}
+        for ip, change in changes
+    ] + [
+        {"scan_id": run.id, "device_key": "10.0.0.9", "ip": "10.0.0.9", "hostname": None, "online": False, "change": "left"}
+    ])
+    run.device_count, run.joined_count, run.changed_count, run.left_count = 4, 2, 1, 1
+    db.commit()
+    return run.id
+
+
+def test_pages_follow_the_cursor(scan_id):
+    first = get_scan_page(scan_id, limit=3)
+    assert first.status == "success"
+    assert first.total == 4
+    assert [d.ip for d in first.devices] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert first.next_cursor is not None
+
+    last = get_scan_page(scan_id, cursor=first.next_cursor, limit=3)
+    assert [d.ip for d in last.devices] == ["10.0.0.4"]
+    assert last.next_cursor is None
+
+
+def test_full_last_page_has_no_next_cursor(scan_id):
+    first = get_scan_page(scan_id, limit=2)
+    last = get_scan_page(scan_id, cursor=first.next_cursor, limit=2)
+    assert [d.ip for d in first.devices + last.devices] == ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"]
+    assert last.next_cursor is None
+
+
+@pytest.mark.parametrize("change, ips, status", [
+    ("joined", ["10.0.0.1", "10.0.0.4"], "online"),
+    ("changed", ["10.0.0.3"], "online"),
+    ("left", ["10.0.0.9"], "offline"),
+])
+def test_change_filter(scan_id, change, ips, status):
+    page = get_scan_page(scan_id, change=change)
+    assert [d.ip for d in page.devices] == ips
+    assert all(d.status == status and d.change == change for d in page.devices)
+    assert page.total == len(ips)
+
+
+def test_unknown_scan(scan_id):
+    assert get_scan_page(scan_id + 1).status == "not_found"
+
+
+def test_scan_endpoint(scan_id):
+    app = FastAPI()
+    app.include_router(scan.router)
+    client = TestClient(app)
+
+    response = client.get(f"/scan/{scan_id}", params={"limit": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert [d["ip"] for d in body["devices"]] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    following = client.get(f"/scan/{scan_id}", params={"cursor": body["next_cursor"], "limit": 3}).json()
+    assert [d["ip"] for d in following["devices"]] == ["10.0.0.4"]
+    assert following["next_cursor"] is None
+
+    assert client.get(f"/scan/{scan_id}", params={"change": "left"}).json()["total"] == 1
+    assert client.get(f"/scan/{scan_id}", params={"change": "gone"}).status_code == 400
+    assert client.get(f"/scan/{scan_id + 1}").status_code == 404
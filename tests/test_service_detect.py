@@ -0,0 +1,154 @@
+import http.server
+import socketserver
+import ssl
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from netbot.core import networking
+from netbot.core.networking import check_ports
+from netbot.core.service_detect import detect_service
+
+
+class GreetingHandler(socketserver.BaseRequestHandler):
+    """Says the server's greeting and waits for the client to hang up"""
+
+    def handle(self):
+        if self.server.greeting:
+            self.request.sendall(self.server.greeting)
+        self.request.settimeout(3)
+        try:
+            self.request.recv(1024)
+        except OSError:
+            pass
+
+
+class QuietHTTPHandler(http.server.SimpleHTTPRequestHandler):
+    server_version = "StandIn/1.0"
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    """Start stand-in servers on loopback; returns their ports"""
+    servers = []
+
+    def start(server):
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def greeting_server(serve, greeting):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), GreetingHandler)
+    server.greeting = greeting
+    return serve(server)
+
+
+def http_server(serve):
+    return serve(http.server.ThreadingHTTPServer(("127.0.0.1", 0), QuietHTTPHandler))
+
+
+@pytest.mark.parametrize("greeting, service, banner", [
+    (b"SSH-2.0-OpenSSH_9.6\r\n", "SSH", "SSH-2.0-OpenSSH_9.6"),
+    (b"220 mail.example.com ESMTP Postfix\r\n", "SMTP", "220 mail.example.com ESMTP Postfix"),
+    (b"220 ProFTPD Server (FTP) ready\r\n", "FTP", "220 ProFTPD Server (FTP) ready"),
+    (b"+OK Dovecot ready.\r\n", "POP3", "+OK Dovecot ready."),
+])
+def test_banner_services(serve, greeting, service, banner):
+    port = greeting_server(serve, greeting)
+    info = detect_service("127.0.0.1", port)
+    assert info.name == service
+    assert info.banner == banner
+
+
+def test_http_probe(serve):
+    port = http_server(serve)
+    info = detect_service("127.0.0.1", port)
+    assert info.name == "HTTP"
+    assert info.banner.startswith("StandIn/1.0")
+
+
+def test_silent_port_is_unknown_within_deadline(serve):
+    port = greeting_server(serve, b"")
+    started = time.monotonic()
+    info = detect_service("127.0.0.1", port, deadline=0.5)
+    assert info.name is None
+    assert time.monotonic() - started < 1.0
+
+
+def test_https_probe(serve, tmp_path):
+    cert, key = str(tmp_path / "cert.pem"), str(tmp_path / "key.pem")
+    try:
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+            check=True, capture_output=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("openssl is needed to make a certificate")
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), QuietHTTPHandler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    port = serve(server)
+
+    info = detect_service("127.0.0.1", port)
+    assert info.name == "HTTPS"
+    assert "StandIn/1.0" in info.banner
+
+
+def test_check_ports_replaces_port_names(serve):
+    ssh = greeting_server(serve, b"SSH-2.0-OpenSSH_9.6\r\n")
+    web = http_server(serve)
+    # Bound but not listening, so the port is closed
+    closed = socketserver.TCPServer(("127.0.0.1", 0), GreetingHandler, bind_and_activate=False)
+    closed.server_bind()
+    closed_port = closed.server_address[1]
+
+    try:
+        result = check_ports("127.0.0.1", [ssh, web, closed_port], detect=True)
+    finally:
+        closed.server_close()
+
+    assert result.status == "success"
+    by_port = {port.port: port for port in result.ports}
+    assert by_port[ssh].service == "SSH"
+    assert by_port[web].service == "HTTP"
+    assert not by_port[closed_port].open
+    assert not any(port.detection_skipped for port in result.ports)
+
+
+def test_busy_pool_skips_detection_within_one_deadline(serve, monkeypatch):
+    ports = [greeting_server(serve, b"SSH-2.0-OpenSSH_9.6\r\n") for _ in range(3)]
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    # Another request holds the only worker
+    pool.submit(release.wait)
+    monkeypatch.setattr(networking, "get_detect_executor", lambda: pool)
+    monkeypatch.setattr(networking, "DETECT_DEADLINE", 0.2)
+    monkeypatch.setattr(networking, "DETECT_WORKERS", 1)
+
+    started = time.monotonic()
+    try:
+        result = check_ports("127.0.0.1", ports, detect=True)
+    finally:
+        release.set()
+        pool.shutdown()
+    elapsed = time.monotonic() - started
+
+    # Three queued detections share one deadline of (3 + 1) * 0.2 s
+    assert elapsed < 1.5
+    assert all(port.open and port.detection_skipped for port in result.ports)
+    assert all(port.service == "Unknown" and port.banner is None for port in result.ports)
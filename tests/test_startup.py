@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..", "app")
+
+
+def test_importing_the_app_does_not_load_networking():
+    # A fresh interpreter, since the other tests have imported everything
+    code = (
+        "import sys, main; "
+        "print(sorted(m for m in sys.modules if m.split('.')[:2] == ['netbot', 'core']))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    for module in ("networking", "dns_client", "service_detect", "rtt", "bulk"):
+        assert f"'netbot.core.{module}'" not in output